@@ -0,0 +1,95 @@
+import random
+import tracemalloc
+from argparse import ArgumentParser
+from time import time
+from typing import Generator
+
+from src.repository_data_scraper.commit_graph import Bitset, CommitGraph
+from src.repository_data_scraper.commit_stream import CommitRecord
+from src.repository_data_scraper.programming_language import ProgrammingLanguage
+
+VALID_CHANGE_TYPES = ['A', 'M', 'MM']
+
+
+def generate_synthetic_history(amount_of_commits: int, seed: int = 0) -> Generator[CommitRecord, None, None]:
+    """
+    Generates a synthetic history of commit records in the order `git log` would yield them (children first).
+
+    The history consists of a main line with feature branches that are merged back every 50 commits. Each commit
+    changes one to four files out of a pool of 5000 Python, Markdown and JSON files.
+
+    Args:
+        amount_of_commits (int): The amount of commits to generate.
+        seed (int): Seed for the random number generator.
+
+    Yields:
+        CommitRecord: The synthetic commits.
+    """
+    generator = random.Random(seed)
+    files = [f'src/module_{i // 100}/file_{i}{generator.choice([".py", ".py", ".md", ".json"])}' for i in range(5000)]
+    messages = ['Fix typo', 'Update dependencies', 'Refactor', 'Add tests', 'Merge pull request']
+    hexshas = [f'{generator.getrandbits(160):040x}' for _ in range(amount_of_commits)]
+
+    for i, hexsha in enumerate(hexshas):
+        parents = [hexshas[i + 1]] if i + 1 < amount_of_commits else []
+        if i % 50 == 0 and i + 25 < amount_of_commits:
+            parents.append(hexshas[i + 25])
+
+        change_types = ['MM'] if len(parents) > 1 else ['M', 'M', 'A', 'D', 'R100']
+        changes = []
+        for file in generator.sample(files, generator.randint(1, 4)):
+            change_type = generator.choice(change_types)
+            changes.append(f'{change_type}\t{file}\t{file}.old' if change_type == 'R100' else f'{change_type}\t{file}')
+
+        message = generator.choice(messages) if generator.random() < 0.3 else f'Change number {i}\n\nDetails {i}\n'
+        yield CommitRecord(hexsha=hexsha, parents=parents, committed_date=1_600_000_000 + amount_of_commits - i,
+                           message=message, changes=changes)
+
+
+def measure_commit_records(amount_of_commits: int):
+    """
+    Holds all commit records in a dict keyed by hexsha and the visited commits as a set of hexsha strings.
+    """
+    commit_records = {commit_record.hexsha: commit_record
+                      for commit_record in generate_synthetic_history(amount_of_commits)}
+    visited_commits = set(commit_records)
+    return commit_records, visited_commits
+
+
+def measure_commit_graph(amount_of_commits: int):
+    """
+    Holds the commits in a CommitGraph and the visited commits as a Bitset.
+    """
+    commit_graph = CommitGraph.from_commit_records(generate_synthetic_history(amount_of_commits),
+                                                   programming_language=ProgrammingLanguage.PYTHON,
+                                                   valid_change_types=VALID_CHANGE_TYPES)
+    visited_commits = Bitset(len(commit_graph))
+    for commit in range(len(commit_graph)):
+        visited_commits.add(commit)
+    return commit_graph, visited_commits
+
+
+def main():
+    parser = ArgumentParser(description='Compares the memory footprint of the commit representations used while '
+                                        'scraping a synthetic history.')
+    parser.add_argument('-n', '--amount-of-commits', type=int, default=500_000,
+                        help='The amount of commits in the synthetic history.')
+    args = parser.parse_args()
+
+    # The synthetic hashes and file names are generated in both measurements, thus the baseline is comparable
+    for name, measurement in [('CommitRecord dict + set of hexsha strings', measure_commit_records),
+                              ('CommitGraph + Bitset', measure_commit_graph)]:
+        tracemalloc.start()
+        start = time()
+        result = measurement(args.amount_of_commits)
+        elapsed = time() - start
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del result
+
+        print(f'{name}: retained {current / 1024 ** 2:.1f} MiB, peak {peak / 1024 ** 2:.1f} MiB, '
+              f'built in {elapsed:.1f}s for {args.amount_of_commits} commits')
+
+
+if __name__ == '__main__':
+    main()
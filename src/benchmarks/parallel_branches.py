@@ -0,0 +1,130 @@
+import contextlib
+import io
+import os
+import random
+import subprocess
+import tempfile
+from argparse import ArgumentParser
+from time import time
+
+from git import Repo
+
+from src.repository_data_scraper.programming_language import ProgrammingLanguage
+from src.repository_data_scraper.repository_data_scraper import RepositoryDataScraper
+
+
+def generate_many_branch_repository(path: str, amount_of_branches: int, amount_of_commits_per_branch: int,
+                                    seed: int = 0):
+    """
+    Generates a bare repository with a main line and many branches forking off it via `git fast-import`.
+
+    The main line has one commit per branch. Each branch forks off a random main line commit and adds
+    amount_of_commits_per_branch commits, each changing one to three files out of a pool of 200 Python files. Every
+    fourth commit of a branch merges a later main line commit into the branch.
+
+    Args:
+        path (str): The path of the bare repository to create.
+        amount_of_branches (int): The amount of branches besides main.
+        amount_of_commits_per_branch (int): The amount of commits on each branch.
+        seed (int): Seed for the random number generator.
+    """
+    generator = random.Random(seed)
+    files = [f'src/module_{i // 20}/file_{i}.py' for i in range(200)]
+    subprocess.run(['git', 'init', '--bare', '-q', '--initial-branch', 'main', path], check=True)
+
+    commands = []
+    mark = 0
+
+    def add_commit(branch: str, parent_marks: list) -> int:
+        nonlocal mark
+        mark += 1
+        commands.append(f'commit refs/heads/{branch}\nmark :{mark}\n'
+                        f'committer Benchmark <benchmark@example.com> {1_600_000_000 + mark} +0000\n'
+                        f'data <<EOM\nCommit {mark}\nEOM\n')
+        if parent_marks:
+            commands.append(f'from :{parent_marks[0]}\n')
+        for parent_mark in parent_marks[1:]:
+            commands.append(f'merge :{parent_mark}\n')
+        for file in generator.sample(files, generator.randint(1, 3)):
+            content = f'value = {generator.random()}\n'
+            commands.append(f'M 100644 inline {file}\ndata {len(content)}\n{content}')
+        commands.append('\n')
+        return mark
+
+    main_line = []
+    for _ in range(amount_of_branches):
+        main_line.append(add_commit('main', main_line[-1:]))
+
+    for branch in range(amount_of_branches):
+        fork_point = generator.randrange(len(main_line))
+        parent_mark = main_line[fork_point]
+        for i in range(1, amount_of_commits_per_branch + 1):
+            if i % 4 == 0 and fork_point < len(main_line) - 1:
+                fork_point = generator.randrange(fork_point + 1, len(main_line))
+                parent_mark = add_commit(f'branch-{branch}', [parent_mark, main_line[fork_point]])
+            else:
+                parent_mark = add_commit(f'branch-{branch}', [parent_mark])
+
+    subprocess.run(['git', '--git-dir', path, 'fast-import', '--quiet'], input=''.join(commands).encode('utf-8'),
+                   check=True)
+
+
+def measure_scrape(repository_path: str, programming_language: ProgrammingLanguage, sliding_window_size: int,
+                   max_workers: int):
+    """
+    Returns:
+        Tuple[float, dict]: The duration of the scrape in seconds and the accumulator.
+    """
+    repository_data_scraper = RepositoryDataScraper(repository=Repo(repository_path),
+                                                    programming_language=programming_language,
+                                                    repository_name=os.path.basename(repository_path),
+                                                    sliding_window_size=sliding_window_size,
+                                                    max_workers=max_workers)
+    start = time()
+    with contextlib.redirect_stderr(io.StringIO()):
+        repository_data_scraper.scrape()
+    return time() - start, repository_data_scraper.accumulator
+
+
+def main():
+    parser = ArgumentParser(description='Compares scraping the branches of a repository sequentially and in a process '
+                                        'pool on the testing repositories and a generated repository with many '
+                                        'branches.')
+    parser.add_argument('-b', '--amount-of-branches', type=int, default=2000,
+                        help='The amount of branches in the generated repository.')
+    parser.add_argument('-c', '--amount-of-commits-per-branch', type=int, default=10,
+                        help='The amount of commits on each branch of the generated repository.')
+    parser.add_argument('-s', '--sliding-window-size', type=int, default=3,
+                        help='The sliding window size of the scrapes.')
+    parser.add_argument('-w', '--max-workers', type=int, nargs='+', default=[2, 4, 8],
+                        help='The amounts of worker processes to compare against the sequential scrape.')
+    args = parser.parse_args()
+
+    path_to_testing_repositories = os.path.join(os.getcwd(), 'repos', 'testing-repositories')
+    repositories = [(os.path.join(path_to_testing_repositories, repository), ProgrammingLanguage.TEXT)
+                    for repository in sorted(os.listdir(path_to_testing_repositories))
+                    if not repository.startswith('.')]
+
+    print(f'{os.cpu_count()} cores available')
+    with tempfile.TemporaryDirectory() as directory:
+        many_branch_repository_path = os.path.join(directory, 'many-branches.git')
+        generate_many_branch_repository(many_branch_repository_path, args.amount_of_branches,
+                                        args.amount_of_commits_per_branch)
+        repositories.append((many_branch_repository_path, ProgrammingLanguage.PYTHON))
+
+        for repository_path, programming_language in repositories:
+            sequential_duration, sequential_accumulator = measure_scrape(repository_path, programming_language,
+                                                                         args.sliding_window_size, 1)
+            print(f'{os.path.basename(repository_path)}: sequential {sequential_duration:.2f}s')
+
+            for max_workers in args.max_workers:
+                duration, accumulator = measure_scrape(repository_path, programming_language,
+                                                       args.sliding_window_size, max_workers)
+                speedup = sequential_duration / duration
+                print(f'  {max_workers} workers: {duration:.2f}s, speedup {speedup:.2f}x '
+                      f'({speedup / max_workers:.2f}x per core), '
+                      f'{"equal to" if accumulator == sequential_accumulator else "DIFFERENT from"} sequential')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+import os
+import random
+import statistics
+import subprocess
+import tempfile
+from argparse import ArgumentParser
+from dataclasses import fields
+from time import time
+from typing import List
+
+from src.ideformer_client.environment.reset_strategy import ResetStrategy
+from src.ideformer_client.environment.scenario_environment_manager import ScenarioEnvironmentManager
+from src.ideformer_client.environment.scenario_type import ScenarioType
+from src.repository_data_scraper.repository_cache import RepositoryCache
+from src.test.helpers import LocalContainer
+from src.yt_scripts.schemas import RepositoryDataRow, RepositoryMetadataRow
+
+
+def generate_large_repository(path: str, amount_of_files: int, amount_of_commits: int, seed: int = 0) -> List[str]:
+    """
+    Generates a bare repository via `git fast-import`, whose first commit adds amount_of_files files and whose
+    following commits each change one to ten of them.
+
+    Returns:
+        List[str]: The hashes of the commits, oldest first.
+    """
+    generator = random.Random(seed)
+    files = [f'src/module_{i // 100}/file_{i}.py' for i in range(amount_of_files)]
+    subprocess.run(['git', 'init', '--bare', '-q', '--initial-branch', 'main', path], check=True)
+
+    commands = []
+    for mark in range(1, amount_of_commits + 1):
+        commands.append(f'commit refs/heads/main\nmark :{mark}\n'
+                        f'committer Benchmark <benchmark@example.com> {1_600_000_000 + mark} +0000\n'
+                        f'data <<EOM\nCommit {mark}\nEOM\n')
+        if mark > 1:
+            commands.append(f'from :{mark - 1}\n')
+        for file in files if mark == 1 else generator.sample(files, generator.randint(1, 10)):
+            content = f'value = {generator.random()}\n' * 20
+            commands.append(f'M 100644 inline {file}\ndata {len(content)}\n{content}')
+        commands.append('\n')
+
+    subprocess.run(['git', '--git-dir', path, 'fast-import', '--quiet'], input=''.join(commands).encode('utf-8'),
+                   check=True)
+    return subprocess.run(['git', '--git-dir', path, 'rev-list', '--reverse', 'main'], check=True,
+                          capture_output=True, text=True).stdout.split()
+
+
+def measure_scenarios(reset_strategy: ResetStrategy, repository: RepositoryDataRow, cache_directory: str,
+                      scenarios: List[dict]):
+    """
+    Returns:
+        Tuple[float, List[float]]: The duration of setting up the repository and the durations of setting up and
+            tearing down each scenario, in seconds.
+    """
+    with tempfile.TemporaryDirectory() as container_directory:
+        scenario_environment_manager = ScenarioEnvironmentManager(LocalContainer(container_directory), repository,
+                                                                  repository_cache_path=cache_directory,
+                                                                  reset_strategy=reset_strategy)
+        start = time()
+        scenario_environment_manager.setup_repository()
+        repository_setup_duration = time() - start
+
+        scenario_environment_manager.set_scenario_type(ScenarioType.FILE_COMMIT_GRAM_REBASE)
+        scenario_durations = []
+        for scenario in scenarios:
+            scenario_environment_manager.set_scenario(scenario)
+            start = time()
+            scenario_environment_manager.setup_scenario_preconditions()
+            # Stands in for the agent, whose commit becomes unreachable by the teardown
+            subprocess.run(['git', '-c', 'user.name=agent', '-c', 'user.email=agent@example.com', 'commit',
+                            '--allow-empty', '-q', '-m', 'Change made by the agent'],
+                           cwd=scenario_environment_manager.repository_work_dir, check=True)
+            scenario_environment_manager.teardown_scenario()
+            scenario_durations.append(time() - start)
+
+        return repository_setup_duration, scenario_durations
+
+
+def main():
+    parser = ArgumentParser(description='Compares the per-scenario setup and teardown latency of the reset strategies '
+                                        'on a generated repository with many files.')
+    parser.add_argument('-f', '--amount-of-files', type=int, default=20000,
+                        help='The amount of files in the generated repository.')
+    parser.add_argument('-c', '--amount-of-commits', type=int, default=2000,
+                        help='The amount of commits in the generated repository.')
+    parser.add_argument('-s', '--amount-of-scenarios', type=int, default=20,
+                        help='The amount of scenarios to set up and tear down per reset strategy.')
+    args = parser.parse_args()
+
+    metadata = {field.name: None for field in fields(RepositoryMetadataRow)}
+    metadata.update({'id': 0, 'name': 'benchmark/large-repository'})
+    repository = RepositoryDataRow(**metadata, file_commit_gram_scenarios=None, merge_scenarios=None,
+                                   cherry_pick_scenarios=None, error=None)
+
+    with tempfile.TemporaryDirectory() as cache_directory:
+        # The generated repository serves as the snapshot of the repository cache, thus it is cloned locally
+        commits = generate_large_repository(os.path.join(cache_directory, RepositoryCache.get_mirror_name(
+            repository.name)), args.amount_of_files, args.amount_of_commits)
+        scenarios = [{'first_commit': commit} for commit in random.Random(0).sample(commits, args.amount_of_scenarios)]
+
+        for reset_strategy in ResetStrategy:
+            repository_setup_duration, scenario_durations = measure_scenarios(reset_strategy, repository,
+                                                                              cache_directory, scenarios)
+            print(f'{reset_strategy.value}: repository setup {repository_setup_duration:.2f}s, per scenario '
+                  f'mean {statistics.mean(scenario_durations) * 1000:.0f}ms, '
+                  f'median {statistics.median(scenario_durations) * 1000:.0f}ms, '
+                  f'max {max(scenario_durations) * 1000:.0f}ms')
+
+
+if __name__ == '__main__':
+    main()
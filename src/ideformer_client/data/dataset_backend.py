@@ -0,0 +1,172 @@
+import json
+from abc import ABC, abstractmethod
+from dataclasses import fields
+from typing import Dict, Iterable, List, Optional, Union, get_args
+
+from src.yt_scripts.schemas import RepositoryDataRow, RepositoryMetadataRow, SCENARIO_ROW_TYPES, to_scenario_rows
+
+
+def _fold_column_name(name: str) -> str:
+    """
+    Folds snake case and camel case column names to the same name, e.g. 'last_commit_sha' and 'lastCommitSHA'.
+    """
+    return name.replace('_', '').lower()
+
+
+class DatasetBackend(ABC):
+    """
+    A source of the dataset, which streams RepositoryDataRow objects to the GitDatasetProvider.
+    """
+
+    @abstractmethod
+    def get_dataset_stream(self) -> Iterable[RepositoryDataRow]:
+        """
+        Returns:
+            Iterable[RepositoryDataRow]: Data stream of the repositories in the dataset.
+        """
+        pass
+
+
+class LocalDatasetBackend(DatasetBackend, ABC):
+    """
+    Reads the dataset from local files instead of YTsaurus, e.g. to benchmark the client loop offline.
+
+    Besides the layout of RepositoryDataRow, files written by the repository data scraper (camel case metadata columns
+    with the scenarios in the 'scraped_data' column, the default output of src/repository_data_scraper/main.py) are
+    supported. As these lack the programming_language column, it is derived from the lower cased mainLanguage column.
+    """
+
+    def __init__(self, path: str, programming_language: Optional[str] = None,
+                 scenario_types: Optional[List[str]] = None):
+        """
+        Args:
+            path (str): The path of the dataset.
+            programming_language (Optional[str]): If given, only repositories of this programming language are
+                streamed, e.g. 'kotlin'.
+            scenario_types (Optional[List[str]]): The scenario columns to read, e.g. ['merge_scenarios']. The columns
+                of all other scenario types are None. If None, all scenario columns are read.
+        """
+        self.path = path
+        self.programming_language = programming_language
+        self.scenario_types = list(SCENARIO_ROW_TYPES) if scenario_types is None else scenario_types
+
+    def _to_repository_data_row(self, record: Dict) -> RepositoryDataRow:
+        """
+        Args:
+            record (Dict): A repository with the column names of RepositoryDataRow, scenarios are lists of dicts.
+
+        Returns:
+            RepositoryDataRow: The repository, like it is streamed from YTsaurus.
+        """
+        columns = {field.name: record.get(field.name) for field in fields(RepositoryMetadataRow)}
+        for scenario_type in SCENARIO_ROW_TYPES:
+            scenarios = record.get(scenario_type) if scenario_type in self.scenario_types else None
+            columns[scenario_type] = None if scenarios is None else to_scenario_rows(scenario_type, scenarios)
+        return RepositoryDataRow(**columns, error=record.get('error'))
+
+
+class ParquetDatasetBackend(LocalDatasetBackend):
+    """
+    Streams a Parquet file or directory of Parquet files in batches via a memory mapped PyArrow dataset. Only the
+    columns of RepositoryDataRow and the requested scenario columns are read, and the filter on the programming
+    language is pushed down to the scan, which skips row groups based on their statistics.
+
+    PyArrow is only imported once the backend is created, so that the agent client does not require it unless Parquet
+    datasets are used.
+    """
+
+    def __init__(self, path: str, programming_language: Optional[str] = None,
+                 scenario_types: Optional[List[str]] = None, batch_size: int = 16):
+        """
+        Args:
+            batch_size (int): The amount of repositories to read at once.
+
+        See LocalDatasetBackend for the other arguments.
+        """
+        import pyarrow.dataset as ds
+        import pyarrow.fs
+
+        super().__init__(path, programming_language, scenario_types)
+        self.batch_size = batch_size
+        self.dataset = ds.dataset(path, format='parquet', filesystem=pyarrow.fs.LocalFileSystem(use_mmap=True))
+
+    def get_dataset_stream(self) -> Iterable[RepositoryDataRow]:
+        projection = self._get_projection()
+
+        row_filter = None
+        if self.programming_language is not None:
+            row_filter = projection['programming_language'] == self.programming_language
+
+        for batch in self.dataset.to_batches(columns=projection, filter=row_filter, batch_size=self.batch_size):
+            for record in batch.to_pylist():
+                yield self._to_repository_data_row(record)
+
+    def _get_projection(self) -> Dict[str, 'pyarrow.compute.Expression']:
+        """
+        Returns:
+            Dict[str, pyarrow.compute.Expression]: The expression to read each column of RepositoryDataRow with.
+                Columns missing from the dataset are not part of the projection.
+        """
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        # The Arrow types of the scalar columns of RepositoryDataRow
+        arrow_types = {int: pa.int64(), float: pa.float64(), str: pa.string(), bool: pa.bool_()}
+        column_names = {_fold_column_name(name): name for name in self.dataset.schema.names}
+
+        projection = {}
+        for field in fields(RepositoryMetadataRow):
+            column_name = column_names.get(_fold_column_name(field.name))
+            if column_name is not None:
+                # Files written via pandas may store integral float columns as integers and vice versa
+                arrow_type = arrow_types[next(iter(get_args(field.type)), field.type)]
+                projection[field.name] = pc.field(column_name).cast(arrow_type)
+        if 'programming_language' not in projection and 'mainlanguage' in column_names:
+            projection['programming_language'] = pc.utf8_lower(pc.field(column_names['mainlanguage']))
+        if 'error' in column_names:
+            projection['error'] = pc.field(column_names['error'])
+
+        for scenario_type in self.scenario_types:
+            if scenario_type in self.dataset.schema.names:
+                projection[scenario_type] = pc.field(scenario_type)
+            elif 'scraped_data' in self.dataset.schema.names:
+                projection[scenario_type] = pc.field('scraped_data', scenario_type)
+
+        return projection
+
+
+class JsonlDatasetBackend(LocalDatasetBackend):
+    """
+    Streams a JSON lines file with one repository per line, parsing one line at a time. Each line holds the columns of
+    RepositoryDataRow, with the scenarios as lists of objects.
+    """
+
+    def get_dataset_stream(self) -> Iterable[RepositoryDataRow]:
+        with open(self.path, 'r', encoding='utf-8') as file:
+            for line in file:
+                if not line.strip():
+                    continue
+
+                folded_record = {_fold_column_name(name): value for name, value in json.loads(line).items()}
+                record = {field.name: folded_record.get(_fold_column_name(field.name))
+                          for field in fields(RepositoryDataRow)}
+                if record['programming_language'] is None and folded_record.get('mainlanguage') is not None:
+                    record['programming_language'] = folded_record['mainlanguage'].lower()
+                if isinstance(folded_record.get('scrapeddata'), dict):
+                    record.update({scenario_type: folded_record['scrapeddata'].get(scenario_type)
+                                   for scenario_type in SCENARIO_ROW_TYPES})
+
+                if self.programming_language is not None and record['programming_language'] != self.programming_language:
+                    continue
+                yield self._to_repository_data_row(record)
+
+
+def create_local_dataset_backend(path: str, programming_language: Optional[str] = None,
+                                 scenario_types: Optional[List[str]] = None) -> Union[ParquetDatasetBackend,
+                                                                                       JsonlDatasetBackend]:
+    """
+    Creates the local dataset backend matching the file extension of path. Directories are read as Parquet datasets.
+    """
+    if path.endswith('.jsonl') or path.endswith('.json'):
+        return JsonlDatasetBackend(path, programming_language, scenario_types)
+    return ParquetDatasetBackend(path, programming_language, scenario_types)
@@ -1,12 +1,11 @@
-from yt.wrapper.response_stream import ResponseStream
-
 from src.ideformer_client.environment.scenario_type import ScenarioType
-from src.yt_scripts.schemas import RepositoryDataRow
+from src.yt_scripts.schemas import RepositoryDataRow, to_scenario_dicts
 
+import random
 import sys
-import ast
+from itertools import islice
 
-from typing import Dict, Generator, Optional
+from typing import Dict, Generator, Iterable, Iterator, List, Optional, Tuple
 
 
 class GitDatasetProvider:
@@ -15,13 +14,16 @@ class GitDatasetProvider:
         the scenarios of a repository.
     """
 
-    def __init__(self, record_response_stream: ResponseStream):
+    def __init__(self, record_response_stream: Iterable[RepositoryDataRow]):
         """
         Args:
-            record_response_stream: Stream containing the response data from YTsaurus.
+            record_response_stream: Stream containing the response data from YTsaurus, or the stream of any other
+                DatasetBackend.
         """
         self.dataset_stream = record_response_stream
         self.current_repository: Optional[RepositoryDataRow] = None
+        # Scenarios of the current repository already converted to dicts, by their column and index within the column
+        self._scenario_cache: Dict[Tuple[str, int], Dict] = {}
 
     def stream_repositories(self) -> Generator[RepositoryDataRow, None, None]:
         """
@@ -36,14 +38,13 @@ class GitDatasetProvider:
         """
         for repository in self.dataset_stream:
             self.current_repository = repository
+            self._scenario_cache = {}
             yield repository
 
-    def get_scenarios_for(self, scenario_type: ScenarioType) -> Dict:
+    def get_scenarios_for(self, scenario_type: ScenarioType) -> List[Dict]:
         """
-        Returns all scenarios of the specified scenario_type from the current repository as a dict.
-
-        Within the dataset the scenarios are stored as raw text, this means this function also parses the scenarios
-        from string to Python dictionaries. We thus advise to only call this function once per scenario_type and repository.
+        Returns all scenarios of the specified scenario_type from the current repository as a list of dicts. Prefer
+        iter_scenarios_for if not all scenarios are needed.
 
         Parameters:
             scenario_type (ScenarioType): The type of scenarios to return.
@@ -53,7 +54,33 @@ class GitDatasetProvider:
                 Or if self.current_repository is not initialized (None)
 
         Returns:
-            Dict: The scenarios of scenario_type as a dictionary.
+            List[Dict]: The scenarios of scenario_type.
+        """
+        return list(self.iter_scenarios_for(scenario_type))
+
+    def iter_scenarios_for(self, scenario_type: ScenarioType, skip: int = 0, limit: Optional[int] = None,
+                           sample_size: Optional[int] = None, seed: Optional[int] = None) -> Iterator[Dict]:
+        """
+        Lazily yields the scenarios of the specified scenario_type from the current repository, one at a time.
+
+        Within the dataset the scenarios are stored as structured columns. Each scenario is only converted to a dict
+        once it is requested, and the converted scenarios are cached until the next repository is streamed. Thus,
+        iterating over the scenarios of both file-commit gram scenario types converts each scenario once.
+
+        Parameters:
+            scenario_type (ScenarioType): The type of scenarios to yield.
+            skip (int): The amount of scenarios to skip.
+            limit (Optional[int]): The maximum amount of scenarios to yield. If None, all remaining scenarios are yielded.
+            sample_size (Optional[int]): If given, only a uniform random sample of this many scenarios is considered,
+                in random order. Skip and limit apply to the sample.
+            seed (Optional[int]): The seed of the sample, to reproduce it.
+
+        Raises:
+            ValueError if called with a ScenarioType that is not defined in the ScenarioType enum class.
+                Or if self.current_repository is not initialized (None)
+
+        Yields:
+            Dict: A scenario of scenario_type. Each scenario is a copy, callers may modify it.
         """
         if self.current_repository is None:
             raise ValueError('Current repository has not been initialized.')
@@ -61,28 +88,25 @@ class GitDatasetProvider:
         # Since there are two different setups based on the file_commit_gram_scenarios we need to cover both here
         # See the enum class and the scenario precondition setup in the TerminalAccessToolProvider
         if 'file_commit_gram_scenarios' in scenario_type.value:
-            if self.current_repository.file_commit_gram_scenarios is None:
-                print(
-                    f'No scenario of type: {scenario_type} available for repository: {self.current_repository.name}. Returning None.',
-                    file=sys.stderr)
-                return {}
-            else:
-                return ast.literal_eval(self.current_repository.file_commit_gram_scenarios)
-        elif scenario_type is ScenarioType.MERGE:
-            if self.current_repository.merge_scenarios is None:
-                print(
-                    f'No scenario of type: {scenario_type} available for repository: {self.current_repository.name}. Returning None.',
-                    file=sys.stderr)
-                return {}
-            else:
-                return ast.literal_eval(self.current_repository.merge_scenarios)
-        elif scenario_type is ScenarioType.CHERRY_PICK:
-            if self.current_repository.cherry_pick_scenarios is None:
-                print(
-                    f'No scenario of type: {scenario_type} available for repository: {self.current_repository.name}. Returning empty dict.',
-                    file=sys.stderr)
-                return {}
-            else:
-                return ast.literal_eval(self.current_repository.cherry_pick_scenarios)
+            column = 'file_commit_gram_scenarios'
+        elif scenario_type in [ScenarioType.MERGE, ScenarioType.CHERRY_PICK]:
+            column = scenario_type.value
         else:
-            raise ValueError('Invalid scenario type. For valid types check the ScenarioType enum class.')
\ No newline at end of file
+            raise ValueError('Invalid scenario type. For valid types check the ScenarioType enum class.')
+
+        scenario_rows = getattr(self.current_repository, column)
+        if scenario_rows is None:
+            print(
+                f'No scenario of type: {scenario_type} available for repository: {self.current_repository.name}. Returning None.',
+                file=sys.stderr)
+            return
+
+        indices = range(len(scenario_rows))
+        if sample_size is not None:
+            indices = random.Random(seed).sample(indices, min(sample_size, len(scenario_rows)))
+
+        stop = None if limit is None else skip + limit
+        for index in islice(indices, skip, stop):
+            if (column, index) not in self._scenario_cache:
+                self._scenario_cache[(column, index)] = to_scenario_dicts([scenario_rows[index]])[0]
+            yield dict(self._scenario_cache[(column, index)])
@@ -2,10 +2,11 @@ import yt.wrapper as yt
 from yt.wrapper.response_stream import ResponseStream
 from yt.wrapper.schema import TableSchema
 
-from src.yt_scripts.schemas import RepositoryDataRow
+from src.ideformer_client.data.dataset_backend import DatasetBackend
+from src.yt_scripts.schemas import RepositoryDataRow, ScenarioRow
 
 
-class YTConnectionManager:
+class YTConnectionManager(DatasetBackend):
     """
     Orchestration class for communicating with the YTsaurus Map-Reduce platform where the dataset is stored.
     """
@@ -36,3 +37,30 @@ class YTConnectionManager:
             (yt.ResponseStream): Data stream of type 'RepositoryDataRow' from the specified dataset table path.
         """
         return yt.read_table_structured(table=self.dataset_table_path, row_type=RepositoryDataRow)
+
+    @staticmethod
+    def get_scenario_shard_stream(scenario_table_location: str, shard_index: int,
+                                  amount_of_shards: int) -> ResponseStream:
+        """
+        Reads a contiguous shard of a table of ScenarioRow (see yt_maintenance_utils.flatten_scenarios) in a streamed
+        manner. The shards of all amount_of_shards workers cover the table and differ in size by at most one row.
+
+        Args:
+            scenario_table_location (str): The location of the table of ScenarioRow.
+            shard_index (int): The index of the shard to read, in [0, amount_of_shards).
+            amount_of_shards (int): The amount of shards the table is split into.
+
+        Raises:
+            ValueError: If shard_index is not within [0, amount_of_shards).
+
+        Returns:
+            (yt.ResponseStream): Data stream of type 'ScenarioRow' of the rows in the shard.
+        """
+        if not 0 <= shard_index < amount_of_shards:
+            raise ValueError(f'Shard index {shard_index} is not within [0, {amount_of_shards}).')
+
+        row_count = yt.row_count(scenario_table_location)
+        table_path = yt.TablePath(scenario_table_location,
+                                  start_index=row_count * shard_index // amount_of_shards,
+                                  end_index=row_count * (shard_index + 1) // amount_of_shards)
+        return yt.read_table_structured(table=table_path, row_type=ScenarioRow)
@@ -0,0 +1,172 @@
+import asyncio
+import functools
+import logging
+import shlex
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Tuple, Union
+
+from docker.models.containers import Container
+
+from src.ideformer_client.environment.head_tail_output import HeadTailOutput
+
+
+class AsyncExecClient:
+    """
+    Runs commands in a container without blocking the event loop, such that many agent sessions can share one loop.
+
+    The blocking Docker calls run in a bounded executor, which is shared by all clients, thus a burst of commands
+    queues up instead of spawning a thread per command. Each command runs under the `timeout` utility within its own
+    process group, whose ID is written to a file in the container. A per-call timeout is thus enforced within the
+    container, and cancelling the call kills the whole process group, instead of leaving the command running.
+    """
+
+    # The maximum amount of Docker calls that run at once across all clients
+    MAX_CONCURRENT_CALLS = 32
+    # The exit code of commands that ran into their timeout, as reported by the `timeout` utility
+    TIMEOUT_EXIT_CODE = 124
+
+    _shared_executor: Optional[ThreadPoolExecutor] = None
+    _shared_executor_lock = threading.Lock()
+
+    def __init__(self, container: Container, executor: Optional[ThreadPoolExecutor] = None,
+                 kill_grace_period: float = 1):
+        """
+        Args:
+            container (Container): The container to run the commands in.
+            executor (Optional[ThreadPoolExecutor]): The executor of the blocking Docker calls, defaults to the one
+                shared by all clients.
+            kill_grace_period (float): The amount of seconds a command that ran into its timeout gets to terminate,
+                before it is killed.
+        """
+        self.container = container
+        self.executor = executor or self.get_shared_executor()
+        self.kill_grace_period = kill_grace_period
+
+    @classmethod
+    def get_shared_executor(cls) -> ThreadPoolExecutor:
+        """
+        Returns:
+            ThreadPoolExecutor: The executor shared by all clients, running at most MAX_CONCURRENT_CALLS calls at once.
+        """
+        with cls._shared_executor_lock:
+            if cls._shared_executor is None:
+                cls._shared_executor = ThreadPoolExecutor(max_workers=cls.MAX_CONCURRENT_CALLS,
+                                                          thread_name_prefix='async-exec')
+            return cls._shared_executor
+
+    @classmethod
+    async def run_blocking(cls, function: Callable[..., Any], *args) -> Any:
+        """
+        Runs a function issuing blocking Docker calls, e.g. of the ScenarioEnvironmentManager, in the shared executor.
+        """
+        return await asyncio.get_running_loop().run_in_executor(cls.get_shared_executor(),
+                                                                functools.partial(function, *args))
+
+    async def exec_run(self, command: Union[str, List[str]], workdir: Optional[str] = None, privileged: bool = False,
+                       timeout: Optional[float] = None) -> Tuple[int, bytes]:
+        """
+        Asynchronous variant of `Container.exec_run()`.
+
+        Args:
+            command (Union[str, List[str]]): The command to run, split like a shell would if it is a string.
+            workdir (Optional[str]): The working directory of the command.
+            privileged (bool): Whether to run the command with extended privileges.
+            timeout (Optional[float]): The amount of seconds after which the command is terminated, no limit if None.
+
+        Returns:
+            Tuple[int, bytes]: The exit code and the combined stdout and stderr of the command. The exit code is
+                TIMEOUT_EXIT_CODE if the command ran into its timeout.
+
+        Raises:
+            asyncio.TimeoutError: If the Docker call did not return although the command should have been
+                terminated, in which case the command is killed.
+        """
+        pid_file = self._get_pid_file()
+        return await self._run_call(functools.partial(self.container.exec_run, self._wrap(command, pid_file, timeout),
+                                                      workdir=workdir, privileged=privileged), pid_file, timeout)
+
+    async def exec_run_capped(self, command: Union[str, List[str]], output: HeadTailOutput, max_num_bytes: int,
+                              workdir: Optional[str] = None, privileged: bool = False,
+                              timeout: Optional[float] = None) -> Optional[int]:
+        """
+        Variant of exec_run(), which streams the output of the command into a HeadTailOutput instead of reading it
+        into memory as a whole. Once the command produced more than max_num_bytes bytes, its output is no longer read
+        and the command is killed.
+
+        Args:
+            command (Union[str, List[str]]): The command to run, split like a shell would if it is a string.
+            output (HeadTailOutput): Captures the combined stdout and stderr of the command.
+            max_num_bytes (int): The amount of output bytes after which the command is killed.
+            workdir (Optional[str]): The working directory of the command.
+            privileged (bool): Whether to run the command with extended privileges.
+            timeout (Optional[float]): The amount of seconds after which the command is terminated, no limit if None.
+
+        Returns:
+            Optional[int]: The exit code of the command, TIMEOUT_EXIT_CODE if it ran into its timeout, None if it was
+                killed for producing too much output.
+
+        Raises:
+            asyncio.TimeoutError: If the Docker call did not return although the command should have been
+                terminated, in which case the command is killed.
+        """
+        pid_file = self._get_pid_file()
+        api = self.container.client.api
+
+        def stream() -> Optional[int]:
+            exec_id = api.exec_create(self.container.id, self._wrap(command, pid_file, timeout), workdir=workdir,
+                                      privileged=privileged)['Id']
+            chunks = api.exec_start(exec_id, stream=True)
+            try:
+                for chunk in chunks:
+                    output.write(chunk)
+                    if output.total_num_bytes > max_num_bytes:
+                        self._kill(pid_file)
+                        return None
+            finally:
+                chunks.close()
+            return api.exec_inspect(exec_id)['ExitCode']
+
+        return await self._run_call(stream, pid_file, timeout)
+
+    async def _run_call(self, call: Callable[[], Any], pid_file: str, timeout: Optional[float]) -> Any:
+        future = asyncio.get_running_loop().run_in_executor(self.executor, call)
+
+        # The timeout is enforced within the container, the Docker call only needs to return shortly after
+        call_timeout = None if timeout is None else timeout + 2 * self.kill_grace_period + 5
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), call_timeout)
+        except (asyncio.CancelledError, asyncio.TimeoutError):
+            if not future.done():
+                await asyncio.shield(asyncio.to_thread(self._kill, pid_file))
+            raise
+
+    @staticmethod
+    def _get_pid_file() -> str:
+        return f'/tmp/async-exec-{uuid.uuid4().hex}.pid'
+
+    def _wrap(self, command: Union[str, List[str]], pid_file: str, timeout: Optional[float]) -> List[str]:
+        arguments = shlex.split(command) if isinstance(command, str) else command
+        # `timeout` runs the command in a process group of its own, whose ID equals the PID of `timeout`. A timeout of
+        # 0 disables the timeout.
+        script = (f'timeout -k {self.kill_grace_period} {timeout or 0} "$@" & pid=$!\n'
+                  f'echo "$pid" > {pid_file}\n'
+                  'wait "$pid"; status=$?\n'
+                  f'rm -f {pid_file}\n'
+                  'exit "$status"')
+        return ['/bin/sh', '-c', script, 'sh', *arguments]
+
+    def _kill(self, pid_file: str):
+        """
+        Kills the process group of a command, waiting briefly for the command to write its PID file.
+        """
+        script = (f'for _ in $(seq 10); do [ -f {pid_file} ] && break; sleep 0.1; done\n'
+                  f'pid=$(cat {pid_file}) || exit 1\n'
+                  'kill -KILL "-$pid" 2>/dev/null || kill -KILL "$pid"')
+        try:
+            err_code, output = self.container.exec_run(['/bin/sh', '-c', script], privileged=False)
+            if err_code != 0:
+                logging.warning(f'Could not kill the command of {pid_file}: {output.decode("utf-8")}')
+        except Exception as e:
+            logging.warning(f'Could not kill the command of {pid_file}: {e}')
@@ -0,0 +1,282 @@
+import io
+import logging
+import shlex
+import socket
+import struct
+import threading
+import time
+import uuid
+from typing import BinaryIO, Dict, List, Optional
+
+from docker.models.containers import Container
+
+from src.ideformer_client.environment.async_exec_client import AsyncExecClient
+
+
+class _SentinelReader:
+    """
+    Forwards the output of a command to output until the sentinel line carrying its exit code.
+    """
+
+    def __init__(self, token: str, output: BinaryIO):
+        # The sentinel is preceded by a newline, which separates it from output without a trailing newline
+        self.marker = f'\n{token} '.encode('utf-8')
+        self.output = output
+        self.num_bytes = 0
+        self.is_discarding = False
+        self._pending = bytearray()
+
+    def feed(self, data: bytes) -> Optional[int]:
+        """
+        Returns:
+            Optional[int]: The exit code of the command, None if its sentinel line did not arrive yet.
+        """
+        self._pending += data
+        marker_index = self._pending.find(self.marker)
+        if marker_index >= 0:
+            line_end = self._pending.find(b'\n', marker_index + len(self.marker))
+            if line_end >= 0:
+                self._forward(self._pending[:marker_index])
+                return int(self._pending[marker_index + len(self.marker):line_end])
+            return None
+
+        # Holds back the bytes that may be the beginning of the marker
+        num_forwarded_bytes = max(len(self._pending) - len(self.marker) + 1, 0)
+        self._forward(self._pending[:num_forwarded_bytes])
+        del self._pending[:num_forwarded_bytes]
+        return None
+
+    def _forward(self, data: bytes):
+        self.num_bytes += len(data)
+        if data and not self.is_discarding:
+            self.output.write(bytes(data))
+
+
+class BashSession:
+    """
+    Keeps one long-lived bash process in a container, which executes the commands of an agent one after another, such
+    that the working directory and environment persist across commands and each command costs no exec of its own.
+
+    The bash process is attached over the socket of a Docker exec. Each command is evaluated by the session, followed
+    by a sentinel line with a per-command token and the exit code of the command, which delimits its output. The
+    session runs with job control, thus each command runs in a process group of its own, which is interrupted once
+    the command runs into its timeout, instead of wrapping the command in `timeout`. If interrupting does not help,
+    e.g. since a shell builtin loops in the session itself, the session is restarted.
+
+    Each container has at most one session, opening a new one closes the previous session of the container.
+    """
+
+    # The signals sent to the process group of a timed out command, one after another, before restarting the session
+    INTERRUPT_SIGNALS = ('INT', 'KILL')
+    # The amount of seconds to wait for the session to start
+    START_TIMEOUT = 10
+
+    _sessions: Dict[str, 'BashSession'] = {}
+    _sessions_lock = threading.Lock()
+
+    def __init__(self, container: Container, workdir: str, interrupt_grace_period: float = 1):
+        """
+        Args:
+            container (Container): The container to run the session in.
+            workdir (str): The initial working directory of the session.
+            interrupt_grace_period (float): The amount of seconds an interrupted command gets to terminate, before it
+                is interrupted with the next signal of INTERRUPT_SIGNALS.
+        """
+        self.container = container
+        self.workdir = workdir
+        self.interrupt_grace_period = interrupt_grace_period
+        self._lock = threading.Lock()
+        self._exec_id: Optional[str] = None
+        self._socket = None
+        self._buffer = bytearray()
+        self._pid: Optional[int] = None
+
+    @classmethod
+    def open(cls, container: Container, workdir: str, **kwargs) -> 'BashSession':
+        """
+        Replaces the session of the container by a new one, which starts with its first command.
+
+        Returns:
+            BashSession: The new session of the container.
+        """
+        session = cls(container, workdir, **kwargs)
+        with cls._sessions_lock:
+            previous_session = cls._sessions.get(container.id)
+            cls._sessions[container.id] = session
+        if previous_session is not None:
+            previous_session.close()
+        return session
+
+    @classmethod
+    def close_for(cls, container: Container):
+        """
+        Closes and drops the session of the container, if it has one, e.g. once the container is removed.
+        """
+        with cls._sessions_lock:
+            session = cls._sessions.pop(container.id, None)
+        if session is not None:
+            session.close()
+
+    def run(self, command: str, output: BinaryIO, timeout: Optional[float] = None,
+            max_num_bytes: Optional[int] = None) -> Optional[int]:
+        """
+        Runs a command in the session, starting the session if needed.
+
+        Args:
+            command (str): The bash command to run. It cannot read from stdin.
+            output (BinaryIO): Receives the combined stdout and stderr of the command, e.g. a HeadTailOutput.
+            timeout (Optional[float]): The amount of seconds after which the command is interrupted, no limit if None.
+            max_num_bytes (Optional[int]): The amount of output bytes after which the command is killed and its
+                output no longer written to output, no limit if None.
+
+        Returns:
+            Optional[int]: The exit code of the command, AsyncExecClient.TIMEOUT_EXIT_CODE if it ran into its
+                timeout, None if it was killed for producing too much output.
+        """
+        with self._lock:
+            if self._socket is None:
+                self._start()
+
+            token = f'bash-session-{uuid.uuid4().hex}'
+            # The sentinel is sent as a line of its own, since bash skips the rest of the line of an interrupted
+            # command
+            self._send(f'{{ eval {shlex.quote(command)} < /dev/null; }} 2>&1\n'
+                       f'printf "\\n{token} %d\\n" "$?"\n')
+            return self._read_result(_SentinelReader(token, output), timeout, max_num_bytes)
+
+    def close(self):
+        """
+        Ends the session. A following command starts a new session.
+        """
+        with self._lock:
+            self._close()
+
+    def _start(self):
+        api = self.container.client.api
+        self._exec_id = api.exec_create(self.container.id, ['/bin/bash', '--noprofile', '--norc'], stdin=True,
+                                        workdir=self.workdir)['Id']
+        self._socket = api.exec_start(self._exec_id, socket=True)
+        self._buffer = bytearray()
+
+        # Job control gives each command a process group of its own, the trap keeps the session alive if a command
+        # is interrupted
+        token = f'bash-session-{uuid.uuid4().hex}'
+        self._send(f'set -m; trap : INT; printf "%d\\n{token} 0\\n" "$$"\n')
+        pid_output = io.BytesIO()
+        reader = _SentinelReader(token, pid_output)
+        deadline = time.monotonic() + self.START_TIMEOUT
+        exit_code = None
+        while exit_code is None:
+            data = self._receive(deadline - time.monotonic())
+            if not data:
+                self._close()
+                raise RuntimeError(f'Could not start a bash session in container {self.container.id}.')
+            exit_code = reader.feed(data)
+        self._pid = int(pid_output.getvalue())
+
+    def _read_result(self, reader: _SentinelReader, timeout: Optional[float],
+                     max_num_bytes: Optional[int]) -> Optional[int]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        signals: List[str] = list(self.INTERRUPT_SIGNALS)
+        exit_code_override = None
+        while True:
+            data = self._receive(None if deadline is None else deadline - time.monotonic())
+            if data is None:
+                # The deadline passed, either the one of the command or the grace period of an interrupt
+                if exit_code_override is None and not reader.is_discarding:
+                    exit_code_override = AsyncExecClient.TIMEOUT_EXIT_CODE
+                if not signals:
+                    logging.warning(f'Restarting the bash session in container {self.container.id}, since its command '
+                                    f'could not be interrupted.')
+                    reader.output.write(b'\nThe command could not be interrupted, thus the shell session was '
+                                        b'restarted, which reset its working directory and environment.')
+                    self._kill_session()
+                    return None if reader.is_discarding else exit_code_override
+                self._interrupt(signals.pop(0))
+                deadline = time.monotonic() + self.interrupt_grace_period
+                continue
+
+            if data == b'':
+                # The command ended the session, e.g. via `exit`
+                exit_code = self.container.client.api.exec_inspect(self._exec_id)['ExitCode']
+                self._close()
+                return None if reader.is_discarding else exit_code_override or exit_code
+
+            exit_code = reader.feed(data)
+            if exit_code is not None:
+                return None if reader.is_discarding else exit_code_override or exit_code
+
+            if max_num_bytes is not None and not reader.is_discarding and reader.num_bytes > max_num_bytes:
+                reader.is_discarding = True
+                self._interrupt('KILL')
+                signals = []
+                deadline = time.monotonic() + self.interrupt_grace_period
+
+    def _send(self, text: str):
+        getattr(self._socket, '_sock', self._socket).sendall(text.encode('utf-8'))
+
+    def _receive(self, timeout: Optional[float]) -> Optional[bytes]:
+        """
+        Returns:
+            Optional[bytes]: The payload of the next complete frames of the attached stdout and stderr streams, b'' if
+                the session ended, None if timeout passed before.
+        """
+        raw_socket = getattr(self._socket, '_sock', self._socket)
+        while True:
+            payload = self._pop_frames()
+            if payload:
+                return payload
+
+            # A timeout of 0 would switch the socket to non-blocking mode
+            raw_socket.settimeout(None if timeout is None else max(timeout, 0.01))
+            try:
+                data = raw_socket.recv(65536)
+            except socket.timeout:
+                return None
+            if not data:
+                return b''
+            self._buffer += data
+
+    def _pop_frames(self) -> bytes:
+        # Without a TTY, Docker multiplexes stdout and stderr into frames with a header of the stream type, three
+        # bytes of padding and the big-endian size of the payload
+        payload = bytearray()
+        while len(self._buffer) >= 8:
+            _, size = struct.unpack('>BxxxL', self._buffer[:8])
+            if len(self._buffer) < 8 + size:
+                break
+            payload += self._buffer[8:8 + size]
+            del self._buffer[:8 + size]
+        return bytes(payload)
+
+    def _interrupt(self, signal: str):
+        """
+        Sends the signal to the process groups of the commands running in the session, i.e. to the process groups
+        of its children that differ from the one of the session.
+        """
+        script = (f'session_stat=$(cat /proc/{self._pid}/stat) || exit 1\n'
+                  'set -- ${session_stat##*) }; session_pgid=$3\n'
+                  'for stat in /proc/[0-9]*/stat; do\n'
+                  '  process_stat=$(cat "$stat" 2>/dev/null) || continue\n'
+                  '  set -- ${process_stat##*) }\n'
+                  f'  if [ "$2" = {self._pid} ] && [ "$3" != "$session_pgid" ]; then kill -{signal} "-$3"; fi\n'
+                  'done')
+        err_code, output = self.container.exec_run(['/bin/sh', '-c', script], privileged=False)
+        if err_code != 0:
+            logging.warning(f'Could not interrupt the command of the bash session: {output.decode("utf-8")}')
+
+    def _kill_session(self):
+        if self._pid is not None:
+            self.container.exec_run(['/bin/sh', '-c', f'kill -KILL {self._pid}'], privileged=False)
+        self._close()
+
+    def _close(self):
+        if self._socket is not None:
+            try:
+                self._socket.close()
+            except OSError:
+                pass
+        self._socket = None
+        self._exec_id = None
+        self._pid = None
+
@@ -0,0 +1,100 @@
+import shlex
+import uuid
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from docker.models.containers import Container
+
+
+@dataclass
+class CommandResult:
+    """
+    The outcome of a single command of a CommandBatch.
+    """
+    command: str
+    # None if the command did not run, since an earlier command of the batch failed
+    exit_code: Optional[int]
+    output: str
+
+    @property
+    def succeeded(self) -> bool:
+        return self.exit_code == 0
+
+
+class CommandBatch:
+    """
+    Runs several shell commands in a container with a single exec, instead of paying a Docker API round-trip and a
+    process spawn per command, and yields the exit code and output of each command separately.
+
+    The commands are joined into one bash script, in which each command runs in a subshell in its own working directory.
+    The combined stdout and stderr of each command is followed by a line consisting of a token that is unique to the
+    batch and the exit code of the command, which frames the outputs within the output of the exec.
+    """
+
+    def __init__(self, container: Container, workdir: Optional[str] = None, stop_on_failure: bool = False):
+        """
+        Args:
+            container (Container): The container to run the commands in.
+            workdir (Optional[str]): The working directory of the commands that do not specify their own.
+            stop_on_failure (bool): Whether to skip the remaining commands once a command fails, like joining them
+                with `&&`.
+        """
+        self.container = container
+        self.workdir = workdir
+        self.stop_on_failure = stop_on_failure
+        self._commands: List[Tuple[str, Optional[str]]] = []
+
+    def __len__(self) -> int:
+        return len(self._commands)
+
+    def add(self, command: str, workdir: Optional[str] = None) -> int:
+        """
+        Args:
+            command (str): The bash command to run.
+            workdir (Optional[str]): The working directory of the command, defaults to the one of the batch.
+
+        Returns:
+            int: The index of the result of the command within the results of run().
+        """
+        self._commands.append((command, workdir or self.workdir))
+        return len(self._commands) - 1
+
+    def run(self) -> List[CommandResult]:
+        """
+        Runs all added commands in one exec.
+
+        Returns:
+            List[CommandResult]: The result of each command, in the order the commands were added.
+        """
+        token = f'command-batch-{uuid.uuid4().hex}'
+        err_code, output = self.container.exec_run(['/bin/bash', '-c', self._get_script(token)], privileged=False)
+        return self._parse_output(token, output.decode('utf-8', errors='replace'))
+
+    def _get_script(self, token: str) -> str:
+        lines = []
+        for command, workdir in self._commands:
+            if workdir is not None:
+                command = f'cd {shlex.quote(workdir)} && {command}'
+            # The newline in front of the frame separates it from output without a trailing newline
+            lines.append(f'( {command}\n) 2>&1; status=$?; printf "\\n{token} %d\\n" "$status"')
+            if self.stop_on_failure:
+                lines.append('[ "$status" -eq 0 ] || exit "$status"')
+        return '\n'.join(lines)
+
+    def _parse_output(self, token: str, output: str) -> List[CommandResult]:
+        # The output of the first command is followed by the first frame, each following piece starts with the exit
+        # code of the previous command, followed by the output of the next command
+        pieces = output.split(f'\n{token} ')
+        results = []
+        for index, (command, _) in enumerate(self._commands):
+            if index >= len(pieces):
+                results.append(CommandResult(command, None, ''))
+                continue
+
+            command_output = pieces[index] if index == 0 else pieces[index].split('\n', 1)[-1]
+            exit_code = None
+            if index + 1 < len(pieces):
+                exit_code_line = pieces[index + 1].split('\n', 1)[0]
+                exit_code = int(exit_code_line) if exit_code_line.isdigit() else None
+            results.append(CommandResult(command, exit_code, command_output))
+        return results
@@ -0,0 +1,159 @@
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+
+import docker
+from docker.models.containers import Container
+
+
+class ContainerEventMonitor:
+    """
+    Subscribes once to the container events of a Docker daemon and notifies the waiters of the containers they are
+    waiting for, instead of each waiter polling the state of its container.
+
+    Starting many containers at once thus costs one event subscription, which is shared by all containers of the
+    daemon, rather than an inspect call per container and poll interval.
+    """
+
+    # The container events that end the wait for a start, mapped to the resulting container status
+    STATUS_BY_EVENT = {'start': 'running', 'die': 'exited'}
+
+    _shared_monitors: Dict[str, 'ContainerEventMonitor'] = {}
+    _shared_monitors_lock = threading.Lock()
+
+    def __init__(self, client: docker.DockerClient):
+        """
+        Args:
+            client (docker.DockerClient): The client of the daemon to subscribe to.
+        """
+        self.client = client
+        self._lock = threading.Lock()
+        self._callbacks: Dict[str, List[Callable[[Optional[str]], None]]] = defaultdict(list)
+        self._stream = None
+
+    @classmethod
+    def get_shared(cls, client: docker.DockerClient) -> 'ContainerEventMonitor':
+        """
+        Returns:
+            ContainerEventMonitor: The monitor shared by all containers of the daemon that client connects to.
+        """
+        with cls._shared_monitors_lock:
+            base_url = client.api.base_url
+            if base_url not in cls._shared_monitors:
+                cls._shared_monitors[base_url] = cls(client)
+            return cls._shared_monitors[base_url]
+
+    def start_and_wait(self, container: Container, timeout: float) -> Optional[str]:
+        """
+        Starts the container and waits until it is running or has exited.
+
+        Args:
+            container (Container): The created container to start.
+            timeout (float): The amount of seconds to wait for the container.
+
+        Returns:
+            Optional[str]: The status of the container after the start according to the events, i.e. 'running' or
+                'exited'. None if the timeout was reached or the event subscription ended before.
+        """
+        statuses = []
+        is_done = threading.Event()
+
+        def notify(status: Optional[str]):
+            statuses.append(status)
+            is_done.set()
+
+        # Subscribes before starting, such that the start event cannot be missed
+        unsubscribe = self.subscribe(container.id, notify)
+        try:
+            container.start()
+            if not is_done.wait(timeout):
+                return None
+            return statuses[0]
+        finally:
+            unsubscribe()
+
+    async def astart_and_wait(self, container: Container, timeout: float) -> Optional[str]:
+        """
+        Asynchronous variant of start_and_wait(), which waits without occupying a thread.
+        """
+        loop = asyncio.get_running_loop()
+        status_future = loop.create_future()
+
+        def notify(status: Optional[str]):
+            loop.call_soon_threadsafe(lambda: status_future.done() or status_future.set_result(status))
+
+        unsubscribe = self.subscribe(container.id, notify)
+        try:
+            await asyncio.to_thread(container.start)
+            return await asyncio.wait_for(status_future, timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            unsubscribe()
+
+    def subscribe(self, container_id: str, callback: Callable[[Optional[str]], None]) -> Callable[[], None]:
+        """
+        Registers a callback for the start and exit of a container, connecting to the event stream if needed.
+
+        Args:
+            container_id (str): The ID of the container.
+            callback (Callable[[Optional[str]], None]): Called from the thread reading the events with the new status
+                of the container, see STATUS_BY_EVENT. Called with None if the event stream ends.
+
+        Returns:
+            Callable[[], None]: Removes the callback again.
+        """
+        with self._lock:
+            if self._stream is None:
+                # The subscription is active once events() returns, thus the events of containers started after
+                # subscribing are never missed
+                self._stream = self.client.events(decode=True, filters={'type': 'container',
+                                                                        'event': list(self.STATUS_BY_EVENT)})
+                threading.Thread(target=self._dispatch, args=(self._stream,), daemon=True,
+                                 name='container-event-monitor').start()
+            self._callbacks[container_id].append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                callbacks = self._callbacks.get(container_id, [])
+                if callback in callbacks:
+                    callbacks.remove(callback)
+                if not callbacks:
+                    self._callbacks.pop(container_id, None)
+
+        return unsubscribe
+
+    def close(self):
+        """
+        Ends the event subscription. The callbacks that are still registered are called with None.
+        """
+        with self._lock:
+            stream = self._stream
+        if stream is not None:
+            stream.close()
+
+    def _dispatch(self, stream):
+        try:
+            for event in stream:
+                status = self.STATUS_BY_EVENT.get(event.get('status') or event.get('Action'))
+                container_id = event.get('id') or event.get('Actor', {}).get('ID')
+                if status is None or container_id is None:
+                    continue
+
+                with self._lock:
+                    callbacks = list(self._callbacks.get(container_id, []))
+                for callback in callbacks:
+                    callback(status)
+        except Exception as e:
+            logging.warning(f'The Docker event stream ended: {e}')
+        finally:
+            with self._lock:
+                if self._stream is stream:
+                    self._stream = None
+                callbacks = [callback for container_callbacks in self._callbacks.values()
+                             for callback in container_callbacks]
+            # The waiters fall back to inspecting their containers, the next subscription reconnects
+            for callback in callbacks:
+                callback(None)
@@ -0,0 +1,229 @@
+import asyncio
+import logging
+import statistics
+import time
+from typing import Callable, Dict, List, Optional, Set
+
+from src.ideformer_client.environment.bash_session import BashSession
+from src.ideformer_client.environment.docker_manager import DockerManager
+from src.ideformer_client.environment.git_command_cache import GitCommandCache
+
+
+class ContainerPool:
+    """
+    Keeps a number of containers created and started in the background, such that acquiring a container usually does
+    not pay the latency of creating and starting it.
+
+    Released containers are health checked and reset to the state they were started in. Healthy containers are
+    recycled, broken ones are removed and replaced in the background. Containers are replaced after max_uses
+    acquisitions as well, such that state leaking past the reset does not accumulate.
+    """
+
+    def __init__(self, docker_manager_factory: Callable[[], DockerManager], size: int, max_uses: Optional[int] = None):
+        """
+        Args:
+            docker_manager_factory (Callable[[], DockerManager]): Creates the manager of a new container. All
+                containers must use the same image.
+            size (int): The amount of started containers to keep ready for acquisition.
+            max_uses (Optional[int]): The amount of acquisitions after which a container is replaced instead of reset.
+                Containers are never replaced if None.
+        """
+        if size < 1:
+            raise ValueError(f'The pool needs to keep at least one container ready, got size={size}.')
+
+        self.docker_manager_factory = docker_manager_factory
+        self.size = size
+        self.max_uses = max_uses
+
+        # The acquisitions that found a ready container (hits) and those that had to wait for one (misses)
+        self.hits = 0
+        self.misses = 0
+        self.acquisition_latencies: List[float] = []
+
+        self._ready: Optional[asyncio.Queue] = None
+        self._amount_of_pending_starts = 0
+        self._amount_of_waiting_acquisitions = 0
+        self._tasks: Set[asyncio.Task] = set()
+        self._uses: Dict[int, int] = {}
+        # The entries of the working directory of each container right after it was started, kept by the reset
+        self._initial_entries: Dict[int, Set[str]] = {}
+        self._acquired: Dict[int, DockerManager] = {}
+
+    async def start(self):
+        """
+        Pulls the image if needed and starts filling the pool in the background.
+        """
+        self._ready = asyncio.Queue()
+        docker_manager = self.docker_manager_factory()
+        await asyncio.to_thread(docker_manager.setup_image)
+        self._replenish(first_docker_manager=docker_manager)
+
+    async def acquire(self) -> DockerManager:
+        """
+        Returns:
+            DockerManager: The manager of a started container, which is exclusively used by the caller until it is
+                released.
+
+        Raises:
+            RuntimeError: If the container to wait for could not be started.
+        """
+        start = time.perf_counter()
+        is_hit = not self._ready.empty()
+        if is_hit:
+            docker_manager = self._ready.get_nowait()
+        else:
+            self._amount_of_waiting_acquisitions += 1
+            if self._amount_of_waiting_acquisitions > self._amount_of_pending_starts:
+                # More containers are acquired than are starting, thus the pool grows on demand
+                self._start_in_background()
+            try:
+                docker_manager = await self._ready.get()
+            finally:
+                self._amount_of_waiting_acquisitions -= 1
+        if isinstance(docker_manager, Exception):
+            self._replenish()
+            raise RuntimeError('Could not start a container for the pool.') from docker_manager
+
+        self.acquisition_latencies.append(time.perf_counter() - start)
+        if is_hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+        self._acquired[id(docker_manager)] = docker_manager
+        self._uses[id(docker_manager)] = self._uses.get(id(docker_manager), 0) + 1
+        self._replenish()
+        return docker_manager
+
+    async def release(self, docker_manager: DockerManager, healthy: bool = True):
+        """
+        Returns an acquired container to the pool. It is recycled if it passes the health check and can be reset,
+        otherwise it is removed and replaced.
+
+        Args:
+            docker_manager (DockerManager): The manager of the container, as returned by acquire().
+            healthy (bool): False if the caller already knows the container to be broken, which skips the health check.
+        """
+        self._acquired.pop(id(docker_manager), None)
+        is_worn_out = self.max_uses is not None and self._uses.get(id(docker_manager), 0) >= self.max_uses
+        # Containers that are still starting are not counted, as a recycled container is ready right away
+        is_full = self._ready.qsize() >= self.size
+
+        if healthy and not is_worn_out and not is_full and await asyncio.to_thread(self._reset, docker_manager):
+            self._ready.put_nowait(docker_manager)
+            return
+
+        await asyncio.to_thread(self._remove, docker_manager)
+        self._replenish()
+
+    async def close(self):
+        """
+        Stops all background starts and removes all containers, including the acquired ones.
+        """
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+        docker_managers = list(self._acquired.values())
+        while not self._ready.empty():
+            docker_manager = self._ready.get_nowait()
+            if not isinstance(docker_manager, Exception):
+                docker_managers.append(docker_manager)
+        await asyncio.gather(*(asyncio.to_thread(self._remove, docker_manager) for docker_manager in docker_managers))
+        self._acquired.clear()
+
+    def get_metrics(self) -> Dict[str, float]:
+        """
+        Returns:
+            Dict[str, float]: The hits, misses and hit rate of the acquisitions, and the mean, median and maximum
+                acquisition latency in seconds.
+        """
+        latencies = self.acquisition_latencies or [0.0]
+        amount_of_acquisitions = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses,
+                'hit_rate': self.hits / amount_of_acquisitions if amount_of_acquisitions > 0 else 0.0,
+                'mean_acquisition_latency': statistics.mean(latencies),
+                'median_acquisition_latency': statistics.median(latencies),
+                'max_acquisition_latency': max(latencies)}
+
+    def _replenish(self, first_docker_manager: Optional[DockerManager] = None):
+        """
+        Starts containers in the background until the pool holds size ready or starting containers.
+        """
+        while self._ready.qsize() + self._amount_of_pending_starts < self.size:
+            self._start_in_background(first_docker_manager)
+            first_docker_manager = None
+
+    def _start_in_background(self, docker_manager: Optional[DockerManager] = None):
+        self._amount_of_pending_starts += 1
+        task = asyncio.create_task(self._start_container(docker_manager or self.docker_manager_factory()))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _start_container(self, docker_manager: DockerManager):
+        try:
+            await asyncio.to_thread(docker_manager.create_container)
+            # Waits for the start event without occupying a thread, thus many containers can start at once
+            await docker_manager.astart_container()
+            await asyncio.to_thread(self._record_initial_entries, docker_manager)
+        except Exception as e:
+            logging.error(f'Could not start a container for the pool: {e}')
+            await asyncio.to_thread(self._remove, docker_manager)
+            # Handed to the next acquisition, which raises it instead of waiting for a container that never starts
+            self._amount_of_pending_starts -= 1
+            self._ready.put_nowait(e)
+            return
+
+        self._amount_of_pending_starts -= 1
+        self._ready.put_nowait(docker_manager)
+
+    def _record_initial_entries(self, docker_manager: DockerManager):
+        err_code, output = docker_manager.container.exec_run('/bin/bash -c "ls -A1"')
+        if err_code != 0:
+            raise RuntimeError(f'Could not list the working directory of the container: {output.decode("utf-8")}')
+        self._initial_entries[id(docker_manager)] = set(output.decode('utf-8').splitlines())
+        self._uses[id(docker_manager)] = 0
+
+    def _reset(self, docker_manager: DockerManager) -> bool:
+        """
+        Checks that the container is still running and removes everything added to its working directory since it
+        was started, e.g. cloned repositories.
+
+        Returns:
+            bool: Whether the container is healthy and was reset.
+        """
+        container = docker_manager.container
+        try:
+            container.reload()
+            if container.status != 'running':
+                logging.warning(f'Container {container.id} is {container.status}, replacing it.')
+                return False
+
+            err_code, output = container.exec_run('/bin/bash -c "ls -A1"')
+            if err_code != 0:
+                logging.warning(f'Container {container.id} failed the health check, replacing it.')
+                return False
+
+            added_entries = set(output.decode('utf-8').splitlines()) - self._initial_entries[id(docker_manager)]
+            if added_entries:
+                err_code, output = container.exec_run(['rm', '-r', '--', *sorted(added_entries)])
+                if err_code != 0:
+                    logging.warning(f'Could not reset container {container.id}, replacing it: '
+                                    f'{output.decode("utf-8")}')
+                    return False
+            return True
+        except Exception as e:
+            logging.warning(f'Could not reset container {container.id}, replacing it: {e}')
+            return False
+
+    def _remove(self, docker_manager: DockerManager):
+        self._initial_entries.pop(id(docker_manager), None)
+        self._uses.pop(id(docker_manager), None)
+        if docker_manager.container is not None:
+            # The session and command cache of the container would otherwise be kept for as long as the process runs
+            BashSession.close_for(docker_manager.container)
+            GitCommandCache.remove(docker_manager.container)
+        try:
+            docker_manager.stop_and_remove_container()
+        except Exception as e:
+            logging.error(f'Could not remove container: {e}')
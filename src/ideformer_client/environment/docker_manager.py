@@ -1,5 +1,5 @@
-import time
-from typing import Dict
+import asyncio
+from typing import Dict, Optional
 from weakref import finalize
 
 import docker
@@ -9,19 +9,36 @@ import logging
 
 from docker.models.containers import Container
 
+from src.ideformer_client.environment.container_event_monitor import ContainerEventMonitor
+
 
 class DockerManager:
     """
     Helper class for orchestrating the Docker containers to execute the agent's actions in.
     """
 
-    def __init__(self, image: str, env_vars: Dict[str, str], container_start_timeout: int):
+    def __init__(self, image: str, env_vars: Dict[str, str], container_start_timeout: int,
+                 volumes: Optional[Dict[str, Dict[str, str]]] = None, client: Optional[docker.DockerClient] = None,
+                 event_monitor: Optional[ContainerEventMonitor] = None):
+        """
+        Args:
+            image (str): The image to create the container from, e.g. 'python:3.10'.
+            env_vars (Dict[str, str]): The environment variables of the container.
+            container_start_timeout (int): The amount of seconds to wait for the container to run.
+            volumes (Optional[Dict[str, Dict[str, str]]]): The host paths to mount into the container.
+            client (Optional[docker.DockerClient]): The client to use, configured from the environment if None.
+            event_monitor (Optional[ContainerEventMonitor]): The monitor to wait for the start of the container with.
+                If None, the monitor shared by all managers of the same daemon is used.
+        """
         self.image = image
         self.env_vars = env_vars
         self.container_start_timeout = container_start_timeout
+        # Host paths mapped to their bind configuration, e.g. {'/cache': {'bind': '/repository-cache', 'mode': 'ro'}}
+        self.volumes = volumes
         self.container = None
 
-        self.client = docker.from_env()
+        self.client = client or docker.from_env()
+        self.event_monitor = event_monitor or ContainerEventMonitor.get_shared(self.client)
 
         finalize(self, self.stop_and_remove_container)
 
@@ -30,11 +47,15 @@ class DockerManager:
         Stops and removes a running container.
 
         If the container is in "running" state, it will be stopped and then removed.
-        Otherwise, it simply removes the container.
+        Otherwise, it simply removes the container. Does nothing if there is no container (anymore), thus the container
+        can be removed before this manager is finalized.
         """
+        if self.container is None:
+            return
         if self.container.status == "running":
             self.container.stop()
         self.container.remove()
+        self.container = None
 
     def setup_image(self):
         """
@@ -81,7 +102,8 @@ class DockerManager:
         """
         try:
             self.container = self.client.containers.create(
-                image=self.image, environment=self.env_vars, detach=True, entrypoint="tail -f /dev/null"
+                image=self.image, environment=self.env_vars, detach=True, entrypoint="tail -f /dev/null",
+                volumes=self.volumes
             )
             return self.container
         except APIError as e:
@@ -92,31 +114,52 @@ class DockerManager:
         """
         Starts the Docker container and waits until it is running or the start timeout is reached.
 
-        If the container status is "created", it will start the container. It then enters a loop
-        that repeatedly checks the container's status until it is either running, has exited, or
-        the timeout period is exceeded.
+        If the container status is "created", it will start the container. Instead of polling the status of the
+        container, it waits for the start event of the container via the event monitor, which all managers of the
+        daemon share, and then inspects the container once.
+
+        Raises:
+            RuntimeError: If the container is not yet created, fails to start or exits immediately after starting.
+        """
+        self._check_is_created()
+        # Now the command specified in entrypoint in create_container() is executed
+        self.event_monitor.start_and_wait(self.container, timeout=self.container_start_timeout)
+        return self._check_is_running()
+
+    async def astart_container(self):
+        """
+        Asynchronous variant of start_container(), which waits for the start event without occupying a thread.
 
         Raises:
             RuntimeError: If the container is not yet created, fails to start or exits immediately after starting.
         """
-        if self.container.status == "created":
-            # Now the command specified in entrypoint in create_container() is executed
-            self.container.start()
-        else:
+        self._check_is_created()
+        await self.event_monitor.astart_and_wait(self.container, timeout=self.container_start_timeout)
+        return await asyncio.to_thread(self._check_is_running)
+
+    def _check_is_created(self):
+        if self.container is None or self.container.status != "created":
             logging.error('Attempted to start Docker container before creating it.')
             raise RuntimeError("Attempted to start Docker container before creating it.")
 
-        start_time = time.time()
-        while time.time() - start_time < self.container_start_timeout:
-            self.container.reload()
-            if self.container.status == "running":
-                logging.info(f"Container started successfully")
-                return self.container
-            elif self.container.status == "exited":
-                logging.error(f"Container exited on start.")
-                logging.error(f"Container logs: {self.container.logs()}")
-                raise RuntimeError("Could not start self.container.")
-            time.sleep(0.1)
+    def _check_is_running(self) -> Container:
+        """
+        Inspects the container after the start event, the timeout or the end of the event stream.
+
+        Returns:
+            (Container) The running container.
+
+        Raises:
+            RuntimeError: If the container is not running.
+        """
+        self.container.reload()
+        if self.container.status == "running":
+            logging.info(f"Container started successfully")
+            return self.container
+        elif self.container.status == "exited":
+            logging.error(f"Container exited on start.")
+            logging.error(f"Container logs: {self.container.logs()}")
+            raise RuntimeError("Could not start self.container.")
 
         logging.error(f"Container failed to start within the timeout period")
         raise RuntimeError("Could not start container.")
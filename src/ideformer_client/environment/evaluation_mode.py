@@ -0,0 +1,12 @@
+from enum import Enum
+
+
+class EvaluationMode(Enum):
+    """
+    How the Evaluator compares the state the agent left the repository in to the ground truth.
+    """
+    # Diff the ground truth and the agent branch and check that the textual diff is empty
+    DIFF = 'diff'
+    # Compare the object IDs of the trees, or of the tree entries of the scenario file, which takes constant time
+    # regardless of the size of the difference
+    TREE_OID = 'tree_oid'
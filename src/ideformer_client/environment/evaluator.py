@@ -1,7 +1,11 @@
-from typing import Optional
+import shlex
+import subprocess
+from typing import List, Optional
 
 from docker.models.containers import Container
 
+from src.ideformer_client.environment.command_batch import CommandBatch, CommandResult
+from src.ideformer_client.environment.evaluation_mode import EvaluationMode
 from src.ideformer_client.environment.scenario_type import ScenarioType
 from src.ideformer_client.utils.exceptions import ScenarioEnvironmentException
 
@@ -13,12 +17,28 @@ class Evaluator:
                  agent_target_branch_name: str,
                  repository_work_dir: str,
                  scenario_type: Optional[ScenarioType] = None,
-                 scenario: Optional[dict] = None):
+                 scenario: Optional[dict] = None,
+                 evaluation_mode: EvaluationMode = EvaluationMode.DIFF,
+                 host_repository_path: Optional[str] = None):
+        """
+        Args:
+            container (Container): The container the agent worked in.
+            agent_target_branch_name (str): The branch the agent was asked to solve the scenario on.
+            repository_work_dir (str): The working directory of the repository within the container.
+            scenario_type (Optional[ScenarioType]): The type of the scenario to evaluate.
+            scenario (Optional[dict]): The scenario to evaluate.
+            evaluation_mode (EvaluationMode): How to compare the agent branch to the ground truth.
+            host_repository_path (Optional[str]): With EvaluationMode.TREE_OID, the path on the host at which the
+                repository working directory is shared from the container, e.g. via a volume. If given, the git objects
+                are read on the host instead of exec'ing in the container.
+        """
         self.container = container
         self.agent_target_branch_name = agent_target_branch_name
         self.repository_work_dir = repository_work_dir
         self.scenario_type = scenario_type
         self.scenario = scenario
+        self.evaluation_mode = evaluation_mode
+        self.host_repository_path = host_repository_path
         self.command_template = '/bin/bash -c "{command_to_execute}"'
 
     def set_scenario(self, scenario: dict):
@@ -44,6 +64,9 @@ class Evaluator:
         if self.scenario_type is None:
             raise ScenarioEnvironmentException('Cannot evaluate scenario, since scenario_type is None.')
 
+        if self.evaluation_mode is EvaluationMode.TREE_OID:
+            return self._evaluate_by_tree_oids()
+
         if self.scenario_type is ScenarioType.FILE_COMMIT_GRAM_CHUNK:
             return self._evaluate_iteratively_chunk_staged_diff_into_commits()
         elif self.scenario_type is ScenarioType.FILE_COMMIT_GRAM_REBASE:
@@ -140,6 +163,71 @@ class Evaluator:
 
         return diff == ''
 
+    def _evaluate_by_tree_oids(self) -> bool:
+        """
+        Evaluates the scenario like evaluate(), comparing object IDs instead of diffing:
+            - For file commit gram scenarios, the tree entries of the scenario file (ie. its mode and blob ID, or its
+                absence) at scenario['first_commit'] and at the agent's branch HEAD need to be equal.
+            - For merge and cherry-pick scenarios, the trees of the ground truth commit and the agent's branch HEAD need
+                to be equal.
+
+        Raises:
+            NotImplementedError: If the scenario type is not supported.
+            ScenarioEnvironmentException: If there is an error executing the git commands.
+
+        Returns:
+            bool: True if the scenario was successfully and correctly solved, False otherwise.
+        """
+        if self.scenario_type in (ScenarioType.FILE_COMMIT_GRAM_CHUNK, ScenarioType.FILE_COMMIT_GRAM_REBASE):
+            file = shlex.quote(self.scenario['file'])
+            first_entry, agent_entry, amount_of_commits = self._run_git_commands([
+                f"git ls-tree {self.scenario['first_commit']} -- {file}",
+                f"git ls-tree {self.agent_target_branch_name} -- {file}",
+                f"git rev-list --count {self.scenario['last_commit']}..{self.agent_target_branch_name}"])
+            if first_entry != agent_entry or not self._can_be_cast_to_int(amount_of_commits):
+                return False
+            if self.scenario_type is ScenarioType.FILE_COMMIT_GRAM_CHUNK:
+                return int(amount_of_commits) > 1
+            return 0 < int(amount_of_commits) <= self.scenario['times_seen_consecutively']
+
+        if self.scenario_type is ScenarioType.MERGE:
+            ground_truth_commit = self.scenario['merge_commit_hash']
+        elif self.scenario_type is ScenarioType.CHERRY_PICK:
+            ground_truth_commit = self.scenario['cherry_pick_commit']
+        else:
+            raise NotImplementedError(f'Cannot compare tree OIDs for ScenarioType.{self.scenario_type.name}.')
+        ground_truth_tree, agent_tree = self._run_git_commands([
+            f"git rev-parse {ground_truth_commit}^{{tree}}", f"git rev-parse {self.agent_target_branch_name}^{{tree}}"])
+        return ground_truth_tree == agent_tree
+
+    def _run_git_commands(self, commands: List[str]) -> List[str]:
+        """
+        Runs the commands in the repository, on the host if self.host_repository_path is set, otherwise in a single
+        exec in the container.
+
+        Raises:
+            ScenarioEnvironmentException: If any of the commands fails.
+
+        Returns:
+            List[str]: The stripped output of each command.
+        """
+        if self.host_repository_path is not None:
+            results = []
+            for command in commands:
+                process = subprocess.run(shlex.split(command), cwd=self.host_repository_path, stdout=subprocess.PIPE,
+                                         stderr=subprocess.STDOUT)
+                results.append(CommandResult(command, process.returncode, process.stdout.decode('utf-8')))
+        else:
+            batch = CommandBatch(self.container, self.repository_work_dir)
+            for command in commands:
+                batch.add(command)
+            results = batch.run()
+
+        for result in results:
+            if not result.succeeded:
+                raise ScenarioEnvironmentException(f"Cannot evaluate scenario: {result.output}")
+        return [result.output.strip() for result in results]
+
     def _get_git_diff_evaluation_command(self, ground_truth_commit: str):
         """
         Returns the differences between the scenario's ground truth merge commit and the agent's target branch HEAD.
@@ -0,0 +1,157 @@
+import shlex
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from docker.models.containers import Container
+
+
+@dataclass
+class CachedCommandResult:
+    output: str
+    # The amount of seconds executing the command took, which a cache hit saves
+    duration: float
+
+
+class GitCommandCache:
+    """
+    Caches the outputs of read-only git commands run in the repository of a container, such that an agent repeating
+    e.g. `git status` is served without executing the command again.
+
+    Only single git commands of an allow-list are cached, without any shell syntax around them. Any other command may
+    change the repository, its working tree or the working directory of a shell session, thus running it invalidates
+    all cached outputs. The cached outputs therefore always stem from the state of the repository since the last
+    mutating command, which is the fingerprint of the entries.
+
+    Each container has one cache, which the scenario environment resets for each scenario.
+    """
+
+    READ_ONLY_SUBCOMMANDS = {'status', 'log', 'diff', 'show', 'rev-parse', 'rev-list', 'ls-files', 'blame', 'branch',
+                             'shortlog', 'cat-file'}
+    # `git branch` only lists branches with these options, with others or with arguments it may change branches
+    READ_ONLY_BRANCH_OPTIONS = {'-a', '--all', '-r', '--remotes', '-v', '-vv', '--verbose', '--list',
+                                '--show-current', '--no-color'}
+    # Options of the allow-listed commands that write files or run external programs
+    MUTATING_OPTIONS = ('--output', '--ext-diff', '--textconv')
+    SHELL_SYNTAX_CHARACTERS = set(';&|<>`$(){}\n\\')
+
+    _caches: Dict[str, 'GitCommandCache'] = {}
+    _caches_lock = threading.Lock()
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._results: Dict[Tuple[str, Tuple[str, ...]], CachedCommandResult] = {}
+        self.hits = 0
+        self.misses = 0
+        self.saved_duration = 0.0
+
+    @classmethod
+    def for_container(cls, container: Container) -> 'GitCommandCache':
+        """
+        Returns:
+            GitCommandCache: The cache of the repository in the container.
+        """
+        with cls._caches_lock:
+            if container.id not in cls._caches:
+                cls._caches[container.id] = cls()
+            return cls._caches[container.id]
+
+    @classmethod
+    def remove(cls, container: Container):
+        """
+        Drops the cache of the container, e.g. once the container is removed.
+        """
+        with cls._caches_lock:
+            cls._caches.pop(container.id, None)
+
+    @classmethod
+    def is_read_only(cls, command: str) -> bool:
+        """
+        Returns:
+            bool: Whether the command is a single allow-listed git command, whose output may be cached.
+        """
+        if cls.SHELL_SYNTAX_CHARACTERS.intersection(command):
+            return False
+        try:
+            arguments = shlex.split(command)
+        except ValueError:
+            return False
+
+        # Global options like `-c` or `-C` are not allowed in front of the subcommand
+        if len(arguments) < 2 or arguments[0] != 'git' or arguments[1] not in cls.READ_ONLY_SUBCOMMANDS:
+            return False
+        if any(argument.startswith(cls.MUTATING_OPTIONS) for argument in arguments[2:]):
+            return False
+        if arguments[1] == 'branch':
+            return all(argument in cls.READ_ONLY_BRANCH_OPTIONS for argument in arguments[2:])
+        return True
+
+    def get(self, workdir: str, command: str) -> Optional[CachedCommandResult]:
+        """
+        Looks up the output of a read-only command, counting the lookup as a hit or miss. Any other command
+        invalidates the cache, since it may change the repository.
+
+        Args:
+            workdir (str): The working directory of the command.
+            command (str): The command as typed into the shell.
+
+        Returns:
+            Optional[CachedCommandResult]: The cached result, None if the command needs to be executed.
+        """
+        if not self.is_read_only(command):
+            self.invalidate()
+            return None
+
+        with self._lock:
+            result = self._results.get(self._get_key(workdir, command))
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.saved_duration += result.duration
+            return result
+
+    def put(self, workdir: str, command: str, output: str, duration: float):
+        """
+        Caches the output of a successful command, if it is read-only.
+
+        Args:
+            workdir (str): The working directory of the command.
+            command (str): The command as typed into the shell.
+            output (str): The output of the command.
+            duration (float): The amount of seconds executing the command took.
+        """
+        if self.is_read_only(command):
+            with self._lock:
+                self._results[self._get_key(workdir, command)] = CachedCommandResult(output, duration)
+
+    def invalidate(self):
+        with self._lock:
+            self._results.clear()
+
+    def reset(self):
+        """
+        Invalidates the cache and resets its metrics, e.g. for the next scenario.
+        """
+        with self._lock:
+            self._results.clear()
+            self.hits = 0
+            self.misses = 0
+            self.saved_duration = 0.0
+
+    def get_metrics(self) -> dict:
+        """
+        Returns:
+            dict: The amount of hits and misses of the read-only commands since the last reset, the hit rate and the
+                milliseconds the hits saved.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {'hits': self.hits, 'misses': self.misses,
+                    'hit_rate': self.hits / lookups if lookups > 0 else 0.0,
+                    'saved_ms': round(self.saved_duration * 1000, 1)}
+
+    @staticmethod
+    def _get_key(workdir: str, command: str) -> Tuple[str, Tuple[str, ...]]:
+        # Normalizes the quoting and whitespace of the command
+        return workdir, tuple(shlex.split(command))
@@ -0,0 +1,71 @@
+from collections import deque
+
+
+class HeadTailOutput:
+    """
+    Captures a stream of command output within a character budget, keeping the beginning and the end of the output.
+
+    The first half of the budget holds the head of the output, the second half a rolling window over its tail. The
+    memory used is bounded by the budget, regardless of the amount of output written.
+    """
+
+    # A UTF-8 encoded character takes at most this amount of bytes
+    MAX_BYTES_PER_CHAR = 4
+
+    def __init__(self, max_num_chars: int):
+        """
+        Args:
+            max_num_chars (int): The maximum amount of characters of the output to keep, excluding the marker of the
+                elided output in between head and tail.
+        """
+        if max_num_chars < 0:
+            raise ValueError(f'The character budget must not be negative, got max_num_chars={max_num_chars}.')
+
+        self.max_num_chars = max_num_chars
+        self.num_head_chars = max_num_chars // 2
+        self.num_tail_chars = max_num_chars - self.num_head_chars
+        self.total_num_bytes = 0
+        self._head = bytearray()
+        self._tail = deque()
+        self._num_tail_bytes = 0
+
+    def write(self, chunk: bytes):
+        self.total_num_bytes += len(chunk)
+
+        max_num_head_bytes = self.num_head_chars * self.MAX_BYTES_PER_CHAR
+        if len(self._head) < max_num_head_bytes:
+            num_head_bytes = max_num_head_bytes - len(self._head)
+            self._head += chunk[:num_head_bytes]
+            chunk = chunk[num_head_bytes:]
+        if not chunk:
+            return
+
+        # Keeps just enough chunks to hold the bytes of the tail window
+        max_num_tail_bytes = self.num_tail_chars * self.MAX_BYTES_PER_CHAR
+        chunk = chunk[-max_num_tail_bytes:] if max_num_tail_bytes > 0 else b''
+        self._tail.append(chunk)
+        self._num_tail_bytes += len(chunk)
+        while self._tail and self._num_tail_bytes - len(self._tail[0]) >= max_num_tail_bytes:
+            self._num_tail_bytes -= len(self._tail.popleft())
+
+    def getvalue(self) -> str:
+        """
+        Returns:
+            str: The decoded output, if it exceeds the budget the head and tail windows of the output joined by a
+                marker stating the amount of elided bytes.
+        """
+        if len(self._head) + self._num_tail_bytes == self.total_num_bytes:
+            # Nothing was dropped yet, thus the windows are cut from the whole decoded output
+            text = (bytes(self._head) + b''.join(self._tail)).decode('utf-8', errors='replace')
+            if len(text) <= self.max_num_chars:
+                return text
+            head, tail = text[:self.num_head_chars], text[len(text) - self.num_tail_chars:]
+        else:
+            # A window boundary may split a character, whose remaining bytes are dropped
+            head = self._head.decode('utf-8', errors='ignore')[:self.num_head_chars]
+            tail = b''.join(self._tail).decode('utf-8', errors='ignore')
+            tail = tail[len(tail) - self.num_tail_chars:]
+
+        num_elided_bytes = self.total_num_bytes - len(head.encode('utf-8')) - len(tail.encode('utf-8'))
+        return (f'{head}\n[... {num_elided_bytes} bytes of output elided, {self.total_num_bytes} bytes in total ...]\n'
+                f'{tail}')
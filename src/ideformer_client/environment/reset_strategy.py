@@ -0,0 +1,15 @@
+from enum import Enum
+
+
+class ResetStrategy(Enum):
+    """
+    How the repository is set up for each scenario and reset afterwards.
+    """
+    # Check out the scenario in the clone on the agent branch. Afterwards, reset the working tree, delete the agent
+    # branch and prune the unreachable objects
+    BRANCH = 'branch'
+    # Add a fresh worktree on the agent branch for each scenario, next to a clone without checkout. Afterwards, remove
+    # the worktree and the agent branch. Unreachable objects are only pruned once the loose objects exceed a budget.
+    # Each worktree is a full checkout, thus this pays off for small trees, but not for repositories with many files,
+    # see src/benchmarks/scenario_reset.py
+    WORKTREE = 'worktree'
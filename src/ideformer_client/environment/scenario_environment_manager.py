@@ -1,11 +1,16 @@
-from typing import Optional
+from typing import List, Optional, Tuple
 
 from docker.models.containers import Container
 
 import logging
+import time
 
+from src.ideformer_client.environment.command_batch import CommandBatch, CommandResult
+from src.ideformer_client.environment.git_command_cache import GitCommandCache
 from src.ideformer_client.utils.exceptions import ScenarioEnvironmentException
+from src.ideformer_client.environment.reset_strategy import ResetStrategy
 from src.ideformer_client.environment.scenario_type import ScenarioType
+from src.repository_data_scraper.repository_cache import RepositoryCache
 from src.yt_scripts.schemas import RepositoryDataRow
 
 class ScenarioEnvironmentManager:
@@ -15,13 +20,40 @@ class ScenarioEnvironmentManager:
                  container: Container,
                  repository: RepositoryDataRow,
                  scenario_type: Optional[ScenarioType] = None,
-                 scenario: Optional[dict] = None):
+                 scenario: Optional[dict] = None,
+                 repository_cache_path: Optional[str] = None,
+                 reset_strategy: ResetStrategy = ResetStrategy.BRANCH,
+                 loose_object_budget: int = 10000):
+        """
+        Args:
+            container (Container): The container to set up the repository in.
+            repository (RepositoryDataRow): The repository to set up.
+            scenario_type (Optional[ScenarioType]): The type of the scenario to set up.
+            scenario (Optional[dict]): The scenario to set up.
+            repository_cache_path (Optional[str]): The path within the container at which the directory of a
+                RepositoryCache is mounted. If given, cached mirrors serve as snapshots of the repositories, which
+                are cloned locally instead of from GitHub. The mirror must not be evicted while the repository is
+                set up, e.g. by staying within RepositoryCache.use() until teardown_repository().
+            reset_strategy (ResetStrategy): How to set up each scenario and reset the repository afterwards.
+            loose_object_budget (int): With ResetStrategy.WORKTREE, the amount of loose objects above which the
+                unreachable objects left behind by the scenarios are pruned.
+        """
         self.container = container
         self.repository = repository
         self.repository_name = repository.name
         self.scenario_type = scenario_type
         self.scenario = scenario
+        self.repository_cache_path = repository_cache_path
+        self.reset_strategy = reset_strategy
+        self.loose_object_budget = loose_object_budget
         self.repository_work_dir = self._get_repository_working_directory()
+        # With ResetStrategy.WORKTREE, the clone lives in a hidden sibling directory of the working directory, which
+        # only exists as a worktree of the clone while a scenario is set up
+        if reset_strategy is ResetStrategy.WORKTREE:
+            parent_directory, directory = self.repository_work_dir.rsplit('/', 1)
+            self.repository_clone_dir = f'{parent_directory}/.{directory}'
+        else:
+            self.repository_clone_dir = self.repository_work_dir
         self.default_branch_name = None
         self.command_template = '/bin/bash -c "{command_to_execute}"'
 
@@ -52,14 +84,17 @@ class ScenarioEnvironmentManager:
         if self.scenario_type is None:
             raise ScenarioEnvironmentException('Cannot setup scenario, since scenario_type is None.')
 
+        # The cached git outputs of the agent of the previous scenario are stale, its metrics are reported already
+        GitCommandCache.for_container(self.container).reset()
+
         if self.scenario_type is ScenarioType.FILE_COMMIT_GRAM_CHUNK:
-            self._setup_iteratively_chunk_staged_diff_into_commits()
+            setup_steps = self._get_iteratively_chunk_staged_diff_into_commits_setup_steps()
         elif self.scenario_type is ScenarioType.FILE_COMMIT_GRAM_REBASE:
-            self._setup_clean_local_branch_before_push()
+            setup_steps = self._get_clean_local_branch_before_push_setup_steps()
         elif self.scenario_type is ScenarioType.MERGE:
-            self._setup_merge()
+            setup_steps = self._get_merge_setup_steps()
         elif self.scenario_type is ScenarioType.CHERRY_PICK:
-            self._setup_cherry_pick()
+            setup_steps = self._get_cherry_pick_setup_steps()
         else:
             raise NotImplementedError(
                 f'Currently only supporting ScenarioType.{ScenarioType.FILE_COMMIT_GRAM_CHUNK.name}'
@@ -67,39 +102,59 @@ class ScenarioEnvironmentManager:
 
         # In any case, the agent's actions should be isolated into a specific branch that is set up in a deterministic
         # way. This saves a turn and avoids fuzzy naming of the branch and resulting difficulties in the teardown.
-        self._setup_agent_branch()
+        # Worktrees are added on the agent branch already.
+        if self.reset_strategy is ResetStrategy.BRANCH:
+            setup_steps += self._get_agent_branch_setup_steps()
+
+        # All steps run in a single exec, which stops at the first failing step
+        self._run_setup_steps(setup_steps)
+        logging.info(f'Scenario precondition for {self.scenario_type} successfully set up.')
 
     def teardown_scenario(self):
         """
         Resets the repository to its default state after a scenario has been executed.
 
         This involves resetting staged changes, resetting the working directory, and removing the agent's target branch.
-        Upon successful completion, validates that the target branch has been removed.
+        With ResetStrategy.WORKTREE, the worktree of the scenario is removed instead of resetting it, and the
+        unreachable objects are only pruned once they exceed the loose object budget. Upon successful completion,
+        validates that the target branch has been removed.
 
         Raises:
             ScenarioEnvironmentException: If the reset operation fails or if the
             target branch is still present after the reset.
         """
-        teardown_command_err_code, teardown_output = self.container.exec_run(
-            '/bin/bash -c "{command_to_execute}"'\
-                .format(command_to_execute='git reset --hard HEAD &&  ' # Reset any changes staged or unstaged and workdir
-                                            f'git checkout {self.default_branch_name} &&'
-                                            # Remove the branch in which the agent attempted to solve this scenario
-                                            # and force removal from the repository entirely, by triggering garbage collection
-                                            # Reading Note: `git prune` could end up being to costly to run after every scenario.
-                                            #   Monitor this.
-                                            f'git branch -D {self.AGENT_TARGET_BRANCH_NAME} && '
-                                            'git prune'),
-            privileged=False, workdir=self.repository_work_dir)
-        validation_command_err_code, validation_output = self.container.exec_run(
-            '/bin/bash -c "{command_to_execute}"'.format(command_to_execute=f'git branch --list {self.AGENT_TARGET_BRANCH_NAME}'),
-            privileged=False, workdir=self.repository_work_dir)
-        if teardown_command_err_code == 0 and validation_command_err_code == 0 and validation_output == b'':
+        if self.reset_strategy is ResetStrategy.WORKTREE:
+            # Removing the worktree discards all changes of the agent, regardless of the state it left the worktree in.
+            # The worktree may be missing if the precondition setup failed, which the branch validation below covers.
+            teardown_command = (f'([ ! -e {self.repository_work_dir} ] || '
+                                f'git worktree remove --force {self.repository_work_dir}) && git worktree prune && '
+                                f'(git branch -D {self.AGENT_TARGET_BRANCH_NAME} || true)')
+        else:
+            teardown_command = ('git reset --hard HEAD &&  ' # Reset any changes staged or unstaged and workdir
+                                f'git checkout {self.default_branch_name} &&'
+                                # Remove the branch in which the agent attempted to solve this scenario
+                                # and force removal from the repository entirely, by triggering garbage collection
+                                # Reading Note: `git prune` could end up being to costly to run after every scenario.
+                                #   Monitor this.
+                                f'git branch -D {self.AGENT_TARGET_BRANCH_NAME} && '
+                                'git prune')
+        GitCommandCache.for_container(self.container).invalidate()
+        # The teardown, its validation and, with ResetStrategy.WORKTREE, the count of the loose objects run in a
+        # single exec
+        batch = CommandBatch(self.container, self.repository_clone_dir)
+        batch.add(teardown_command)
+        batch.add(f'git branch --list {self.AGENT_TARGET_BRANCH_NAME}')
+        if self.reset_strategy is ResetStrategy.WORKTREE:
+            batch.add('git count-objects')
+        teardown_result, validation_result, *count_objects_result = batch.run()
+        if teardown_result.succeeded and validation_result.succeeded and validation_result.output == '':
             logging.info(f'Successfully tore down the scenario.')
+            if self.reset_strategy is ResetStrategy.WORKTREE:
+                self._prune_if_over_budget(count_objects_result[0])
         else:
-            raise ScenarioEnvironmentException(f"Could not reset repository. Command output: {teardown_output.decode('utf-8')}."
-                                               f"\nBranch deletion validation (empty string if successful): {validation_output.decode('utf-8')}"
-                                               f"\nDocker error code: {teardown_command_err_code}.")
+            raise ScenarioEnvironmentException(f"Could not reset repository. Command output: {teardown_result.output}."
+                                               f"\nBranch deletion validation (empty string if successful): {validation_result.output}"
+                                               f"\nDocker error code: {teardown_result.exit_code}.")
 
     def setup_repository(self):
         """
@@ -109,11 +164,17 @@ class ScenarioEnvironmentManager:
         to the local machine. It also retrieves and sets the default branch name
         for the repository.
 
+        With ResetStrategy.WORKTREE, the clone has no checkout and its HEAD is detached, such that the default branch
+        can be checked out in the worktrees of the scenarios.
+
         Raises:
             ScenarioEnvironmentException: If either the cloning or setup of the default branch name fail.
         """
         self._clone_repository()
-        self.default_branch_name = self._get_default_branch_name()
+        if self.reset_strategy is ResetStrategy.WORKTREE:
+            self.default_branch_name = self._detach_head()
+        else:
+            self.default_branch_name = self._get_default_branch_name()
 
     def teardown_repository(self):
         """
@@ -124,8 +185,12 @@ class ScenarioEnvironmentManager:
         Raises:
             ScenarioEnvironmentException: If the repository could not be reset, indicated by a non-zero Docker error code.
         """
+        remove_command = f'rm -r {self.repository_work_dir}'
+        if self.reset_strategy is ResetStrategy.WORKTREE:
+            # The worktree only exists if a scenario is set up
+            remove_command = f'rm -r {self.repository_clone_dir} && ([ ! -e {self.repository_work_dir} ] || {remove_command})'
         err_code, output = self.container.exec_run(
-            '/bin/bash -c "{command_to_execute}"'.format(command_to_execute=f'rm -r {self.repository_work_dir} && ls'),
+            '/bin/bash -c "{command_to_execute}"'.format(command_to_execute=f'{remove_command} && ls'),
             privileged=False)
         if err_code == 0:
             logging.info(f'Successfully removed repository: {self.repository_name} from container.')
@@ -145,10 +210,27 @@ class ScenarioEnvironmentManager:
             dict: A dictionary containing the outputs of executing the supported git commands. The keys are the commands
                 in snake case without dashes or underscores.
 
+        The outputs are cached in the GitCommandCache of the container, from which the agent is served if it runs the
+        same commands.
+
         Raises:
             ScenarioEnvironmentException: If the context cannot be fetched (any command fails).
         """
-        return {'git_status': self._run_git_status(), 'git_diff_cached': self._run_git_diff_cached()}
+        batch = CommandBatch(self.container, self.repository_work_dir)
+        batch.add('git status')
+        batch.add('git diff --cached')
+        start = time.perf_counter()
+        git_status_result, git_diff_cached_result = batch.run()
+        duration = time.perf_counter() - start
+        for result in (git_status_result, git_diff_cached_result):
+            if not result.succeeded:
+                raise ScenarioEnvironmentException(f"Cannot get {result.command}. Docker error code: {result.exit_code}.")
+
+        # The agent of the scenario is served from these outputs, if it repeats the commands before changing anything
+        command_cache = GitCommandCache.for_container(self.container)
+        for result in (git_status_result, git_diff_cached_result):
+            command_cache.put(self.repository_work_dir, result.command, result.output, duration / 2)
+        return {'git_status': git_status_result.output, 'git_diff_cached': git_diff_cached_result.output}
 
     def _clone_repository(self):
         """
@@ -159,12 +241,31 @@ class ScenarioEnvironmentManager:
         is logged. Otherwise, the output of the clone operation is logged
         as an info message.
 
+        If self.repository_cache_path is set and the mirror of the repository is present, the repository is cloned
+        from the mirror with `--shared`, i.e. the clone borrows the objects of the read-only mirror instead of
+        downloading or copying them. Setting up the repository again, e.g. to recover from a failed teardown, thus
+        resets it to the snapshot at the cost of a local operation.
+
         Raises:
             ScenarioEnvironmentException if the clone operation fails.
         """
         # Executes the startup command in a blocking way, ensuring that the repository is available before continuing
-        clone_command = '/bin/bash -c "git clone https://github.com/{repository_name}.git"'
-        err_code, output = self.container.exec_run(clone_command.format(repository_name=self.repository_name))
+        repository_url = f'https://github.com/{self.repository_name}.git'
+        directory = self.repository_clone_dir.split('/')[-1]
+        # Worktrees are checked out for each scenario, thus their clone does not need a checkout of its own
+        clone_options = '--no-checkout ' if self.reset_strategy is ResetStrategy.WORKTREE else ''
+        clone_command = f'git clone {clone_options}{repository_url} {directory}'
+        if self.repository_cache_path is not None:
+            mirror_path = f'{self.repository_cache_path}/{RepositoryCache.get_mirror_name(self.repository_name)}'
+            # Cloning the mirror only copies its local default branch, its remote branches are fetched as well. The
+            # clone keeps GitHub as its origin, such that it looks like a regular clone to the agent.
+            remote_branches = "'+refs/remotes/origin/*:refs/remotes/origin/*'"
+            clone_command = (f'if [ -d {mirror_path} ]; then '
+                             f'git clone {clone_options}--shared {mirror_path} {directory} && '
+                             f'git -C {directory} fetch --quiet origin {remote_branches} && '
+                             f'git -C {directory} remote set-url origin {repository_url}; '
+                             f'else {clone_command}; fi')
+        err_code, output = self.container.exec_run(self.command_template.format(command_to_execute=clone_command))
 
         output = output.decode("utf-8")
         if err_code != 0:
@@ -195,54 +296,89 @@ class ScenarioEnvironmentManager:
         else:
             raise ScenarioEnvironmentException(f'Cannot parse "git status" output, nothing to parse: {output}')
 
-    def _setup_agent_branch(self):
+    def _detach_head(self) -> str:
         """
-        Sets up the branch isolating the agent's actions from the rest of the repository.
+        Detaches the HEAD of the clone from the default branch, without touching the (empty) working tree.
 
-        This method creates and checks out a new branch specified by AGENT_TARGET_BRANCH in the
-        repository residing in the Docker container.
+        Returns:
+            str: The name of the default branch.
 
         Raises:
-            ScenarioEnvironmentException: If the branch setup and checkout fail, an exception is
-                                          raised with the Docker error code.
+            ScenarioEnvironmentException: If the HEAD of the clone is no branch or cannot be detached.
+        """
+        err_code, output = self.container.exec_run(
+            self.command_template.format(command_to_execute='git symbolic-ref --short HEAD && '
+                                                            'git update-ref --no-deref HEAD HEAD'),
+            privileged=False, workdir=self.repository_clone_dir)
+        if err_code != 0:
+            raise ScenarioEnvironmentException(f'Cannot detach HEAD from the default branch: {output.decode("utf-8")}')
+        return output.decode('utf-8').strip()
+
+    def _prune_if_over_budget(self, count_objects_result: CommandResult):
+        """
+        Prunes the objects that became unreachable by removing the agent branches, once the amount of loose objects
+        exceeds self.loose_object_budget. Pruning is only an optimization, thus failures are merely logged.
 
+        Args:
+            count_objects_result (CommandResult): The result of `git count-objects` in the clone after the teardown.
         """
+        # The output looks like "42 objects, 168 kilobytes"
+        if not count_objects_result.succeeded or \
+                int(count_objects_result.output.split()[0]) <= self.loose_object_budget:
+            return
+
         err_code, output = self.container.exec_run(
-            '/bin/bash -c "{command_to_execute}"'.format(command_to_execute=f'git checkout -b "{self.AGENT_TARGET_BRANCH_NAME}"'),
-            privileged=False, workdir=self.repository_work_dir)
+            self.command_template.format(command_to_execute='git worktree prune && git prune'),
+            privileged=False, workdir=self.repository_clone_dir)
         if err_code == 0:
-            logging.info(f'Successfully set up branch for agent actions: {self.AGENT_TARGET_BRANCH_NAME}.')
-            logging.debug(f'"git status" after setup:\n{self._run_git_status()}')
+            logging.info(f'Pruned the loose objects of {self.repository_name}.')
         else:
-            raise ScenarioEnvironmentException(f"Could not set up and check out agent branch: {self.AGENT_TARGET_BRANCH_NAME}. "
-                                               f"Docker error code: {err_code}.")
+            logging.warning(f'Could not prune the loose objects of {self.repository_name}: {output.decode("utf-8")}')
 
-    def _run_git_status(self):
+    def _get_agent_branch_setup_steps(self) -> List[Tuple[str, str, str]]:
         """
+        Returns the steps setting up the branch isolating the agent's actions from the rest of the repository.
+
+        These create and check out a new branch specified by AGENT_TARGET_BRANCH in the repository residing in the
+        Docker container, followed by `git status` for debugging purposes.
+
         Returns:
-            str: The output of the `git status` command if successful.
+            List[Tuple[str, str, str]]: The setup steps, see _run_setup_steps().
+        """
+        return [(f'git checkout -b "{self.AGENT_TARGET_BRANCH_NAME}"', self.repository_work_dir,
+                 f"Could not set up and check out agent branch: {self.AGENT_TARGET_BRANCH_NAME}. "
+                 "Docker error code: {err_code}."),
+                ('git status', self.repository_work_dir, 'Cannot get git status. Docker error code: {err_code}.')]
+
+    def _run_setup_steps(self, setup_steps: List[Tuple[str, str, str]]):
+        """
+        Runs the steps in a single exec, stopping at the first step that fails.
+
+        Args:
+            setup_steps (List[Tuple[str, str, str]]): The command, working directory and error message of each step.
+                The error message is formatted with the err_code of the failed command.
 
         Raises:
-            ScenarioEnvironmentException: If the execution of the `git status` command in the Docker container fails.
+            ScenarioEnvironmentException: With the error message of the first step that failed.
         """
-        err_code, output = self.container.exec_run(
-            '/bin/bash -c "{command_to_execute}"'.format(command_to_execute='git status'),
-            privileged=False, workdir=self.repository_work_dir)
-        if err_code == 0:
-            return output.decode("utf-8")
-        else:
-            raise ScenarioEnvironmentException(f"Cannot get git status. Docker error code: {err_code}.")
+        batch = CommandBatch(self.container, stop_on_failure=True)
+        for command, workdir, _ in setup_steps:
+            batch.add(command, workdir)
+        for (_, _, error_message), result in zip(setup_steps, batch.run()):
+            if not result.succeeded:
+                raise ScenarioEnvironmentException(error_message.format(err_code=result.exit_code))
+            logging.debug(f'"{result.command}" yields:\n{result.output}')
 
-    def _run_git_diff_cached(self):
+    def _run_git_status(self):
         """
         Returns:
-            str: The output of the `git diff --cached` command if successful.
+            str: The output of the `git status` command if successful.
 
         Raises:
             ScenarioEnvironmentException: If the execution of the `git status` command in the Docker container fails.
         """
         err_code, output = self.container.exec_run(
-            '/bin/bash -c "{command_to_execute}"'.format(command_to_execute='git diff --cached'),
+            '/bin/bash -c "{command_to_execute}"'.format(command_to_execute='git status'),
             privileged=False, workdir=self.repository_work_dir)
         if err_code == 0:
             return output.decode("utf-8")
@@ -269,78 +405,67 @@ class ScenarioEnvironmentManager:
         else:
             raise ValueError("Can't determine working directory.")
 
-    def _setup_iteratively_chunk_staged_diff_into_commits(self):
+    def _get_iteratively_chunk_staged_diff_into_commits_setup_steps(self) -> List[Tuple[str, str, str]]:
         """
-        Sets up the environment of the Docker container for iteratively chunking the staged difference in the repository into multiple commits.
+        Returns the steps setting up the environment of the Docker container for iteratively chunking the staged
+        difference in the repository into multiple commits.
 
         Checks out the first (ie. chronologically newest) commit in the scenario and then soft resets the changes of the file
         specified in the scenario to stage all changes between the first (ie. newest) and last (ie. oldest) commit, both inclusive.
 
-
-        Raises:
-            ScenarioEnvironmentException: If an error occurs during checkout or reset commands within the Docker container.
+        Returns:
+            List[Tuple[str, str, str]]: The setup steps, see _run_setup_steps().
         """
-        checkout_command = f"git checkout {self.scenario['first_commit']}"
-        err_code, output = self.container.exec_run(self.command_template.format(command_to_execute=checkout_command),
-                                                   privileged=False, workdir=self.repository_work_dir)
-        if err_code == 0:
-            # Reset only the changes made to the file concerning the scenario such that they are staged
-            reset_command = f"git checkout HEAD~{self.scenario['times_seen_consecutively']} -- {self.scenario['file']}"
-            err_code, output = self.container.exec_run(self.command_template.format(command_to_execute=reset_command),
-                                                       privileged=False, workdir=self.repository_work_dir)
-            if err_code != 0:
-                raise ScenarioEnvironmentException(f"Cannot check out commit: {self.scenario['last_commit']} and "
-                                                   f"soft reset changes in {self.scenario['file']}. Docker error "
-                                                   f"code: {err_code}.")
-            else:
-                logging.info(f'Scenario precondition for {self.scenario_type} successfully set up.')
+        # Reset only the changes made to the file concerning the scenario such that they are staged
+        reset_command = f"git checkout HEAD~{self.scenario['times_seen_consecutively']} -- {self.scenario['file']}"
+        return [self._get_checkout_step(self.scenario['first_commit']),
+                (reset_command, self.repository_work_dir,
+                 f"Cannot check out commit: {self.scenario['last_commit']} and soft reset changes in "
+                 f"{self.scenario['file']}. Docker error code: {{err_code}}.")]
 
-        else:
-            raise ScenarioEnvironmentException(f"Cannot check out commit: {self.scenario['first_commit']}. Docker "
-                                                     f"error code: {err_code}.")
-
-    def _checkout_commit(self, commit: str):
+    def _get_checkout_step(self, commit: str) -> Tuple[str, str, str]:
         """
+        Returns the step checking out the commit in the repository working directory. With ResetStrategy.WORKTREE,
+        this adds the worktree of the scenario on a new agent branch at the commit.
+
         Args:
             commit: The specific commit hash or identifier to be checked out in the git repository.
 
-        Raises: ScenarioEnvironmentException: If the checkout command fails.
+        Returns:
+            Tuple[str, str, str]: The setup step, see _run_setup_steps().
         """
-        checkout_command = f"git checkout {commit}"
-        err_code, output = self.container.exec_run(self.command_template.format(command_to_execute=checkout_command),
-                                                   privileged=False, workdir=self.repository_work_dir)
-        if err_code != 0:
-            raise ScenarioEnvironmentException(f"Cannot check out commit: {commit}. "
-                                               f"Docker error code: {err_code}.")
+        if self.reset_strategy is ResetStrategy.WORKTREE:
+            checkout_command = f'git worktree add -b {self.AGENT_TARGET_BRANCH_NAME} {self.repository_work_dir} {commit}'
         else:
-            logging.info(f'Scenario precondition for {self.scenario_type} successfully set up.')
+            checkout_command = f"git checkout {commit}"
+        return checkout_command, self.repository_clone_dir, f"Cannot check out commit: {commit}. Docker error code: {{err_code}}."
 
-    def _setup_clean_local_branch_before_push(self):
+    def _get_clean_local_branch_before_push_setup_steps(self) -> List[Tuple[str, str, str]]:
         """
         Checks out the first (ie. chronologically newest) commit in the scenario.
 
-        Raises:
-            ScenarioEnvironmentException: If the checkout command fails.
+        Returns:
+            List[Tuple[str, str, str]]: The setup steps, see _run_setup_steps().
         """
-        self._checkout_commit(self.scenario['first_commit'])
+        return [self._get_checkout_step(self.scenario['first_commit'])]
 
-    def _setup_merge(self):
+    def _get_merge_setup_steps(self) -> List[Tuple[str, str, str]]:
         """
         Checks out the first parent commit in the scenario.
 
         Note that which parent is checked out may impact system performance on these samples, since LLMs
         are sensitive to ordering.
 
-        Raises:
-            ScenarioEnvironmentException: If the checkout command fails.
+        Returns:
+            List[Tuple[str, str, str]]: The setup steps, see _run_setup_steps().
         """
-        self._checkout_commit(self.scenario['parents'][0])
+        return [self._get_checkout_step(self.scenario['parents'][0])]
 
-    def _setup_cherry_pick(self):
+    def _get_cherry_pick_setup_steps(self) -> List[Tuple[str, str, str]]:
         """
         Checks out the first parent commit in the scenario. In cherry-pick scenarios there should only be one parent.
 
-        Raises:
-            ScenarioEnvironmentException: If the checkout command fails.
+        Returns:
+            List[Tuple[str, str, str]]: The setup steps, see _run_setup_steps().
         """
-        self._checkout_commit(self.scenario['parents'][0])
+        return [self._get_checkout_step(self.scenario['parents'][0])]
@@ -1,4 +1,7 @@
+import asyncio
+import io
 import logging
+import time
 from typing import Optional
 
 from docker.models.containers import Container
@@ -9,9 +12,16 @@ from ideformer.client.tools.langchain.implementation import (
 )
 from pydantic import Field
 
+from src.ideformer_client.environment.async_exec_client import AsyncExecClient
+from src.ideformer_client.environment.bash_session import BashSession
+from src.ideformer_client.environment.git_command_cache import GitCommandCache
+from src.ideformer_client.environment.head_tail_output import HeadTailOutput
+
 
 class TerminalAccessToolImplementationProvider(ToolImplementationProvider):
     DEFAULT_ERROR: str = "ERROR: Could not execute given command."
+    # The amount of output bytes after which a command is killed, if the output is capped
+    DEFAULT_MAX_NUM_BYTES_BASH_OUTPUT: int = 16 * 1024 ** 2
 
     def __init__(
             self,
@@ -20,17 +30,38 @@ class TerminalAccessToolImplementationProvider(ToolImplementationProvider):
             bash_timeout: Optional[int],
             max_num_chars_bash_output: Optional[int],
             workdir: str,
+            max_num_bytes_bash_output: Optional[int] = None,
+            use_session: bool = False,
     ):
+        """
+        Args:
+            container (Container): The container to execute the commands in.
+            error_message (Optional[str]): Prepended to the output of failed commands, defaults to DEFAULT_ERROR.
+            bash_timeout (Optional[int]): The amount of seconds after which a command is terminated, no limit if None.
+            max_num_chars_bash_output (Optional[int]): The maximum amount of characters of the output returned to the
+                agent. Longer outputs are cut down to their beginning and end. No limit if None.
+            workdir (str): The working directory of the commands.
+            max_num_bytes_bash_output (Optional[int]): If max_num_chars_bash_output is set, the amount of output bytes
+                after which a command is killed and its output no longer read. Defaults to
+                DEFAULT_MAX_NUM_BYTES_BASH_OUTPUT.
+            use_session (bool): Whether to execute the commands in a persistent bash session of the container, such
+                that the working directory and environment persist across commands, instead of a new bash process
+                per command. Opening the session closes the previous session of the container.
+        """
         super().__init__()
 
         self.error_message = error_message or self.DEFAULT_ERROR
         self.bash_timeout = bash_timeout
         self.max_num_chars_bash_output = max_num_chars_bash_output
+        self.max_num_bytes_bash_output = max_num_bytes_bash_output or self.DEFAULT_MAX_NUM_BYTES_BASH_OUTPUT
         self.container = container
         self.workdir = workdir
+        self.exec_client = AsyncExecClient(container)
+        self.session = BashSession.open(container, workdir) if use_session else None
+        self.command_cache = GitCommandCache.for_container(container)
 
     @tool_implementation()
-    def execute_bash_command(
+    async def execute_bash_command(
             self,
             command: str = Field(
                 description="A bash command with its arguments to be executed. It can modify the environment and files."
@@ -40,30 +71,78 @@ class TerminalAccessToolImplementationProvider(ToolImplementationProvider):
             ),
     ):
         """
-        Executes a given bash command inside a Docker container.
+        Executes a given bash command inside a Docker container, without blocking the event loop.
         """
         # At this point the passed command is just what the agent wants to execute in the terminal. Thus, we still need
         # to prepend the bash call and '-c' flag to execute the command in the string. Note that the command should
-        # use double quotes " to ensure it is properly nested in the wrapping string.
-        command = f'/bin/bash -c "{command}"'
+        # use double quotes " to ensure it is properly nested in the wrapping string. The session evaluates the
+        # command as is.
+        agent_command = command
+        if self.session is None:
+            command = f'/bin/bash -c "{command}"'
         logging.info(f'Command to execute in container: {command}')
 
-        if self.bash_timeout is not None:
-            command = f"timeout {self.bash_timeout} {command}"
         try:
             if 'sudo' in command or '-rf' in command:
                 raise PermissionError(f'Prohibited string "sudo" or "-rf" found in {command}.')
 
-            err_code, output = self.container.exec_run(command, workdir=self.workdir, privileged=False)
-            output = output.decode("utf-8")
+            # Repeated read-only git commands are served from the cache, any other command invalidates it
+            cached_result = self.command_cache.get(self.workdir, agent_command)
+            if cached_result is not None:
+                logging.info(f'Serving command from cache: {agent_command}')
+                return self._cap_output(cached_result.output)
+            start = time.perf_counter()
+
+            # The output is streamed into a head and tail window, such that memory stays flat regardless of the
+            # amount of output
+            captured_output = None
+            if self.max_num_chars_bash_output is not None:
+                captured_output = HeadTailOutput(self.max_num_chars_bash_output)
+
+            if self.session is not None:
+                # The session interrupts commands running into the bash timeout, they exit with code 124
+                session_output = captured_output if captured_output is not None else io.BytesIO()
+                err_code = await AsyncExecClient.run_blocking(
+                    self.session.run, command, session_output, self.bash_timeout,
+                    None if captured_output is None else self.max_num_bytes_bash_output)
+                output = session_output.getvalue()
+            # The bash timeout is enforced within the container, a timed out command exits with code 124
+            elif captured_output is None:
+                err_code, output = await self.exec_client.exec_run(command, workdir=self.workdir, privileged=False,
+                                                                   timeout=self.bash_timeout)
+            else:
+                err_code = await self.exec_client.exec_run_capped(command, captured_output,
+                                                                  self.max_num_bytes_bash_output, workdir=self.workdir,
+                                                                  privileged=False, timeout=self.bash_timeout)
+                output = captured_output.getvalue()
+
+            if isinstance(output, bytes):
+                output = output.decode("utf-8")
+            if err_code is None:
+                output += (f"\nThe command was killed after producing more than {self.max_num_bytes_bash_output} "
+                           f"bytes of output.")
             if err_code != 0:
                 output = f"{self.error_message}\n{output}"
+            elif self.max_num_chars_bash_output is None or len(output) <= self.max_num_chars_bash_output:
+                # Elided outputs are not cached, such that the cache stays within the output budget
+                self.command_cache.put(self.workdir, agent_command, output, time.perf_counter() - start)
         except ValueError:
             return self.error_message
         except PermissionError as e:
             return str(e)
-
-        if self.max_num_chars_bash_output is not None:
-            return output[: self.max_num_chars_bash_output]
+        except RuntimeError as e:
+            return f"{self.error_message}\n{e}"
+        except asyncio.TimeoutError:
+            return f"{self.error_message}\nThe command did not finish within {self.bash_timeout} seconds."
 
         return output
+
+    def _cap_output(self, output: str) -> str:
+        """
+        Cuts the output down to its beginning and end, if it exceeds max_num_chars_bash_output.
+        """
+        if self.max_num_chars_bash_output is None or len(output) <= self.max_num_chars_bash_output:
+            return output
+        captured_output = HeadTailOutput(self.max_num_chars_bash_output)
+        captured_output.write(output.encode('utf-8'))
+        return captured_output.getvalue()
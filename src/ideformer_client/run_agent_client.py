@@ -2,179 +2,118 @@ import asyncio
 import logging
 import os
 
+from docker.models.containers import Container
 from grazie.api.client.profiles import Profile
 from grazie.cloud_tools_v2.authorization import AuthType, AuthVersion
 from grazie.common.core.log import setup_logging
 from ideformer.client.agents.simple_grazie_oneshot_runner import IdeFormerSimpleGrazieOneShotRunner
 from ideformer.client.client import IdeFormerClient
 
-from src.ideformer_client.data.prompt_provider import PromptProvider
+from src.ideformer_client.environment.container_pool import ContainerPool
 from src.ideformer_client.environment.docker_manager import DockerManager
+from src.ideformer_client.environment.evaluation_mode import EvaluationMode
+from src.ideformer_client.environment.reset_strategy import ResetStrategy
+from src.ideformer_client.data.dataset_backend import DatasetBackend, create_local_dataset_backend
 from src.ideformer_client.data.git_dataset_provider import GitDatasetProvider
 from src.ideformer_client.data.yt_connection_manager import YTConnectionManager
-from src.ideformer_client.environment.evaluator import Evaluator
-from src.ideformer_client.environment.scenario_environment_manager import ScenarioEnvironmentManager
-from src.ideformer_client.utils.exceptions import ScenarioEnvironmentException
+from src.ideformer_client.scenario_scheduler import ScenarioScheduler
 from src.ideformer_client.environment.scenario_type import ScenarioType
 from src.ideformer_client.environment.terminal_access_tool_provider import TerminalAccessToolImplementationProvider
+from src.repository_data_scraper.repository_cache import RepositoryCache
 
-def _create_scenario_dict():
-    """
-    Helper function for creating a dictionary to store run statistics on a ScenarioType granularity.
+# Where the directory of the repository cache is mounted within the container
+REPOSITORY_CACHE_MOUNT_PATH = '/repository-cache'
 
-    Returns:
-        dict: A dictionary mapping each ScenarioType to a data structure
-        containing a count and a list of scenarios.
+def _create_runner(system_prompt: str, user_prompt: str, container: Container,
+                   workdir: str) -> IdeFormerSimpleGrazieOneShotRunner:
+    """
+    Creates the agent solving a single scenario with terminal access to the given container.
     """
-    return {scenario_type.value: {'count': 0, 'scenarios': []} for scenario_type in ScenarioType}
+    tool = TerminalAccessToolImplementationProvider(
+        container=container,
+        error_message=None,
+        max_num_chars_bash_output=30000,
+        bash_timeout=180,
+        workdir=workdir,
+        use_session=os.environ.get('TERMINAL_USE_SESSION', 'false').lower() == 'true',
+    )
+
+    client = IdeFormerClient(
+        ideformer_host=os.environ['IDEFORMER_HOST'],
+        ideformer_port=80,
+        grazie_jwt_token=os.environ["IDEFORMER_JWT_TOKEN"],
+        client_auth_type=AuthType.APPLICATION,
+        client_auth_version=AuthVersion.V5,
+        client_agent_name="vcs-agent",  # can be any
+        client_agent_version="dev",  # can be any
+    )
+
+    return IdeFormerSimpleGrazieOneShotRunner(
+        system_prompt=system_prompt,
+        user_prompt=user_prompt,
+        client=client,
+        tools_implementation_provider=tool,
+        profile=Profile.OPENAI_GPT_4_O_MINI.name,
+        max_tokens_to_sample=256,
+        temperature=1.0,
+        max_agent_iterations=1,
+    )
 
 async def main():
     setup_logging(log_to_stderr=False, level=logging.INFO)
-    yt_connection_manager = YTConnectionManager(dataset_table_location=os.environ['YT_DATASET_TABLE_LOCATION'])
-    response = yt_connection_manager.get_dataset_stream()
+    # A local Parquet or JSON lines dataset replaces YTsaurus, e.g. for offline benchmarks of the client loop
+    if os.environ.get('LOCAL_DATASET_PATH'):
+        dataset_backend: DatasetBackend = create_local_dataset_backend(
+            os.environ['LOCAL_DATASET_PATH'], programming_language=os.environ.get('LOCAL_DATASET_PROGRAMMING_LANGUAGE'))
+    else:
+        dataset_backend = YTConnectionManager(dataset_table_location=os.environ['YT_DATASET_TABLE_LOCATION'])
+    response = dataset_backend.get_dataset_stream()
     git_dataset_provider = GitDatasetProvider(response)
 
-    i = 0
-
-    run_statistics = {'successes': _create_scenario_dict(), 'totals': _create_scenario_dict()}
-
-    docker_manager = DockerManager(
-        image='tolindenba/ytsaurus:python-3.10',
-        env_vars={},
-        container_start_timeout=300,
+    # Optionally keep mirrors of the repositories on the host, which the containers clone locally instead of from GitHub
+    repository_cache = None
+    volumes = None
+    if os.environ.get('REPOSITORY_CACHE_DIRECTORY'):
+        repository_cache = RepositoryCache(cache_directory=os.environ['REPOSITORY_CACHE_DIRECTORY'],
+                                           disk_budget=int(os.environ.get('REPOSITORY_CACHE_BUDGET', 20 * 1024 ** 3)))
+        volumes = {os.path.abspath(repository_cache.cache_directory): {'bind': REPOSITORY_CACHE_MOUNT_PATH,
+                                                                       'mode': 'ro'}}
+
+    # The amount of containers to solve scenarios in concurrently
+    concurrency = int(os.environ.get('CONTAINER_POOL_SIZE', 1))
+    container_pool = ContainerPool(
+        docker_manager_factory=lambda: DockerManager(
+            image='tolindenba/ytsaurus:python-3.10',
+            env_vars={},
+            container_start_timeout=300,
+            volumes=volumes,
+        ),
+        # The spare started containers, e.g. to replace containers that broke without waiting for a new one
+        size=int(os.environ.get('CONTAINER_POOL_WARM_SIZE', 1)),
+        max_uses=int(os.environ['CONTAINER_MAX_USES']) if os.environ.get('CONTAINER_MAX_USES') else None,
     )
-    docker_manager.setup_image()
-    docker_manager.create_container()
-    container = docker_manager.start_container()
-
-    for repository in git_dataset_provider.stream_repositories():
-        j = 0
-
-        try:
-            scenario_environment_manager = ScenarioEnvironmentManager(
-                container=container,
-                repository=repository,
-            )
-            scenario_environment_manager.setup_repository()
-        except ScenarioEnvironmentException as e:
-            logging.error(f"Skipping scenario {repository}: \n{e}")
-            continue
-        except ValueError as e:
-            logging.error(f"Skipping scenario {repository}. Could not set repository working directory: \n{e}")
-            continue
-
-        evaluator = Evaluator(container=container,
-                              agent_target_branch_name=scenario_environment_manager.AGENT_TARGET_BRANCH_NAME,
-                              repository_work_dir=scenario_environment_manager.repository_work_dir)
-        for scenario_type in ScenarioType:
-            k=0
-            scenarios = git_dataset_provider.get_scenarios_for(scenario_type=scenario_type)
-            for scenario in scenarios:
-                # Ensure that we actually have > 0 scenarios of scenario_type for the current repository
-                if len(scenarios) == 0:
-                    continue
-
-                try:
-                    scenario_environment_manager.set_scenario(scenario)
-                    scenario_environment_manager.set_scenario_type(scenario_type)
-                    scenario_environment_manager.setup_scenario_preconditions()
-                except ScenarioEnvironmentException as e:
-                    logging.error(f"Skipping scenario {repository} due to precondition setup error: \n{e}")
-                    scenario_environment_manager.teardown_scenario()
-                    continue
-
-                system_prompt = PromptProvider.get_system_prompt()
-
-                try:
-                    scenario_context = scenario_environment_manager.provide_scenario_context()
-                    scenario_context['programming_language'] = repository.programming_language
-                    user_prompt = PromptProvider.get_prompt_for(scenario_type, scenario, context=scenario_context,
-                                                                agent_target_branch_name=ScenarioEnvironmentManager.AGENT_TARGET_BRANCH_NAME)
-                except ScenarioEnvironmentException as e:
-                    logging.error(f"Could not fetch scenario context for repository {repository.name}, scenario type "
-                                  f"{scenario_type} and\nscenario{scenario}:\n{e}\n"
-                                  'Proceeding without context.')
-                    user_prompt = PromptProvider.get_prompt_for(scenario_type, scenario, context=None,
-                                                                agent_target_branch_name=ScenarioEnvironmentManager.AGENT_TARGET_BRANCH_NAME)
-
-                logging.debug(f'Current scenario is given by:\nRepository: {repository.name}\nScenario type: {scenario_type}'
-                              f'\nScenario: {scenario}\nUser prompt: {user_prompt}')
-
-                tool = TerminalAccessToolImplementationProvider(
-                    container=container,
-                    error_message=None,
-                    max_num_chars_bash_output=30000,
-                    bash_timeout=180,
-                    workdir=scenario_environment_manager.repository_work_dir
-                )
-
-                client = IdeFormerClient(
-                    ideformer_host=os.environ['IDEFORMER_HOST'],
-                    ideformer_port=80,
-                    grazie_jwt_token=os.environ["IDEFORMER_JWT_TOKEN"],
-                    client_auth_type=AuthType.APPLICATION,
-                    client_auth_version=AuthVersion.V5,
-                    client_agent_name="vcs-agent",  # can be any
-                    client_agent_version="dev",  # can be any
-                )
-
-                runner = IdeFormerSimpleGrazieOneShotRunner(
-                    system_prompt=system_prompt,
-                    user_prompt=user_prompt,
-                    client=client,
-                    tools_implementation_provider=tool,
-                    profile=Profile.OPENAI_GPT_4_O_MINI.name,
-                    max_tokens_to_sample=256,
-                    temperature=1.0,
-                    max_agent_iterations=1,
-                )
-
-                await runner.arun()
-
-                # Evaluate
-                evaluator.set_scenario(scenario)
-                evaluator.set_scenario_type(scenario_type)
-
-                scenario['repository'] = repository.name
-                if evaluator.evaluate():
-                    logging.info('Yay, successfully resolved this scenario!')
-                    run_statistics['successes'][scenario_type.value]['count'] += 1
-                    run_statistics['successes'][scenario_type.value]['scenarios'].append(scenario)
-                else:
-                    logging.info('Could not resolve this scenario.')
-
-                run_statistics['totals'][scenario_type.value]['count'] += 1
-                run_statistics['totals'][scenario_type.value]['scenarios'].append(scenario)
-
-                try:
-                    scenario_environment_manager.teardown_scenario()
-                except ScenarioEnvironmentException as e:
-                    logging.error(f"Scenario cleanup failed for {scenario}: \n{e}\n"
-                                  f"Attempting to recover by removing and re-setting (incl. clone) the repository.")
-                    try:
-                        scenario_environment_manager.teardown_repository()
-                        scenario_environment_manager.setup_repository()
-                    except ScenarioEnvironmentException:
-                        logging.error(f'Could not recover for scenario: {scenario}. Continuing with the next repository.')
-                        break
-                # Limit to two scenarios
-                k += 1
-                if k> 1:
-                    break
-
-            # Limit to two scenario types
-            j += 1
-            if j > 1:
-                break
-
-        # If this raises an exception the only way out would be re-orchestrating the Docker container, or removing with force
-        # Neither of which I really want to do for now.
-        scenario_environment_manager.teardown_repository()
-
-        # Limit to two repositories
-        i += 1
-        if i > 1:
-            break
+    await container_pool.start()
+
+    scenario_scheduler = ScenarioScheduler(
+        container_pool=container_pool,
+        runner_factory=_create_runner,
+        concurrency=concurrency,
+        repository_cache=repository_cache,
+        repository_cache_path=REPOSITORY_CACHE_MOUNT_PATH,
+        # Limit to two scenario types, two scenarios each and two repositories
+        scenario_types=list(ScenarioType)[:2],
+        scenarios_per_type=2,
+        max_repositories=2,
+        # 'worktree' checks out each scenario in a fresh worktree instead of resetting the clone afterwards
+        reset_strategy=ResetStrategy(os.environ.get('SCENARIO_RESET_STRATEGY', ResetStrategy.BRANCH.value)),
+        # 'tree_oid' compares the object IDs of the trees instead of diffing them
+        evaluation_mode=EvaluationMode(os.environ.get('EVALUATION_MODE', EvaluationMode.DIFF.value)),
+    )
+    try:
+        run_statistics = await scenario_scheduler.run(git_dataset_provider)
+    finally:
+        logging.info(f'Container pool metrics: {container_pool.get_metrics()}')
+        await container_pool.close()
 
     print(run_statistics)
 
@@ -0,0 +1,349 @@
+import asyncio
+import logging
+from contextlib import ExitStack
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from docker.models.containers import Container
+
+from src.ideformer_client.data.git_dataset_provider import GitDatasetProvider
+from src.ideformer_client.data.prompt_provider import PromptProvider
+from src.ideformer_client.environment.async_exec_client import AsyncExecClient
+from src.ideformer_client.environment.container_pool import ContainerPool
+from src.ideformer_client.environment.docker_manager import DockerManager
+from src.ideformer_client.environment.evaluator import Evaluator
+from src.ideformer_client.environment.git_command_cache import GitCommandCache
+from src.ideformer_client.environment.evaluation_mode import EvaluationMode
+from src.ideformer_client.environment.reset_strategy import ResetStrategy
+from src.ideformer_client.environment.scenario_environment_manager import ScenarioEnvironmentManager
+from src.ideformer_client.environment.scenario_type import ScenarioType
+from src.ideformer_client.utils.exceptions import ScenarioEnvironmentException
+from src.repository_data_scraper.repository_cache import RepositoryCache
+from src.yt_scripts.schemas import RepositoryDataRow
+
+# A scenario to solve: the repository it stems from, its type and the scenario itself
+WorkItem = Tuple[RepositoryDataRow, ScenarioType, dict]
+
+
+def create_scenario_dict():
+    """
+    Helper function for creating a dictionary to store run statistics on a ScenarioType granularity.
+
+    Returns:
+        dict: A dictionary mapping each ScenarioType to a data structure
+        containing a count and a list of scenarios.
+    """
+    return {scenario_type.value: {'count': 0, 'scenarios': []} for scenario_type in ScenarioType}
+
+
+class _ContainerSlot:
+    """
+    A container of the pool together with the repository that is currently set up in it.
+    """
+
+    def __init__(self, docker_manager: DockerManager, container: Container):
+        self.docker_manager = docker_manager
+        self.container = container
+        self.repository_name: Optional[str] = None
+        self.scenario_environment_manager: Optional[ScenarioEnvironmentManager] = None
+        self.evaluator: Optional[Evaluator] = None
+        # Whether the repository could neither be reset nor cloned again, thus the container needs to be replaced
+        self.is_broken = False
+        # Keeps the mirror of the repository in use, as the clone borrows its objects
+        self.mirror_context: Optional[ExitStack] = None
+
+
+class ScenarioScheduler:
+    """
+    Solves scenarios concurrently in containers of a ContainerPool.
+
+    The scenarios of the dataset are dispatched as work items to the first free container. Each container keeps the
+    repository it cloned last, such that consecutive scenarios of the same repository only need their preconditions
+    set up, while the scenarios of a large repository are still spread over all free containers. The blocking Docker
+    and git calls run in the executor shared with the AsyncExecClient of the agents, thus the agents of all containers
+    run concurrently within the event loop.
+    """
+
+    def __init__(self,
+                 container_pool: ContainerPool,
+                 runner_factory: Callable[[str, str, Container, str], Any],
+                 concurrency: int = 1,
+                 repository_cache: Optional[RepositoryCache] = None,
+                 repository_cache_path: Optional[str] = None,
+                 scenario_types: Optional[List[ScenarioType]] = None,
+                 scenarios_per_type: Optional[int] = None,
+                 max_repositories: Optional[int] = None,
+                 reset_strategy: ResetStrategy = ResetStrategy.BRANCH,
+                 evaluation_mode: EvaluationMode = EvaluationMode.DIFF):
+        """
+        Args:
+            container_pool (ContainerPool): The started pool to acquire the containers from. Broken containers are
+                replaced via the pool, all containers are released to it once the run is finished.
+            runner_factory (Callable[[str, str, Container, str], Any]): Creates the agent for a scenario from the
+                system prompt, the user prompt, the container and the repository working directory within it. The
+                agent is run via its `arun()` coroutine.
+            concurrency (int): The amount of containers to solve scenarios in concurrently.
+            repository_cache (Optional[RepositoryCache]): If given, the containers clone the repositories from their
+                mirrors, which serve as snapshots. Each mirror is refreshed before the first clone and protected from
+                eviction as long as a clone of it is set up.
+            repository_cache_path (Optional[str]): The path within the containers at which the directory of
+                repository_cache is mounted.
+            scenario_types (Optional[List[ScenarioType]]): The scenario types to solve, all if None.
+            scenarios_per_type (Optional[int]): The maximum amount of scenarios to solve per repository and
+                scenario type, all if None.
+            max_repositories (Optional[int]): The maximum amount of repositories to solve scenarios of, all if None.
+            reset_strategy (ResetStrategy): How the containers set up each scenario and reset the repository
+                afterwards.
+            evaluation_mode (EvaluationMode): How the evaluators compare the agent branch to the ground truth.
+        """
+        if concurrency < 1:
+            raise ValueError(f'The scheduler needs at least one container, got concurrency={concurrency}.')
+
+        self.container_pool = container_pool
+        self.runner_factory = runner_factory
+        self.concurrency = concurrency
+        self.repository_cache = repository_cache
+        self.repository_cache_path = repository_cache_path
+        self.scenario_types = list(ScenarioType) if scenario_types is None else scenario_types
+        self.scenarios_per_type = scenarios_per_type
+        self.max_repositories = max_repositories
+        self.reset_strategy = reset_strategy
+        self.evaluation_mode = evaluation_mode
+
+        self.run_statistics = {'successes': create_scenario_dict(), 'totals': create_scenario_dict()}
+        self._statistics_lock = asyncio.Lock()
+
+    async def run(self, git_dataset_provider: GitDatasetProvider) -> dict:
+        """
+        Acquires the containers and solves the scenarios of all repositories streamed by git_dataset_provider.
+
+        Args:
+            git_dataset_provider (GitDatasetProvider): The provider of the repositories and their scenarios.
+
+        Returns:
+            dict: The run statistics, holding the count and the scenarios of all 'successes' and 'totals' per
+                scenario type.
+        """
+        self.run_statistics = {'successes': create_scenario_dict(), 'totals': create_scenario_dict()}
+        slots = await self._start_containers()
+
+        # Bounded, such that repositories are only read from the dataset once a container is about to be free
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency)
+        workers = [asyncio.create_task(self._work(slot, queue)) for slot in slots]
+        try:
+            await self._dispatch(git_dataset_provider, queue)
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        finally:
+            for worker in workers:
+                worker.cancel()
+
+            await asyncio.gather(*(AsyncExecClient.run_blocking(self._teardown_repository, slot) for slot in slots))
+            await asyncio.gather(*(self.container_pool.release(slot.docker_manager) for slot in slots
+                                   if slot.docker_manager is not None))
+        return self.run_statistics
+
+    async def _start_containers(self) -> List[_ContainerSlot]:
+        docker_managers = await asyncio.gather(*(self.container_pool.acquire() for _ in range(self.concurrency)))
+        return [_ContainerSlot(docker_manager, docker_manager.container) for docker_manager in docker_managers]
+
+    async def _replace_container(self, slot: _ContainerSlot):
+        """
+        Releases the broken container of slot to the pool, which removes it, and acquires a new one instead.
+        """
+        await self.container_pool.release(slot.docker_manager, healthy=False)
+        slot.docker_manager = await self.container_pool.acquire()
+        slot.container = slot.docker_manager.container
+        slot.is_broken = False
+
+    async def _dispatch(self, git_dataset_provider: GitDatasetProvider, queue: asyncio.Queue):
+        """
+        Puts the scenarios of each repository into the queue, one repository after another.
+        """
+        repositories = git_dataset_provider.stream_repositories()
+        amount_of_repositories = 0
+        while self.max_repositories is None or amount_of_repositories < self.max_repositories:
+            # Reading the next repository may block on the dataset backend, e.g. on a YTsaurus read
+            repository = await asyncio.to_thread(next, repositories, None)
+            if repository is None:
+                break
+
+            for scenario_type in self.scenario_types:
+                for scenario in git_dataset_provider.iter_scenarios_for(scenario_type=scenario_type,
+                                                                        limit=self.scenarios_per_type):
+                    await queue.put((repository, scenario_type, scenario))
+            amount_of_repositories += 1
+
+    async def _work(self, slot: _ContainerSlot, queue: asyncio.Queue):
+        while True:
+            work_item = await queue.get()
+            if work_item is None:
+                return
+
+            repository, scenario_type, scenario = work_item
+            if slot.docker_manager is None:
+                continue
+            try:
+                await self._solve(slot, repository, scenario_type, scenario)
+            except Exception as e:
+                # A failing scenario must not stop the worker, otherwise the dispatch would wait for it forever
+                logging.exception(f'Could not solve scenario {scenario} of type {scenario_type} in repository '
+                                  f'{repository.name}: {e}')
+
+            if slot.is_broken:
+                try:
+                    await self._replace_container(slot)
+                except RuntimeError as e:
+                    # The worker keeps taking work items, such that the dispatch does not wait for it forever
+                    logging.error(f'Could not replace container, skipping the scenarios assigned to it: {e}')
+                    slot.docker_manager = None
+
+    async def _solve(self, slot: _ContainerSlot, repository: RepositoryDataRow, scenario_type: ScenarioType,
+                     scenario: dict):
+        if slot.repository_name != repository.name:
+            await AsyncExecClient.run_blocking(self._setup_repository, slot, repository)
+        if slot.scenario_environment_manager is None:
+            logging.error(f'Skipping scenario {scenario}, repository {repository.name} is not set up.')
+            return
+
+        user_prompt = await AsyncExecClient.run_blocking(self._setup_scenario, slot, repository, scenario_type, scenario)
+        if user_prompt is None:
+            return
+
+        is_success = False
+        try:
+            runner = self.runner_factory(PromptProvider.get_system_prompt(), user_prompt, slot.container,
+                                         slot.scenario_environment_manager.repository_work_dir)
+            await runner.arun()
+            scenario['command_cache'] = GitCommandCache.for_container(slot.container).get_metrics()
+            logging.info(f'Command cache of the scenario: {scenario["command_cache"]}')
+
+            slot.evaluator.set_scenario(scenario)
+            slot.evaluator.set_scenario_type(scenario_type)
+            is_success = await AsyncExecClient.run_blocking(slot.evaluator.evaluate)
+        finally:
+            # A scenario whose agent or evaluation fails counts as unsuccessful, and the repository is reset either way,
+            # such that the next scenario of the slot does not start from the state the agent left behind
+            scenario['repository'] = repository.name
+            async with self._statistics_lock:
+                if is_success:
+                    logging.info('Yay, successfully resolved this scenario!')
+                    self.run_statistics['successes'][scenario_type.value]['count'] += 1
+                    self.run_statistics['successes'][scenario_type.value]['scenarios'].append(scenario)
+                else:
+                    logging.info('Could not resolve this scenario.')
+
+                self.run_statistics['totals'][scenario_type.value]['count'] += 1
+                self.run_statistics['totals'][scenario_type.value]['scenarios'].append(scenario)
+
+            await AsyncExecClient.run_blocking(self._teardown_scenario, slot, scenario)
+
+    def _setup_repository(self, slot: _ContainerSlot, repository: RepositoryDataRow):
+        """
+        Replaces the repository set up in the container of slot by the given repository. If the setup fails, the
+        scenario environment manager of slot is None and the remaining scenarios of the repository are skipped.
+        """
+        self._teardown_repository(slot)
+        slot.repository_name = repository.name
+
+        mirror_context = ExitStack()
+        try:
+            scenario_environment_manager = ScenarioEnvironmentManager(
+                container=slot.container,
+                repository=repository,
+                repository_cache_path=self.repository_cache_path if self.repository_cache is not None else None,
+                reset_strategy=self.reset_strategy,
+            )
+            if self.repository_cache is not None:
+                mirror_context.enter_context(self.repository_cache.use(repository.name))
+            scenario_environment_manager.setup_repository()
+        except ScenarioEnvironmentException as e:
+            mirror_context.close()
+            logging.error(f"Skipping repository {repository.name}: \n{e}")
+            return
+        except ValueError as e:
+            mirror_context.close()
+            logging.error(f"Skipping repository {repository.name}. Could not set repository working directory: \n{e}")
+            return
+        except Exception:
+            mirror_context.close()
+            raise
+
+        slot.mirror_context = mirror_context
+
+        slot.scenario_environment_manager = scenario_environment_manager
+        slot.evaluator = Evaluator(container=slot.container,
+                                   agent_target_branch_name=scenario_environment_manager.AGENT_TARGET_BRANCH_NAME,
+                                   repository_work_dir=scenario_environment_manager.repository_work_dir,
+                                   evaluation_mode=self.evaluation_mode)
+
+    def _setup_scenario(self, slot: _ContainerSlot, repository: RepositoryDataRow, scenario_type: ScenarioType,
+                        scenario: dict) -> Optional[str]:
+        """
+        Sets up the preconditions of the scenario in the container of slot.
+
+        Returns:
+            Optional[str]: The user prompt for the scenario, None if the preconditions could not be set up.
+        """
+        scenario_environment_manager = slot.scenario_environment_manager
+        try:
+            scenario_environment_manager.set_scenario(scenario)
+            scenario_environment_manager.set_scenario_type(scenario_type)
+            scenario_environment_manager.setup_scenario_preconditions()
+        except ScenarioEnvironmentException as e:
+            logging.error(f"Skipping scenario {repository} due to precondition setup error: \n{e}")
+            self._teardown_scenario(slot, scenario)
+            return None
+
+        try:
+            scenario_context = scenario_environment_manager.provide_scenario_context()
+            scenario_context['programming_language'] = repository.programming_language
+            user_prompt = PromptProvider.get_prompt_for(scenario_type, scenario, context=scenario_context,
+                                                        agent_target_branch_name=ScenarioEnvironmentManager.AGENT_TARGET_BRANCH_NAME)
+        except ScenarioEnvironmentException as e:
+            logging.error(f"Could not fetch scenario context for repository {repository.name}, scenario type "
+                          f"{scenario_type} and\nscenario{scenario}:\n{e}\n"
+                          'Proceeding without context.')
+            user_prompt = PromptProvider.get_prompt_for(scenario_type, scenario, context=None,
+                                                        agent_target_branch_name=ScenarioEnvironmentManager.AGENT_TARGET_BRANCH_NAME)
+
+        logging.debug(f'Current scenario is given by:\nRepository: {repository.name}\nScenario type: {scenario_type}'
+                      f'\nScenario: {scenario}\nUser prompt: {user_prompt}')
+        return user_prompt
+
+    @staticmethod
+    def _teardown_scenario(slot: _ContainerSlot, scenario: dict):
+        """
+        Resets the repository in the container of slot. If that fails, the repository is cloned again, which resets
+        it to its snapshot if a repository cache is used. If that fails as well, the remaining scenarios of the
+        repository are skipped and the container is replaced.
+        """
+        scenario_environment_manager = slot.scenario_environment_manager
+        try:
+            scenario_environment_manager.teardown_scenario()
+        except ScenarioEnvironmentException as e:
+            logging.error(f"Scenario cleanup failed for {scenario}: \n{e}\n"
+                          f"Attempting to recover by removing and re-setting (incl. clone) the repository.")
+            try:
+                scenario_environment_manager.teardown_repository()
+                scenario_environment_manager.setup_repository()
+            except ScenarioEnvironmentException:
+                logging.error(f'Could not recover for scenario: {scenario}. Continuing with the next repository.')
+                slot.scenario_environment_manager = None
+                slot.evaluator = None
+                slot.is_broken = True
+
+    @staticmethod
+    def _teardown_repository(slot: _ContainerSlot):
+        if slot.scenario_environment_manager is not None:
+            try:
+                slot.scenario_environment_manager.teardown_repository()
+            except ScenarioEnvironmentException as e:
+                # The next repository is cloned into its own directory, thus the container can still be used
+                logging.error(f'Could not remove repository {slot.repository_name} from the container: \n{e}')
+            slot.scenario_environment_manager = None
+            slot.evaluator = None
+
+        if slot.mirror_context is not None:
+            slot.mirror_context.close()
+            slot.mirror_context = None
@@ -0,0 +1,8 @@
+from enum import Enum
+
+
+class CherryPickDetection(Enum):
+    # Only commits with identical messages are compared by their patch ids
+    COMMIT_MESSAGE = 'commit_message'
+    # All commits with changes in the programming language are grouped by their patch ids, regardless of their message
+    PATCH_ID = 'patch_id'
@@ -0,0 +1,110 @@
+import subprocess
+from enum import Enum
+from typing import Optional
+
+from git import Repo
+
+
+class CloneStrategy(Enum):
+    """
+    How a repository is cloned for scraping. Scraping only reads commits and trees, blobs are solely needed to compute
+    patch ids for cherry-pick detection.
+    """
+    # Regular clone with a checked out working tree
+    FULL = 'full'
+    # Clone all objects, but do not check out a working tree
+    NO_CHECKOUT = 'no_checkout'
+    # Bare clone. Its branches are laid out like those of a regular clone, see track_remote_branches
+    BARE = 'bare'
+    # Bare partial clone without blobs. Blobs are fetched on demand, in batches for patch id computation. Note that
+    # inexact rename detection while streaming the history still fetches the compared blobs individually
+    BLOBLESS = 'blobless'
+    # Bare partial clone without trees and blobs. git fetches each tree lazily once it is needed, which is only
+    # sensible for repositories with short histories
+    TREELESS = 'treeless'
+
+
+_CLONE_OPTIONS = {
+    CloneStrategy.FULL: {},
+    CloneStrategy.NO_CHECKOUT: {'no_checkout': True},
+    CloneStrategy.BARE: {'bare': True},
+    CloneStrategy.BLOBLESS: {'bare': True, 'filter': 'blob:none'},
+    CloneStrategy.TREELESS: {'bare': True, 'filter': 'tree:0'},
+}
+
+
+def clone_repository(url: str, path: str, clone_strategy: CloneStrategy = CloneStrategy.FULL) -> Repo:
+    """
+    Clones a repository with the given clone strategy.
+
+    Args:
+        url (str): The URL of the repository, e.g. https://github.com/<name>.git or file://<path>.
+        path (str): The path to clone the repository to.
+        clone_strategy (CloneStrategy): How to clone the repository.
+
+    Raises:
+        GitCommandError: If cloning fails, e.g. because path already exists.
+
+    Returns:
+        Repo: The cloned repository.
+    """
+    repository = Repo.clone_from(url, path, **_CLONE_OPTIONS[clone_strategy])
+    if repository.bare:
+        track_remote_branches(repository)
+    return repository
+
+
+def track_remote_branches(repository: Repo):
+    """
+    Lays out the branches of a bare clone like those of a regular clone, such that scraping either yields the same
+    scenarios: the branches of the remote become remote branches 'origin/<branch>', only the default branch is kept as
+    a local branch as well. Bare clones copy all branches of the remote to local branches instead. Fetching updates
+    the remote branches afterwards.
+
+    Args:
+        repository (Repo): The bare clone.
+    """
+    default_branch = repository.git.symbolic_ref('HEAD')
+    commands = []
+    for line in repository.git.for_each_ref('refs/heads', format='%(objectname) %(refname)').splitlines():
+        hexsha, ref = line.split(' ', 1)
+        commands.append(f'create refs/remotes/origin/{ref[len("refs/heads/"):]} {hexsha}')
+        if ref != default_branch:
+            commands.append(f'delete {ref} {hexsha}')
+    # Moves all refs in one transaction
+    subprocess.run(['git', '--git-dir', repository.git_dir, 'update-ref', '--stdin'],
+                   input=''.join(f'{command}\n' for command in commands), text=True, capture_output=True, check=True)
+
+    with repository.config_writer() as config_writer:
+        config_writer.set_value('remote "origin"', 'fetch', '+refs/heads/*:refs/remotes/origin/*')
+
+
+def update_default_branch(repository: Repo):
+    """
+    Moves the local default branch of a bare clone laid out by track_remote_branches to its remote branch, e.g. after
+    fetching, like `git pull` would in a regular clone.
+
+    Args:
+        repository (Repo): The bare clone.
+    """
+    default_branch = repository.git.symbolic_ref('HEAD')
+    remote_branch = f'refs/remotes/origin/{default_branch[len("refs/heads/"):]}'
+    if repository.git.for_each_ref(remote_branch):
+        repository.git.update_ref(default_branch, remote_branch)
+
+
+def get_promisor_remote(repository: Repo) -> Optional[str]:
+    """
+    Returns the remote missing objects of a partial clone are fetched from.
+
+    Args:
+        repository (Repo): The repository.
+
+    Returns:
+        Optional[str]: The name of the promisor remote, or None if the repository is not a partial clone.
+    """
+    config_reader = repository.config_reader()
+    for remote in repository.remotes:
+        if config_reader.get_value(f'remote "{remote.name}"', 'promisor', default=False):
+            return remote.name
+    return None
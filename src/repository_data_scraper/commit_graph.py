@@ -0,0 +1,324 @@
+import hashlib
+import re
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.repository_data_scraper.commit_stream import CommitRecord
+from src.repository_data_scraper.programming_language import ProgrammingLanguage
+
+
+class Bitset:
+    """
+    Set of dense non-negative integers backed by a bytearray, ie. one bit per possible member.
+    """
+
+    def __init__(self, size: int = 0):
+        self._bits = bytearray((size + 7) // 8)
+
+    def add(self, item: int):
+        self._grow_to(item)
+        self._bits[item >> 3] |= 1 << (item & 7)
+
+    def discard(self, item: int):
+        if (item >> 3) < len(self._bits):
+            self._bits[item >> 3] &= ~(1 << (item & 7)) & 0xFF
+
+    def __contains__(self, item: int) -> bool:
+        return (item >> 3) < len(self._bits) and bool(self._bits[item >> 3] & (1 << (item & 7)))
+
+    def __len__(self) -> int:
+        return sum(bin(byte).count('1') for byte in self._bits)
+
+    def __iter__(self):
+        for byte_index, byte in enumerate(self._bits):
+            if byte:
+                for bit in range(8):
+                    if byte & (1 << bit):
+                        yield (byte_index << 3) | bit
+
+    def _grow_to(self, item: int):
+        if (item >> 3) >= len(self._bits):
+            self._bits.extend(bytes((item >> 3) + 1 - len(self._bits)))
+
+
+class CommitGraph:
+    """
+    Compact, integer-indexed representation of a repository's commit history, tailored to RepositoryDataScraper.
+
+    Every commit hash is mapped to a dense integer id. Instead of keeping CommitRecords (or GitPython Commit objects)
+    alive, the graph stores per-commit data in flat arrays indexed by id:
+        - The binary commit hash (20 bytes), from which the hexsha is only materialised on demand
+        - The parents as ids, in array-backed adjacency lists
+        - The committer timestamp
+        - The changes to files of the programming language, as interned file ids, if their change type is valid
+        - Whether the commit changes anything at all, or anything of the programming language
+        - A message group id shared by all commits with an identical message (only for commits with changes in the
+            programming language, since only those are considered for duplicate message cherry-pick mining)
+        - The commit referenced by the cherry-pick -x note in the message, if present
+
+    Commits can be referenced (as parents) before they are added. Such commits receive an id right away, but remain
+    unloaded until their record is added. Commits whose parents are missing from the history, e.g. at the boundary of a
+    shallow clone, thus remain unloaded.
+    """
+
+    # Conflicts in merges are indicated by this combined change type
+    CONFLICT_CHANGE_TYPE = 'MM'
+
+    # The owner of commits not reachable from any of the roots passed to assign_owners
+    NO_OWNER = 2 ** 32 - 1
+
+    _LOADED = 1
+    _HAS_CHANGES = 2
+    _HAS_CHANGES_IN_PROGRAMMING_LANGUAGE = 4
+
+    def __init__(self, programming_language: ProgrammingLanguage, valid_change_types: Iterable[str]):
+        self.programming_language = programming_language
+        self.valid_change_types = set(valid_change_types)
+
+        self._ids: Dict[bytes, int] = {}
+        self._hexshas = bytearray()
+
+        self._flags = bytearray()
+        self._committed_dates = array('q')
+        self._message_groups = array('i')
+
+        # Adjacency lists: the parents of commit i are _parent_ids[_parent_starts[i]:_parent_starts[i] + _parent_counts[i]]
+        self._parent_starts = array('I')
+        self._parent_counts = array('H')
+        self._parent_ids = array('I')
+
+        # Same layout as the parents. Each change is encoded as (file id << 1) | is_conflict
+        self._change_starts = array('I')
+        self._change_counts = array('I')
+        self._changes = array('I')
+
+        self._file_ids: Dict[str, int] = {}
+        self._files: List[str] = []
+
+        self._message_group_ids: Dict[bytes, int] = {}
+        self._message_digests: List[bytes] = []
+        self._cherry_commits: Dict[int, str] = {}
+
+        # Based on the string appended to the commit message by the -x option in git cherry-pick
+        self._cherry_pick_pattern = re.compile(r'(?<=cherry picked from commit )[a-z0-9]{40}')
+
+    @classmethod
+    def from_commit_records(cls, commit_records: Iterable[CommitRecord], programming_language: ProgrammingLanguage,
+                            valid_change_types: Iterable[str]) -> 'CommitGraph':
+        """
+        Builds a graph from (streamed) commit records. The records are not kept alive.
+
+        Args:
+            commit_records (Iterable[CommitRecord]): The commits to add.
+            programming_language (ProgrammingLanguage): Changes to files of other programming languages are dropped.
+            valid_change_types (Iterable[str]): Changes of other change types are dropped.
+
+        Returns:
+            CommitGraph: The graph containing all given commits.
+        """
+        commit_graph = cls(programming_language, valid_change_types)
+        for commit_record in commit_records:
+            commit_graph.add(commit_record)
+        return commit_graph
+
+    def __len__(self) -> int:
+        return len(self._flags)
+
+    def __contains__(self, hexsha: str) -> bool:
+        return bytes.fromhex(hexsha) in self._ids
+
+    def add(self, commit_record: CommitRecord) -> int:
+        """
+        Adds a commit to the graph, or loads it if it was only referenced as a parent so far.
+
+        Args:
+            commit_record (CommitRecord): The commit to add.
+
+        Returns:
+            int: The id of the commit.
+        """
+        commit_id = self._get_or_create_id(commit_record.hexsha)
+
+        self._parent_starts[commit_id] = len(self._parent_ids)
+        self._parent_counts[commit_id] = len(commit_record.parents)
+        self._parent_ids.extend(self._get_or_create_id(parent) for parent in commit_record.parents)
+
+        self._committed_dates[commit_id] = commit_record.committed_date
+
+        flags = self._LOADED
+        if commit_record.changes:
+            flags |= self._HAS_CHANGES
+        # Each line represents one file that was changed. This means each line contains the change type and
+        # relative filepath. Thus, it is safe to simply search the line for the file ending.
+        if any(self.programming_language.value in change for change in commit_record.changes):
+            flags |= self._HAS_CHANGES_IN_PROGRAMMING_LANGUAGE
+            self._message_groups[commit_id] = self._get_or_create_message_group(commit_record.message)
+        self._flags[commit_id] = flags
+
+        self._change_starts[commit_id] = len(self._changes)
+        for change in commit_record.changes:
+            changes_to_unpack = change.split('\t')
+
+            # Only keep valid change_types, which always affect exactly one file
+            if changes_to_unpack[0] not in self.valid_change_types:
+                continue
+
+            change_type, file = changes_to_unpack
+            if self.programming_language.value not in file:
+                continue
+
+            self._changes.append((self._get_or_create_file_id(file) << 1)
+                                 | (change_type == self.CONFLICT_CHANGE_TYPE))
+        self._change_counts[commit_id] = len(self._changes) - self._change_starts[commit_id]
+
+        potential_cherry_pick_match = self._cherry_pick_pattern.search(commit_record.message)
+        if potential_cherry_pick_match:
+            self._cherry_commits[commit_id] = potential_cherry_pick_match[0]
+
+        return commit_id
+
+    def reference(self, hexsha: str) -> int:
+        """
+        Returns the id of a commit, assigning a new id to the commit if it is unknown to the graph. Like a parent
+        referenced before it is added, the commit remains unloaded until its record is added.
+
+        Args:
+            hexsha (str): The hash of the commit.
+
+        Returns:
+            int: The id of the commit.
+        """
+        return self._get_or_create_id(hexsha)
+
+    def id_of(self, hexsha: str) -> int:
+        """
+        Raises:
+            KeyError: If the commit is unknown to the graph.
+
+        Returns:
+            int: The id of the commit with the given hash.
+        """
+        return self._ids[bytes.fromhex(hexsha)]
+
+    def hexsha(self, commit_id: int) -> str:
+        return self._hexshas[commit_id * 20:(commit_id + 1) * 20].hex()
+
+    def is_loaded(self, commit_id: int) -> bool:
+        """
+        Returns:
+            bool: False if the commit was only referenced as a parent, but never added.
+        """
+        return bool(self._flags[commit_id] & self._LOADED)
+
+    def parents(self, commit_id: int) -> array:
+        start = self._parent_starts[commit_id]
+        return self._parent_ids[start:start + self._parent_counts[commit_id]]
+
+    def parent_hexshas(self, commit_id: int) -> List[str]:
+        return [self.hexsha(parent_id) for parent_id in self.parents(commit_id)]
+
+    def committed_date(self, commit_id: int) -> int:
+        return self._committed_dates[commit_id]
+
+    def has_changes(self, commit_id: int) -> bool:
+        return bool(self._flags[commit_id] & self._HAS_CHANGES)
+
+    def has_changes_in_programming_language(self, commit_id: int) -> bool:
+        """
+        Returns:
+            bool: True if any change in the commit, regardless of the change type, touches a file of the
+                programming language.
+        """
+        return bool(self._flags[commit_id] & self._HAS_CHANGES_IN_PROGRAMMING_LANGUAGE)
+
+    def changed_files(self, commit_id: int) -> List[Tuple[str, bool]]:
+        """
+        Returns:
+            List[Tuple[str, bool]]: The files of the programming language changed with a valid change type, each with
+                a flag indicating whether the change was a conflict resolution in a merge.
+        """
+        start = self._change_starts[commit_id]
+        return [(self._files[change >> 1], bool(change & 1))
+                for change in self._changes[start:start + self._change_counts[commit_id]]]
+
+    def message_group(self, commit_id: int) -> int:
+        """
+        Returns:
+            int: An id shared by all commits with the same message, or -1 if the commit has no changes in the
+                programming language.
+        """
+        return self._message_groups[commit_id]
+
+    def message_digest(self, message_group: int) -> bytes:
+        """
+        Returns:
+            bytes: The digest of the message shared by all commits of the message group. Unlike the message group id,
+                the digest is stable across graphs.
+        """
+        return self._message_digests[message_group]
+
+    def cherry_commit(self, commit_id: int) -> Optional[str]:
+        """
+        Returns:
+            Optional[str]: The hash of the commit this commit was cherry-picked from, if the message contains a note
+                generated by the -x option of git cherry-pick.
+        """
+        return self._cherry_commits.get(commit_id)
+
+    def assign_owners(self, roots: List[int]) -> array:
+        """
+        Assigns each commit to the first root it is reachable from, ie. each root owns its history up to the merge
+        bases with the histories of the previous roots. Unloaded commits are never owned and not traversed.
+
+        Args:
+            roots (List[int]): The ids of the commits to start from, e.g. the branch HEADs in the order of a scrape.
+
+        Returns:
+            array: The index of the owning root in roots per commit id, NO_OWNER for commits not reachable from any
+                root.
+        """
+        owners = array('I', [self.NO_OWNER]) * len(self)
+        for root_index, root in enumerate(roots):
+            stack = [root]
+            while stack:
+                commit_id = stack.pop()
+                if owners[commit_id] != self.NO_OWNER or not self.is_loaded(commit_id):
+                    continue
+                owners[commit_id] = root_index
+                stack.extend(self.parents(commit_id))
+        return owners
+
+    def _get_or_create_id(self, hexsha: str) -> int:
+        binary_sha = bytes.fromhex(hexsha)
+        commit_id = self._ids.get(binary_sha)
+        if commit_id is None:
+            commit_id = len(self._flags)
+            self._ids[binary_sha] = commit_id
+            self._hexshas += binary_sha
+
+            self._flags.append(0)
+            self._committed_dates.append(0)
+            self._message_groups.append(-1)
+            self._parent_starts.append(0)
+            self._parent_counts.append(0)
+            self._change_starts.append(0)
+            self._change_counts.append(0)
+        return commit_id
+
+    def _get_or_create_file_id(self, file: str) -> int:
+        file_id = self._file_ids.get(file)
+        if file_id is None:
+            file_id = len(self._files)
+            self._file_ids[file] = file_id
+            self._files.append(file)
+        return file_id
+
+    def _get_or_create_message_group(self, message: str) -> int:
+        # Messages are only kept as digests, equal messages yield equal digests
+        digest = hashlib.blake2b(message.encode('utf-8', errors='replace'), digest_size=16).digest()
+        message_group = self._message_group_ids.get(digest)
+        if message_group is None:
+            message_group = len(self._message_group_ids)
+            self._message_group_ids[digest] = message_group
+            self._message_digests.append(digest)
+        return message_group
@@ -0,0 +1,120 @@
+import subprocess
+from dataclasses import dataclass, field
+from typing import Generator, Iterable, List
+
+from git import Repo, GitCommandError
+
+
+@dataclass
+class CommitRecord:
+    """
+    Lightweight representation of a commit as parsed from the output of `git log`.
+
+    The changes are formatted like the name-status lines of `git show`, ie. the change type followed by the
+    affected file(s), separated by tabs. Merge commits carry combined change types (e.g. MM).
+    """
+    hexsha: str
+    parents: List[str]
+    committed_date: int
+    message: str
+    changes: List[str] = field(default_factory=list)
+
+
+# Every commit starts with \x01 followed by NUL separated fields, see _parse_commit_record
+_COMMIT_START = b'\x01'
+_LOG_FORMAT = '%x01%H%x00%P%x00%ct%x00%B'
+_READ_CHUNK_SIZE = 1024 ** 2
+
+
+def stream_commit_records(repository: Repo, revisions: Iterable[str]) -> Generator[CommitRecord, None, None]:
+    """
+    Streams all commits reachable from the given revisions out of a single `git log` process.
+
+    Runs `git log --stdin -z --cc --name-status` once for the whole repository instead of one `git show` per commit.
+    The revisions are passed via stdin, which also allows exclusions such as '^<sha>'. The output is read in chunks
+    and each commit is yielded as soon as it has been parsed completely, such that the history never has to be held
+    in memory as text.
+
+    Args:
+        repository (Repo): The repository to read the commits from.
+        revisions (Iterable[str]): Revisions (usually branch head commit hashes) to start the traversal from.
+
+    Raises:
+        GitCommandError: If `git log` exits with a non-zero exit code.
+
+    Yields:
+        CommitRecord: One record per commit reachable from the given revisions.
+    """
+    command = ['git', '--git-dir', repository.git_dir, 'log', '--stdin', '-z', '--cc', '--name-status',
+               '--no-color', f'--format={_LOG_FORMAT}']
+    process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    # git log reads stdin to EOF before it starts writing, thus writing all revisions first cannot deadlock
+    process.stdin.write(''.join(f'{revision}\n' for revision in revisions).encode('utf-8'))
+    process.stdin.close()
+
+    try:
+        remainder = b''
+        for chunk in iter(lambda: process.stdout.read(_READ_CHUNK_SIZE), b''):
+            raw_commits = (remainder + chunk).split(_COMMIT_START)
+            # The last item might be incomplete, keep it until the next chunk (or EOF) arrives
+            remainder = raw_commits.pop()
+            for raw_commit in raw_commits:
+                if raw_commit:
+                    yield _parse_commit_record(raw_commit)
+        if remainder:
+            yield _parse_commit_record(remainder)
+    finally:
+        process.stdout.close()
+        stderr = process.stderr.read()
+        process.stderr.close()
+        return_code = process.wait()
+
+    if return_code != 0:
+        raise GitCommandError(command, return_code, stderr)
+
+
+def _parse_commit_record(raw_commit: bytes) -> CommitRecord:
+    """
+    Parses a single commit from the `git log -z` output.
+
+    The raw commit consists of the NUL separated fields hash, parents, committer timestamp and message, followed
+    by the NUL separated name-status tokens.
+
+    Args:
+        raw_commit (bytes): The output of git log for a single commit, without the leading commit start marker.
+
+    Returns:
+        CommitRecord: The parsed commit.
+    """
+    hexsha, parents, committed_date, message, *tokens = raw_commit.decode('utf-8', errors='replace').split('\0')
+
+    # git separates the format from the name-status output with a newline for regular commits
+    changes = parse_name_status([token.lstrip('\n') for token in tokens])
+
+    return CommitRecord(hexsha=hexsha, parents=parents.split(), committed_date=int(committed_date), message=message,
+                        changes=changes)
+
+
+def parse_name_status(tokens: List[str]) -> List[str]:
+    """
+    Joins the NUL separated tokens of `--name-status -z` output into name-status lines as printed by `git show`.
+
+    Every change type token is followed by one path, or two paths for renames and copies. Empty tokens are ignored.
+
+    Args:
+        tokens (List[str]): The name-status output split at NUL characters.
+
+    Returns:
+        List[str]: One tab separated line per change, starting with the change type.
+    """
+    tokens = [token for token in tokens if token]
+
+    changes = []
+    i = 0
+    while i < len(tokens):
+        change_type = tokens[i]
+        amount_of_paths = 2 if change_type[0] in 'RC' and change_type[1:].isdigit() else 1
+        changes.append('\t'.join(tokens[i:i + 1 + amount_of_paths]))
+        i += 1 + amount_of_paths
+    return changes
@@ -0,0 +1,264 @@
+import subprocess
+import threading
+import uuid
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from git import Repo
+
+from src.repository_data_scraper.clone_strategy import get_promisor_remote
+from src.repository_data_scraper.commit_stream import CommitRecord, parse_name_status
+
+
+class GitBatchWorker:
+    """
+    Long-lived helper answering per-commit queries over the pipes of persistent git processes.
+
+    Wraps `git diff-tree --stdin` for name-status change lists and `git cat-file --batch`. Each query is a single
+    write and read on an already running process, instead of a fork and exec of git per commit. The processes are
+    started lazily on first use and stay alive until close() is called. Use the worker as a context manager to ensure
+    the processes are cleaned up.
+
+    diff-tree echoes lines that are not commit hashes verbatim and flushes its output afterwards. We exploit this by
+    writing a unique sentinel after each commit hash and reading until the sentinel is echoed back.
+
+    In partial clones (see CloneStrategy), the blobs needed to compute patch ids are fetched from the promisor remote
+    in a single batch, instead of letting git fetch each missing blob individually.
+    """
+
+    def __init__(self, repository: Repo):
+        self.repository = repository
+
+        # Diff lines never start with '#', thus the sentinel cannot be confused with the actual output
+        self._sentinel = f'#end-of-response-{uuid.uuid4().hex}\n'.encode('utf-8')
+
+        self._name_status_process: Optional[subprocess.Popen] = None
+        self._cat_file_process: Optional[subprocess.Popen] = None
+
+        self._promisor_remote = get_promisor_remote(repository)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """
+        Terminates all git processes started by this worker. The worker can still be used afterwards, in which case
+        the processes are started again.
+        """
+        for process in [self._name_status_process, self._cat_file_process]:
+            if process is not None and process.poll() is None:
+                process.stdin.close()
+                process.wait()
+                process.stdout.close()
+
+        self._name_status_process = None
+        self._cat_file_process = None
+
+    def get_changes_in_commit(self, hexsha: str) -> List[str]:
+        """
+        Returns the changes in a commit in the same format as CommitRecord.changes, ie. the name-status lines of
+        `git show`. Merge commits yield combined change types (e.g. MM), like `git show` does.
+
+        Args:
+            hexsha (str): The hash of the commit.
+
+        Returns:
+            List[str]: A list of strings representing the changes in the given commit.
+        """
+        if self._name_status_process is None:
+            self._name_status_process = self._start_process(
+                ['diff-tree', '--stdin', '-z', '-r', '-M', '--root', '--cc', '--name-status', '--no-color'])
+
+        response = self._request_diff_tree(self._name_status_process, hexsha)
+
+        # The first token is the echoed commit hash
+        return parse_name_status(response.decode('utf-8', errors='replace').split('\0')[1:])
+
+    def compute_patch_ids(self, commits: Iterable[Tuple[str, Optional[str]]]) -> Dict[str, str]:
+        """
+        Computes the stable patch ids of many commits at once via `git diff-tree --stdin -p | git patch-id --stable`.
+
+        Unlike the other queries, this runs a dedicated pipeline that is torn down once all commits are processed. The
+        patch id is a hash of the patch that ignores whitespace and line numbers, thus commits applying the same
+        change to different parents (e.g. cherry-picks) share their patch id.
+
+        Args:
+            commits (Iterable[Tuple[str, Optional[str]]]): The hashes of the commits, each with the hash of the
+                parent to diff against or None to diff against the empty tree.
+
+        Raises:
+            RuntimeError: If either process of the pipeline exits with a non-zero exit code.
+
+        Returns:
+            Dict[str, str]: The patch id of each commit. Commits without a patch (e.g. empty commits) are missing.
+        """
+        commits = list(commits)
+        if self._promisor_remote is not None:
+            self.prefetch_blobs(commits)
+
+        diff_tree_process = self._start_process(['diff-tree', '--stdin', '-r', '-M', '--root', '-p', '--no-color',
+                                                 '--no-ext-diff'])
+        patch_id_process = subprocess.Popen(['git', '--git-dir', self.repository.git_dir, 'patch-id', '--stable'],
+                                            stdin=diff_tree_process.stdout, stdout=subprocess.PIPE,
+                                            stderr=subprocess.DEVNULL)
+        # Only patch-id may hold the read end of the pipe, otherwise diff-tree is not notified if patch-id terminates
+        diff_tree_process.stdout.close()
+
+        def write_commits():
+            for hexsha, parent in commits:
+                diff_tree_process.stdin.write(f'{hexsha} {parent}\n'.encode('utf-8') if parent
+                                              else f'{hexsha}\n'.encode('utf-8'))
+            diff_tree_process.stdin.close()
+
+        # diff-tree produces output while it reads its input, thus write from a separate thread to avoid a deadlock
+        writer = threading.Thread(target=write_commits, daemon=True)
+        writer.start()
+
+        patch_ids = {}
+        for line in patch_id_process.stdout:
+            patch_id, hexsha = line.decode('utf-8').split()
+            patch_ids[hexsha] = patch_id
+
+        writer.join()
+        patch_id_process.stdout.close()
+        if diff_tree_process.wait() != 0 or patch_id_process.wait() != 0:
+            raise RuntimeError('Could not compute patch ids, git diff-tree or git patch-id failed.')
+
+        return patch_ids
+
+    def prefetch_blobs(self, commits: List[Tuple[str, Optional[str]]]):
+        """
+        Fetches the blobs changed by the given commits from the promisor remote of a partial clone in a single
+        `git fetch`. Does nothing if the repository is not a partial clone.
+
+        The blobs are determined via `git diff-tree --raw --no-renames`, which only reads trees. Without renames, the
+        added and deleted blobs are listed as well, thus rename detection does not need further blobs either.
+
+        Args:
+            commits (List[Tuple[str, Optional[str]]]): The hashes of the commits, each with the hash of the parent
+                to diff against or None to diff against the empty tree.
+
+        Raises:
+            RuntimeError: If git diff-tree or git fetch exits with a non-zero exit code.
+        """
+        if self._promisor_remote is None or not commits:
+            return
+
+        diff_tree_input = ''.join(f'{hexsha} {parent}\n' if parent else f'{hexsha}\n' for hexsha, parent in commits)
+        diff_tree = subprocess.run(['git', '--git-dir', self.repository.git_dir, 'diff-tree', '--stdin', '-r',
+                                    '--root', '--no-renames', '--no-commit-id', '--raw', '--no-abbrev'],
+                                   input=diff_tree_input.encode('utf-8'), capture_output=True)
+        if diff_tree.returncode != 0:
+            error = diff_tree.stderr.decode('utf-8', errors='replace')
+            raise RuntimeError(f'Could not list blobs to prefetch: {error}')
+
+        blobs = set()
+        for line in diff_tree.stdout.decode('utf-8', errors='replace').splitlines():
+            # Raw lines look like ':<old mode> <new mode> <old blob> <new blob> <status>\t<path>'
+            if not line.startswith(':'):
+                continue
+            old_mode, new_mode, old_blob, new_blob, _ = line[1:].split('\t', 1)[0].split(' ')
+            # Missing sides are all zeros, submodules (mode 160000) reference commits of other repositories
+            blobs.update(blob for mode, blob in ((old_mode, old_blob), (new_mode, new_blob))
+                         if blob.strip('0') and mode != '160000')
+        if not blobs:
+            return
+
+        fetch = subprocess.run(['git', '--git-dir', self.repository.git_dir, 'fetch', '--stdin', '--quiet', '--no-tags',
+                                '--no-write-fetch-head', '--recurse-submodules=no', '--filter=blob:none',
+                                self._promisor_remote],
+                               input=''.join(f'{blob}\n' for blob in blobs).encode('utf-8'), capture_output=True)
+        if fetch.returncode != 0:
+            raise RuntimeError(f'Could not prefetch {len(blobs)} blobs: '
+                               f'{fetch.stderr.decode("utf-8", errors="replace")}')
+
+    def read_object(self, hexsha: str) -> Tuple[str, bytes]:
+        """
+        Reads an object from the object database via `git cat-file --batch`.
+
+        Args:
+            hexsha (str): The hash of the object.
+
+        Raises:
+            ValueError: If the object does not exist.
+
+        Returns:
+            Tuple[str, bytes]: The type of the object (e.g. 'commit') and its raw content.
+        """
+        if self._cat_file_process is None:
+            self._cat_file_process = self._start_process(['cat-file', '--batch'])
+
+        self._cat_file_process.stdin.write(f'{hexsha}\n'.encode('utf-8'))
+        self._cat_file_process.stdin.flush()
+
+        header = self._cat_file_process.stdout.readline().decode('utf-8').split()
+        if len(header) != 3:
+            raise ValueError(f'Could not read object {hexsha}: {" ".join(header)}')
+
+        _, object_type, size = header
+        content = self._cat_file_process.stdout.read(int(size))
+        self._cat_file_process.stdout.read(1)  # Each object is terminated by a newline
+        return object_type, content
+
+    def get_commit_record(self, hexsha: str) -> CommitRecord:
+        """
+        Assembles a CommitRecord for a single commit, equivalent to the records yielded by stream_commit_records.
+
+        Args:
+            hexsha (str): The hash of the commit.
+
+        Raises:
+            ValueError: If the object does not exist or is not a commit.
+
+        Returns:
+            CommitRecord: The record of the commit.
+        """
+        object_type, content = self.read_object(hexsha)
+        if object_type != 'commit':
+            raise ValueError(f'Object {hexsha} is a {object_type}, not a commit.')
+
+        headers, _, message = content.decode('utf-8', errors='replace').partition('\n\n')
+        parents = []
+        committed_date = 0
+        for header in headers.splitlines():
+            key, _, value = header.partition(' ')
+            if key == 'parent':
+                parents.append(value)
+            elif key == 'committer':
+                # The committer line ends with '<timestamp> <timezone>'
+                committed_date = int(value.rsplit(' ', 2)[1])
+
+        return CommitRecord(hexsha=hexsha, parents=parents, committed_date=committed_date, message=message,
+                            changes=self.get_changes_in_commit(hexsha))
+
+    def _start_process(self, arguments: List[str]) -> subprocess.Popen:
+        return subprocess.Popen(['git', '--git-dir', self.repository.git_dir] + arguments,
+                                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+
+    def _request_diff_tree(self, process: subprocess.Popen, request: str) -> bytes:
+        """
+        Writes a request followed by the sentinel to a `git diff-tree --stdin` process and reads the response.
+
+        Args:
+            process (subprocess.Popen): The diff-tree process to query.
+            request (str): The line to write, ie. a commit hash optionally followed by parent hashes.
+
+        Raises:
+            RuntimeError: If the process terminated before answering.
+
+        Returns:
+            bytes: The response without the sentinel.
+        """
+        process.stdin.write(f'{request}\n'.encode('utf-8') + self._sentinel)
+        process.stdin.flush()
+
+        response = bytearray()
+        while not response.endswith(self._sentinel):
+            chunk = process.stdout.read1(64 * 1024)
+            if not chunk:
+                raise RuntimeError(f'git diff-tree terminated while processing {request}.')
+            response += chunk
+
+        return bytes(response[:-len(self._sentinel)])
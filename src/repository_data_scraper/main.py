@@ -1,16 +1,29 @@
-from repository_data_scraper import RepositoryDataScraper
 from git import Repo, GitCommandError
 import os
 import pandas as pd
-from programming_language import ProgrammingLanguage
+# The modules are imported by the same path as within the scraper, importing them by another path would create
+# separate Enum classes, whose members never compare equal to the ones the scraper checks against
+from src.repository_data_scraper.repository_data_scraper import RepositoryDataScraper
+from src.repository_data_scraper.programming_language import ProgrammingLanguage
+from src.repository_data_scraper.cherry_pick_detection import CherryPickDetection
+from src.repository_data_scraper.clone_strategy import CloneStrategy, clone_repository
+from src.repository_data_scraper.repository_cache import RepositoryCache
+from src.repository_data_scraper.parquet_scenario_sink import ParquetScenarioSink
 from concurrent.futures import ProcessPoolExecutor, as_completed
 import shutil, stat
 import traceback
 from argparse import ArgumentParser
+from typing import Optional
 
 
 def scrape_repository(repository_metadata: pd.Series, path_to_repositories: str,
-                      programming_language: ProgrammingLanguage, sliding_window_size: int) -> pd.Series:
+                      programming_language: ProgrammingLanguage, sliding_window_size: int,
+                      cherry_pick_detection: CherryPickDetection = CherryPickDetection.COMMIT_MESSAGE,
+                      path_to_patch_id_indexes: Optional[str] = None,
+                      path_to_checkpoints: Optional[str] = None,
+                      clone_strategy: CloneStrategy = CloneStrategy.FULL,
+                      repository_cache: Optional[RepositoryCache] = None,
+                      path_to_scenarios: Optional[str] = None, max_workers: int = 1) -> pd.Series:
     """
     Scrapes a GitHub repository for data using the given repository metadata and file paths.
 
@@ -21,14 +34,39 @@ def scrape_repository(repository_metadata: pd.Series, path_to_repositories: str,
         concerning files of this programming language will be considered in the scraping.
     - sliding_window_size (int): The sliding window size to use for scraping file-commit grams.
         These chains of subsequent commits will be at least of length sliding_window_size.
+    - cherry_pick_detection (CherryPickDetection): How to find cherry-picks without a note generated by -x.
+    - path_to_patch_id_indexes (Optional[str]): The directory to persist the patch id index of each repository in.
+        Only used with CherryPickDetection.PATCH_ID.
+    - path_to_checkpoints (Optional[str]): The directory to keep the scrape checkpoint of each repository in. If a
+        checkpoint exists, only commits added since the previous scrape are traversed.
+    - clone_strategy (CloneStrategy): How to clone the repository, e.g. without blobs. Ignored if a repository cache
+        is given.
+    - repository_cache (Optional[RepositoryCache]): If given, the mirror of the repository in this cache is scraped
+        instead of cloning the repository into path_to_repositories.
+    - path_to_scenarios (Optional[str]): If given, the scenarios are streamed into a directory of Parquet files per
+        repository in this directory, instead of being stored in the 'scraped_data' column of the metadata.
+    - max_workers (int): The amount of processes to traverse and process the branches of the repository with. 1
+        scrapes the branches sequentially.
 
     Returns:
     - repository_metadata (pd.Series): The updated metadata of the GitHub repository, including any errors encountered during scraping.
     """
+    scrape_arguments = (programming_language, sliding_window_size, cherry_pick_detection, path_to_patch_id_indexes,
+                        path_to_checkpoints, path_to_scenarios, max_workers)
+
+    if repository_cache is not None:
+        try:
+            with repository_cache.use(repository_metadata['name']) as repo_instance:
+                return scrape_cloned_repository(repo_instance, repository_metadata, *scrape_arguments)
+        except Exception:
+            # Capture any unexpected error (e.g. while cloning or fetching) and store its traceback for debugging
+            repository_metadata['error'] = traceback.format_exc()
+            return repository_metadata
+
     repository_path = os.path.join(path_to_repositories, "__".join(repository_metadata["name"].split("/")))
     try:
-        repo_instance = Repo.clone_from(f'https://github.com/{repository_metadata["name"]}.git',
-                                        f'{repository_path}')
+        repo_instance = clone_repository(f'https://github.com/{repository_metadata["name"]}.git',
+                                         f'{repository_path}', clone_strategy)
     except GitCommandError as e:
         # If already exists, create Repo instance of it
         if 'already exists' in e.stderr:
@@ -39,18 +77,62 @@ def scrape_repository(repository_metadata: pd.Series, path_to_repositories: str,
             repository_metadata['error'] = traceback.format_exc()
             return repository_metadata
 
-    os.chdir(repository_path)
+    return scrape_cloned_repository(repo_instance, repository_metadata, *scrape_arguments)
+
+
+def scrape_cloned_repository(repo_instance: Repo, repository_metadata: pd.Series,
+                             programming_language: ProgrammingLanguage, sliding_window_size: int,
+                             cherry_pick_detection: CherryPickDetection, path_to_patch_id_indexes: Optional[str],
+                             path_to_checkpoints: Optional[str], path_to_scenarios: Optional[str],
+                             max_workers: int = 1) -> pd.Series:
+    """
+    Scrapes an already cloned repository, see scrape_repository for the parameters.
+
+    Parameters:
+    - repo_instance (Repo): The cloned repository, which may be bare.
+
+    Returns:
+    - repository_metadata (pd.Series): The updated metadata of the GitHub repository, including any errors encountered during scraping.
+    """
+    patch_id_index_path = None
+    if path_to_patch_id_indexes is not None:
+        patch_id_index_path = os.path.join(path_to_patch_id_indexes,
+                                           f'{"__".join(repository_metadata["name"].split("/"))}.bin')
+    checkpoint_path = None
+    if path_to_checkpoints is not None:
+        checkpoint_path = os.path.join(path_to_checkpoints,
+                                       f'{"__".join(repository_metadata["name"].split("/"))}.checkpoint')
+    scenario_sink = None
+    if path_to_scenarios is not None:
+        scenarios_path = os.path.join(path_to_scenarios, "__".join(repository_metadata["name"].split("/")))
+        # A scrape resumed from its checkpoint only emits new scenarios, which are appended to the previous ones
+        scenario_sink = ParquetScenarioSink(scenarios_path, repository_metadata["name"],
+                                            resume=checkpoint_path is not None and os.path.exists(checkpoint_path))
+        repository_metadata['scenarios_path'] = scenarios_path
+
+    os.chdir(repo_instance.working_tree_dir or repo_instance.git_dir)
     repo_scraper = RepositoryDataScraper(repository=repo_instance,
                                          programming_language=programming_language,
                                          repository_name=repository_metadata["name"],
-                                         sliding_window_size=sliding_window_size)  # Reduced sliding window size to 3
+                                         sliding_window_size=sliding_window_size,  # Reduced sliding window size to 3
+                                         cherry_pick_detection=cherry_pick_detection,
+                                         patch_id_index_path=patch_id_index_path,
+                                         checkpoint_path=checkpoint_path,
+                                         scenario_sink=scenario_sink,
+                                         max_workers=max_workers)
     try:
         repo_scraper.scrape()
         repository_metadata = update_repository_metadata_with_scraper_results(repo_scraper, repository_metadata)
     except Exception:
         # Capture any exception and store it for debugging
         repository_metadata['error'] = traceback.format_exc()
+        # The checkpoint is not updated by a failed scrape, thus its scenarios are emitted again by the next one
+        if scenario_sink is not None and checkpoint_path is not None:
+            scenario_sink.discard()
         return repository_metadata
+    finally:
+        # Otherwise scenarios emitted before a failure are kept
+        repo_scraper.scenario_sink.close()
 
     return repository_metadata
 
@@ -71,18 +153,34 @@ def update_repository_metadata_with_scraper_results(repo_scraper: RepositoryData
     - pd.Series: The updated repository metadata dictionary.
 
     """
-    repository_metadata['scraped_data'] = repo_scraper.accumulator
-    repository_metadata['n_merge_scenarios'] = len(repo_scraper.accumulator['merge_scenarios'])
-    repository_metadata['n_cherry_pick_scenarios'] = len(repo_scraper.accumulator['cherry_pick_scenarios'])
-    repository_metadata['n_merge_scenarios_with_resolved_conflicts'] = len(
-        [item for item in repo_scraper.accumulator['merge_scenarios'] if item['had_conflicts']]
-    )
-    repository_metadata['n_file_commit_gram_scenarios'] = len(
-        repo_scraper.accumulator['file_commit_gram_scenarios'])
+    # Streamed scenarios are not kept by the scraper, see scenarios_path instead
+    if repo_scraper.accumulator is not None:
+        repository_metadata['scraped_data'] = repo_scraper.accumulator
+    amount_of_scenarios = repo_scraper.scenario_sink.amount_of_scenarios
+    repository_metadata['n_merge_scenarios'] = amount_of_scenarios['merge_scenarios']
+    repository_metadata['n_cherry_pick_scenarios'] = amount_of_scenarios['cherry_pick_scenarios']
+    repository_metadata['n_merge_scenarios_with_resolved_conflicts'] = \
+        repo_scraper.scenario_sink.amount_of_merge_scenarios_with_conflicts
+    repository_metadata['n_file_commit_gram_scenarios'] = amount_of_scenarios['file_commit_gram_scenarios']
 
     return repository_metadata
 
 
+def create_repository_cache(cache_directory: str, disk_budget: float, clone_strategy: CloneStrategy) -> RepositoryCache:
+    """
+    Creates the repository cache for the --repository-cache arguments.
+
+    Parameters:
+    - cache_directory (str): The directory of the cache.
+    - disk_budget (float): The disk budget of the cache in GiB.
+    - clone_strategy (CloneStrategy): The clone strategy of the scrape, see RepositoryCache.for_clone_strategy.
+
+    Returns:
+    - RepositoryCache: The repository cache.
+    """
+    return RepositoryCache.for_clone_strategy(cache_directory, int(disk_budget * 1024 ** 3), clone_strategy)
+
+
 def on_rm_error(func, path, exc_info):
     """
     This method is called by the shutil.rmtree() function when it encounters an error while trying to remove a directory
@@ -106,7 +204,33 @@ def main():
                         help="The programming language to filter for. Only commits concerning files of this"
                              "programming language will be considered. Supported programming languages are:\n"
                              "'python', 'java', 'kotlin', and 'text'. The latter is only to be used for debugging.")
+    parser.add_argument("-c", "--cherry-pick-detection", type=str, default='commit_message',
+                        choices=[cherry_pick_detection.value for cherry_pick_detection in CherryPickDetection],
+                        help="How to find cherry-picks without a note generated by -x. 'commit_message' only compares "
+                             "commits with identical messages, 'patch_id' compares all commits by their patch ids and "
+                             "persists a patch id index per repository in data/patch_id_indexes.")
+    parser.add_argument("--incremental", action='store_true',
+                        help="Keep a checkpoint per repository in data/checkpoints and only traverse the commits added "
+                             "since the previous scrape. The new scenarios are merged into the previous ones.")
+    parser.add_argument("--clone-strategy", type=str, default='full',
+                        choices=[clone_strategy.value for clone_strategy in CloneStrategy],
+                        help="How to clone the repositories. 'blobless' and 'treeless' create bare partial clones, "
+                             "blobs are then only fetched to compute patch ids for cherry-pick detection.")
+    parser.add_argument("--stream-scenarios", action='store_true',
+                        help="Stream the scenarios of each repository into data/scenarios/<repository>/*.parquet "
+                             "instead of keeping them in memory and storing them in the 'scraped_data' column of the "
+                             "output. The output then holds the 'scenarios_path' of each repository instead.")
+    parser.add_argument("--repository-cache", type=str, default=None,
+                        help="Directory of a cache of bare repository mirrors. Cached repositories are refreshed via "
+                             "git fetch instead of being cloned again, and are kept after scraping.")
+    parser.add_argument("--repository-cache-budget", type=float, default=50,
+                        help="Disk budget of the repository cache in GiB. Least recently used mirrors are evicted "
+                             "once it is exceeded.")
+    parser.add_argument("--branch-workers", type=int, default=1,
+                        help="The amount of processes to traverse and process the branches of each repository with. "
+                             "The results equal scraping the branches sequentially, which is the default.")
     args = parser.parse_args()
+    cherry_pick_detection = CherryPickDetection(args.cherry_pick_detection)
 
     try:
         programming_language = ProgrammingLanguage[args.programming_language.upper()]
@@ -123,6 +247,26 @@ def main():
     path_to_data = os.path.join(os.getcwd(), 'data')
     path_to_repositories = os.path.join(os.getcwd(), 'repos')
 
+    path_to_patch_id_indexes = None
+    if cherry_pick_detection == CherryPickDetection.PATCH_ID:
+        path_to_patch_id_indexes = os.path.join(path_to_data, 'patch_id_indexes')
+        os.makedirs(path_to_patch_id_indexes, exist_ok=True)
+
+    path_to_checkpoints = None
+    if args.incremental:
+        path_to_checkpoints = os.path.join(path_to_data, 'checkpoints')
+        os.makedirs(path_to_checkpoints, exist_ok=True)
+
+    path_to_scenarios = None
+    if args.stream_scenarios:
+        path_to_scenarios = os.path.join(path_to_data, 'scenarios')
+        os.makedirs(path_to_scenarios, exist_ok=True)
+
+    repository_cache = None
+    if args.repository_cache:
+        repository_cache = create_repository_cache(args.repository_cache, args.repository_cache_budget,
+                                                   CloneStrategy(args.clone_strategy))
+
     if programming_language is ProgrammingLanguage.KOTLIN:
         repositories_metadata = pd.read_csv(os.path.join(path_to_data, 'kotlin_repos.csv'))
     elif programming_language is ProgrammingLanguage.PYTHON:
@@ -139,7 +283,10 @@ def main():
 
     with ProcessPoolExecutor(max_workers=None) as executor:
         futures = [executor.submit(scrape_repository, repo, path_to_repositories,
-                                   programming_language, args.sliding_window_size)
+                                   programming_language, args.sliding_window_size, cherry_pick_detection,
+                                   path_to_patch_id_indexes, path_to_checkpoints,
+                                   CloneStrategy(args.clone_strategy), repository_cache, path_to_scenarios,
+                                   args.branch_workers)
                    for _, repo in smaller_repositories_metadata.iterrows()]
         for future in as_completed(futures):
             try:
@@ -147,8 +294,10 @@ def main():
 
                 result = future.result()
                 results.append(result)
-                paths_to_directories_to_remove.append(os.path.join(path_to_repositories,
-                                                                   "__".join(result["name"].split("/"))))
+                # Cached mirrors are kept for the next run
+                if repository_cache is None:
+                    paths_to_directories_to_remove.append(os.path.join(path_to_repositories,
+                                                                       "__".join(result["name"].split("/"))))
                 print(f'\n\nScraped {len(results)} repos. {results[-1]["name"]}', flush=True)
 
                 # After every success attempt to clean up directory structure
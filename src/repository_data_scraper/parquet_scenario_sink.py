@@ -0,0 +1,100 @@
+import glob
+import json
+import os
+from typing import Dict, List
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.repository_data_scraper.scenario_sink import ScenarioSink
+
+
+class ParquetScenarioSink(ScenarioSink):
+    """
+    Streams scenarios into a directory of Parquet files, holding at most row_group_size scenarios in memory.
+
+    Every full buffer is flushed as a separate part file with a single row group. Since each part is complete on its
+    own, the scenarios flushed before a crash remain readable, e.g. via pyarrow.parquet.read_table(path). Each row
+    holds the repository name, the scenario type and the scenario as JSON.
+
+    When resuming, the parts of the previous run are kept and counted, and the new scenarios are appended as further
+    parts. This suits a scrape resumed from its checkpoint, which only emits the scenarios it did not find before.
+    """
+
+    SCHEMA = pa.schema([('repository_name', pa.string()), ('scenario_type', pa.string()), ('scenario', pa.string())])
+
+    def __init__(self, path: str, repository_name: str, row_group_size: int = 10000, resume: bool = False):
+        """
+        Args:
+            path (str): The directory to write the part files to.
+            repository_name (str): The name of the scraped repository.
+            row_group_size (int): The amount of scenarios to buffer before flushing them.
+            resume (bool): Whether to keep the part files of a previous run and append to them. Otherwise they are
+                removed.
+        """
+        super().__init__()
+        self.path = path
+        self.repository_name = repository_name
+        self.row_group_size = row_group_size
+
+        os.makedirs(path, exist_ok=True)
+        part_paths = sorted(glob.glob(os.path.join(path, 'part-*.parquet')))
+        for part_path in part_paths:
+            if resume:
+                # Reads one part at a time, each holds at most the row group size of its run
+                table = pq.read_table(part_path, columns=['scenario_type', 'scenario'])
+                for scenario_type, scenario in zip(table.column('scenario_type').to_pylist(),
+                                                   table.column('scenario').to_pylist()):
+                    self._count(scenario_type, json.loads(scenario))
+            else:
+                os.remove(part_path)
+
+        # Parts are numbered across runs, the parts below this number stem from previous runs
+        self._amount_of_previous_parts = len(part_paths) if resume else 0
+        self._amount_of_parts = self._amount_of_previous_parts
+        self._scenario_types: List[str] = []
+        self._scenarios: List[str] = []
+
+    def _write(self, scenario_type: str, scenario: Dict):
+        self._scenario_types.append(scenario_type)
+        self._scenarios.append(json.dumps(scenario))
+        if len(self._scenarios) >= self.row_group_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes the buffered scenarios to a new part file.
+        """
+        if not self._scenarios:
+            return
+
+        table = pa.table({'repository_name': [self.repository_name] * len(self._scenarios),
+                          'scenario_type': self._scenario_types,
+                          'scenario': self._scenarios}, schema=self.SCHEMA)
+        part_name = f'part-{self._amount_of_parts:05d}.parquet'
+        # Readers never see a partially written part, hidden files are skipped when reading the directory
+        temporary_path = os.path.join(self.path, f'.{part_name}.tmp')
+        pq.write_table(table, temporary_path)
+        os.replace(temporary_path, os.path.join(self.path, part_name))
+
+        self._amount_of_parts += 1
+        self._scenario_types = []
+        self._scenarios = []
+
+    def discard(self):
+        """
+        Removes the parts written by this sink and drops the buffered scenarios, keeping the parts of previous runs.
+        E.g. if a resumed scrape fails, such that its scenarios are not appended twice once it is resumed again from
+        the same checkpoint.
+        """
+        for part in range(self._amount_of_previous_parts, self._amount_of_parts):
+            part_path = os.path.join(self.path, f'part-{part:05d}.parquet')
+            if os.path.exists(part_path):
+                os.remove(part_path)
+
+        self._amount_of_parts = self._amount_of_previous_parts
+        self._scenario_types = []
+        self._scenarios = []
+
+    def close(self):
+        self.flush()
@@ -0,0 +1,152 @@
+import os
+import sys
+from time import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src.repository_data_scraper.git_batch_worker import GitBatchWorker
+
+
+class PatchIdIndex:
+    """
+    Persistent index from commits to their stable patch ids (with respect to their first parents) and back.
+
+    Patch ids are computed in batches via GitBatchWorker.compute_patch_ids. Commits whose patch id is already known are
+    never processed again, thus loading a persisted index makes re-scrapes of a repository cheap. Commits without a
+    patch (e.g. empty commits) are remembered as well, but are not part of any group.
+
+    On disk, the index is a flat sequence of 40 byte records: the binary commit hash followed by the binary patch id,
+    which is all zeros for commits without a patch.
+    """
+
+    _RECORD_SIZE = 40
+    _NO_PATCH_ID = bytes(20)
+
+    def __init__(self):
+        self._patch_ids: Dict[bytes, bytes] = {}
+        self._commits_by_patch_id: Dict[bytes, List[bytes]] = {}
+
+    @classmethod
+    def load(cls, path: str) -> 'PatchIdIndex':
+        """
+        Loads an index persisted with save(). A missing file yields an empty index.
+
+        Args:
+            path (str): The path of the index file.
+
+        Raises:
+            ValueError: If the file is not a valid index file.
+
+        Returns:
+            PatchIdIndex: The loaded index.
+        """
+        patch_id_index = cls()
+        if not os.path.exists(path):
+            return patch_id_index
+
+        with open(path, 'rb') as file:
+            content = file.read()
+        if len(content) % cls._RECORD_SIZE != 0:
+            raise ValueError(f'{path} is not a valid patch id index, its size is not a multiple of '
+                             f'{cls._RECORD_SIZE} bytes.')
+
+        for offset in range(0, len(content), cls._RECORD_SIZE):
+            patch_id_index._add(content[offset:offset + 20], content[offset + 20:offset + cls._RECORD_SIZE])
+        return patch_id_index
+
+    def save(self, path: str):
+        """
+        Persists the index. The file is replaced atomically, such that an interrupted save never corrupts an existing
+        index.
+
+        Args:
+            path (str): The path of the index file.
+        """
+        temporary_path = f'{path}.tmp'
+        with open(temporary_path, 'wb') as file:
+            for commit, patch_id in self._patch_ids.items():
+                file.write(commit + patch_id)
+        os.replace(temporary_path, path)
+
+    def __len__(self) -> int:
+        return len(self._patch_ids)
+
+    def __contains__(self, hexsha: str) -> bool:
+        return bytes.fromhex(hexsha) in self._patch_ids
+
+    @property
+    def amount_of_patch_ids(self) -> int:
+        return len(self._commits_by_patch_id)
+
+    @property
+    def size_in_bytes(self) -> int:
+        """
+        Returns:
+            int: The size of the index when persisted.
+        """
+        return len(self._patch_ids) * self._RECORD_SIZE
+
+    def patch_id_of(self, hexsha: str) -> Optional[str]:
+        """
+        Returns:
+            Optional[str]: The patch id of the commit, or None if the commit has no patch or is not indexed.
+        """
+        patch_id = self._patch_ids.get(bytes.fromhex(hexsha))
+        if patch_id is None or patch_id == self._NO_PATCH_ID:
+            return None
+        return patch_id.hex()
+
+    def update(self, git_batch_worker: GitBatchWorker, commits: Iterable[Tuple[str, Optional[str]]],
+               batch_size: int = 10000):
+        """
+        Computes the patch ids of all given commits that are not indexed yet. The commits are streamed to git in
+        batches, and the throughput as well as the size of the index are reported afterwards.
+
+        Args:
+            git_batch_worker (GitBatchWorker): The worker computing the patch ids.
+            commits (Iterable[Tuple[str, Optional[str]]]): The hashes of the commits, each with the hash of the
+                parent to diff against or None to diff against the empty tree.
+            batch_size (int): The amount of commits passed to a single patch id pipeline.
+        """
+        start_time = time()
+        amount_of_computed_patch_ids = 0
+
+        batch = []
+        for hexsha, parent in commits:
+            if hexsha in self:
+                continue
+            batch.append((hexsha, parent))
+            if len(batch) >= batch_size:
+                amount_of_computed_patch_ids += self._update_with_batch(git_batch_worker, batch)
+                batch = []
+        if batch:
+            amount_of_computed_patch_ids += self._update_with_batch(git_batch_worker, batch)
+
+        elapsed_time = time() - start_time
+        throughput = amount_of_computed_patch_ids / elapsed_time if elapsed_time > 0 else 0
+        print(f'Computed patch ids of {amount_of_computed_patch_ids} commits in {round(elapsed_time, 4)}s '
+              f'({round(throughput, 2)} commits/s). The index holds {len(self)} commits with '
+              f'{self.amount_of_patch_ids} distinct patch ids ({self.size_in_bytes} bytes).', file=sys.stderr)
+
+    def groups(self) -> Iterator[List[str]]:
+        """
+        Yields:
+            List[str]: The hashes of commits sharing a patch id, for every patch id shared by at least two commits.
+        """
+        for commits in self._commits_by_patch_id.values():
+            if len(commits) > 1:
+                yield [commit.hex() for commit in commits]
+
+    def _update_with_batch(self, git_batch_worker: GitBatchWorker, batch: List[Tuple[str, Optional[str]]]) -> int:
+        patch_ids = git_batch_worker.compute_patch_ids(batch)
+        for hexsha, _ in batch:
+            patch_id = patch_ids.get(hexsha)
+            self._add(bytes.fromhex(hexsha), bytes.fromhex(patch_id) if patch_id else self._NO_PATCH_ID)
+        return len(batch)
+
+    def _add(self, commit: bytes, patch_id: bytes):
+        if commit in self._patch_ids:
+            return
+
+        self._patch_ids[commit] = patch_id
+        if patch_id != self._NO_PATCH_ID:
+            self._commits_by_patch_id.setdefault(patch_id, []).append(commit)
@@ -0,0 +1,211 @@
+import fcntl
+import os
+import shutil
+import subprocess
+import sys
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple
+
+from git import Repo
+
+from src.repository_data_scraper.clone_strategy import CloneStrategy, clone_repository, update_default_branch
+
+
+class RepositoryCache:
+    """
+    Local cache of bare repository mirrors, keyed by the repository name (e.g. 'owner/repository').
+
+    A mirror is cloned once and refreshed with `git fetch --prune` on every later use, instead of cloning the
+    repository again. Once the mirrors exceed the disk budget, the least recently used mirrors are evicted.
+
+    Mirrors are guarded by lock files, such that multiple worker processes can share the cache: creating, refreshing
+    and evicting a mirror requires an exclusive lock, using it a shared lock. Consumers that need their own repository
+    (e.g. to check out commits) should clone the mirror locally, which hard links its objects, or use it via
+    `git clone --reference`.
+    """
+
+    LAST_USED_FILE_NAME = 'cache-last-used'
+
+    def __init__(self, cache_directory: str, disk_budget: int, clone_strategy: CloneStrategy = CloneStrategy.BARE,
+                 url_template: str = 'https://github.com/{name}.git'):
+        """
+        Args:
+            cache_directory (str): The directory to keep the mirrors in.
+            disk_budget (int): The total size of all mirrors in bytes, above which mirrors are evicted.
+            clone_strategy (CloneStrategy): How to clone the mirrors, must be a bare clone strategy.
+            url_template (str): The URL to clone from, {name} is replaced by the repository name.
+
+        Raises:
+            ValueError: If the clone strategy does not produce a bare repository.
+        """
+        if clone_strategy not in [CloneStrategy.BARE, CloneStrategy.BLOBLESS, CloneStrategy.TREELESS]:
+            raise ValueError(f'Mirrors must be bare, CloneStrategy.{clone_strategy.name} is not supported.')
+
+        self.cache_directory = cache_directory
+        self.disk_budget = disk_budget
+        self.clone_strategy = clone_strategy
+        self.url_template = url_template
+
+    @classmethod
+    def for_clone_strategy(cls, cache_directory: str, disk_budget: int, clone_strategy: CloneStrategy,
+                           **kwargs) -> 'RepositoryCache':
+        """
+        Creates a cache whose mirrors are cloned like the repositories of a scrape with the given clone strategy.
+        Mirrors are bare, thus strategies with a working tree fall back to a bare clone.
+
+        See __init__ for the arguments.
+
+        Returns:
+            RepositoryCache: The repository cache.
+        """
+        if clone_strategy in [CloneStrategy.FULL, CloneStrategy.NO_CHECKOUT]:
+            clone_strategy = CloneStrategy.BARE
+        return cls(cache_directory, disk_budget, clone_strategy=clone_strategy, **kwargs)
+
+    @staticmethod
+    def get_mirror_name(name: str) -> str:
+        """
+        Returns:
+            str: The directory name of the mirror of the repository with the given name within the cache directory.
+        """
+        return f'{"__".join(name.split("/"))}.git'
+
+    def get_mirror_path(self, name: str) -> str:
+        return os.path.join(self.cache_directory, self.get_mirror_name(name))
+
+    @contextmanager
+    def use(self, name: str, refresh: bool = True) -> Iterator[Repo]:
+        """
+        Provides the up-to-date mirror of a repository, cloning it if it is not cached yet. The mirror is protected
+        from eviction and refreshes until the context is left.
+
+        If another consumer is using the mirror already, it is used as it is instead of waiting for the other consumer
+        to leave its context, as that consumer refreshed the mirror recently. Thus consumers can keep using a mirror
+        for a long time, e.g. while clones sharing its objects exist.
+
+        Args:
+            name (str): The name of the repository, e.g. 'owner/repository'.
+            refresh (bool): Whether to fetch an already cached mirror.
+
+        Raises:
+            GitCommandError: If the repository cannot be cloned.
+            RuntimeError: If the mirror cannot be fetched.
+
+        Yields:
+            Repo: The mirror, with a remote branch 'origin/<branch>' for every branch of the remote and the default
+                branch as local branch, like a regular clone.
+        """
+        os.makedirs(self.cache_directory, exist_ok=True)
+        mirror_path = self.get_mirror_path(name)
+
+        with open(f'{mirror_path}.lock', 'a') as lock_file:
+            try:
+                if not self._try_lock_exclusively(lock_file):
+                    # Waits for a clone or refresh in progress, which is followed by the shared lock of its consumer
+                    fcntl.flock(lock_file, fcntl.LOCK_SH)
+                    if self._is_complete(mirror_path):
+                        yield Repo(mirror_path)
+                        return
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+                mirror = self._clone_or_refresh(name, mirror_path, refresh)
+                with open(os.path.join(mirror_path, self.LAST_USED_FILE_NAME), 'w'):
+                    pass
+
+                # Other processes may use, but neither refresh nor evict the mirror from here on
+                fcntl.flock(lock_file, fcntl.LOCK_SH)
+                self.evict(keep=mirror_path)
+
+                yield mirror
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def evict(self, keep: Optional[str] = None):
+        """
+        Removes the least recently used mirrors until the total size of the cache is within the disk budget. Mirrors
+        that are in use by any process are skipped.
+
+        Args:
+            keep (Optional[str]): The path of a mirror that must not be evicted.
+        """
+        mirrors = self._get_mirrors()
+        total_size = sum(size for _, _, size in mirrors)
+
+        for mirror_path, _, size in mirrors:
+            if total_size <= self.disk_budget:
+                break
+            if mirror_path == keep:
+                continue
+
+            with open(f'{mirror_path}.lock', 'a') as lock_file:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue
+                try:
+                    shutil.rmtree(mirror_path)
+                    total_size -= size
+                    print(f'Evicted {mirror_path} ({size} bytes) from the repository cache.', file=sys.stderr)
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _try_lock_exclusively(lock_file) -> bool:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            return False
+
+    def _is_complete(self, mirror_path: str) -> bool:
+        # Without the last used marker the mirror is incomplete, e.g. because a previous clone was interrupted
+        return os.path.exists(os.path.join(mirror_path, self.LAST_USED_FILE_NAME))
+
+    def _clone_or_refresh(self, name: str, mirror_path: str, refresh: bool) -> Repo:
+        if self._is_complete(mirror_path):
+            if refresh:
+                fetch = subprocess.run(['git', '--git-dir', mirror_path, 'fetch', '--prune', '--quiet', 'origin'],
+                                       capture_output=True)
+                if fetch.returncode != 0:
+                    raise RuntimeError(f'Could not refresh the mirror of {name}: '
+                                       f'{fetch.stderr.decode("utf-8", errors="replace")}')
+                mirror = Repo(mirror_path)
+                update_default_branch(mirror)
+                return mirror
+            return Repo(mirror_path)
+
+        if os.path.exists(mirror_path):
+            shutil.rmtree(mirror_path)
+
+        # The clone tracks the remote branches, thus fetching updates them. Unlike --mirror, this skips hidden refs
+        # such as GitHub's refs/pull/*, which are not branches.
+        return clone_repository(self.url_template.format(name=name), mirror_path, self.clone_strategy)
+
+    def _get_mirrors(self) -> List[Tuple[str, float, int]]:
+        """
+        Returns:
+            List[Tuple[str, float, int]]: The path, time of last use and size in bytes of every cached mirror, least
+                recently used first.
+        """
+        mirrors = []
+        for entry in os.scandir(self.cache_directory):
+            if not entry.is_dir() or not entry.name.endswith('.git'):
+                continue
+
+            last_used_path = os.path.join(entry.path, self.LAST_USED_FILE_NAME)
+            last_used = os.path.getmtime(last_used_path) if os.path.exists(last_used_path) else 0.0
+            mirrors.append((entry.path, last_used, self._get_size(entry.path)))
+
+        return sorted(mirrors, key=lambda mirror: mirror[1])
+
+    @staticmethod
+    def _get_size(path: str) -> int:
+        size = 0
+        for directory, _, files in os.walk(path):
+            for file in files:
+                try:
+                    size += os.lstat(os.path.join(directory, file)).st_size
+                except FileNotFoundError:
+                    # Files might be removed concurrently, e.g. by git gc
+                    continue
+        return size
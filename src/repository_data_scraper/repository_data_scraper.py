@@ -1,13 +1,24 @@
+import hashlib
+import json
+import os
 import sys
 
-from git import Repo, Commit, NULL_TREE, BadObject
-import re
+from git import Repo, BadObject
+from concurrent.futures import ProcessPoolExecutor
 from queue import Queue
 from tqdm import tqdm
+from src.repository_data_scraper.cherry_pick_detection import CherryPickDetection
+from src.repository_data_scraper.commit_graph import Bitset, CommitGraph
+from src.repository_data_scraper.commit_stream import stream_commit_records
+from src.repository_data_scraper.git_batch_worker import GitBatchWorker
+from src.repository_data_scraper.patch_id_index import PatchIdIndex
 from src.repository_data_scraper.programming_language import ProgrammingLanguage
-import hashlib
+from src.repository_data_scraper.scenario_sink import AccumulatorScenarioSink, ScenarioSink
+from src.repository_data_scraper.scrape_checkpoint import (SCENARIO_DIGEST_SIZE, ScrapeCheckpoint,
+                                                           split_hexshas, split_scenario_digests)
+from array import array
 from time import time
-from typing import List, Dict
+from typing import List, Dict, Iterable, Optional, Set, Tuple
 from warnings import warn
 
 
@@ -21,19 +32,76 @@ class RepositoryDataScraper:
     # for this file-commit gram, last commit for this file-commit gram and how many times the file was seen
     # consecutively (length of the file-commit gram) Note that the change_types that are valid are M, MM, A or R. All
     # other change types are ignored (because the file wasn't modified).
+    # Only set if the scenarios are emitted into an AccumulatorScenarioSink, see scenario_sink.
     accumulator = None
 
+    # Receives every scenario as soon as it is mined
+    scenario_sink = None
+
     # Maintains a state for each file currently in scope. Each scope is defined by the overlap size n, if we do not
     # see the file again after n steps we remove it from the state
     state = None
 
+    # The commits are represented by their ids in this graph during the traversal
+    commit_graph = None
+
+    # Bitset of the ids of the visited commits
     visited_commits = None
+
+    # Maps the message group ids of self.commit_graph to arrays of the ids of the commits with that message
     seen_commit_messages = None
     programming_language = None
-    _cherry_pick_pattern = None
+
+    # Answers per-commit queries (e.g. patches) over the pipes of persistent git processes
+    git_batch_worker = None
+
+    # Memoizes the patch ids of commits by their ids in self.commit_graph, commits without a patch are missing
+    patch_ids = None
+
+    # Only used with CherryPickDetection.PATCH_ID, indexes the patch ids of all commits with changes in the programming
+    # language. Persisted at patch_id_index_path, if given.
+    patch_id_index = None
+
+    # If set, the scrape resumes from the checkpoint at this path (if it exists) and saves a new checkpoint afterwards
+    checkpoint_path = None
+
+    # The amount of processes to traverse and process the branches with, 1 scrapes them sequentially
+    max_workers = 1
+
+    # The pairs of cherry-pick and cherry commits of the emitted cherry-pick scenarios
+    _cherry_pick_pairs = None
+
+    # If resumed from a checkpoint, the digests of the scenarios of previous scrapes, which are not emitted again
+    _known_scenarios = None
+
+    # The digests of the scenarios of this and previous scrapes for the checkpoint, if self.checkpoint_path is set
+    _scenario_digests = None
 
     def __init__(self, repository: Repo, programming_language: ProgrammingLanguage, repository_name: str,
-                 sliding_window_size: int = 3):
+                 sliding_window_size: int = 3, git_batch_worker: Optional[GitBatchWorker] = None,
+                 cherry_pick_detection: CherryPickDetection = CherryPickDetection.COMMIT_MESSAGE,
+                 patch_id_index_path: Optional[str] = None, checkpoint_path: Optional[str] = None,
+                 scenario_sink: Optional[ScenarioSink] = None, max_workers: int = 1):
+        """
+        Args:
+            repository (Repo): The repository to scrape.
+            programming_language (ProgrammingLanguage): Only changes to files of this programming language are
+                considered.
+            repository_name (str): The name of the repository.
+            sliding_window_size (int): The minimum length of file-commit grams.
+            git_batch_worker (Optional[GitBatchWorker]): The worker to query the repository with. If None, the scraper
+                creates its own worker and closes it once scraping is done.
+            cherry_pick_detection (CherryPickDetection): How to find cherry-picks without a note generated by -x.
+            patch_id_index_path (Optional[str]): Where to persist the patch id index, see PatchIdIndex.
+            checkpoint_path (Optional[str]): Where to resume from and save the scrape checkpoint, see ScrapeCheckpoint.
+            scenario_sink (Optional[ScenarioSink]): Receives the scenarios as soon as they are mined. The caller owns
+                the sink and closes it. If None, the scenarios are collected in self.accumulator.
+            max_workers (int): The amount of processes to traverse and process the branches with, see
+                _scrape_branches_in_parallel. 1 scrapes the branches sequentially.
+
+        Raises:
+            ValueError: If no repository is given.
+        """
         if repository is None:
             raise ValueError("Please provide a repository instance to scrape from.")
 
@@ -43,21 +111,40 @@ class RepositoryDataScraper:
 
         self.repository_name = repository_name
 
-        self.accumulator = {'file_commit_gram_scenarios': [], 'merge_scenarios': [], 'cherry_pick_scenarios': []}
+        # If no worker is passed, the scraper owns its worker and closes it once scraping is done
+        self._owns_git_batch_worker = git_batch_worker is None
+        self.git_batch_worker = git_batch_worker or GitBatchWorker(repository)
+
+        self.scenario_sink = scenario_sink or AccumulatorScenarioSink()
+        if isinstance(self.scenario_sink, AccumulatorScenarioSink):
+            self.accumulator = self.scenario_sink.accumulator
+        self._cherry_pick_pairs = set()
         self.state = {}
         self.branches = [ref.name for ref in self.repository.references if ('HEAD' not in ref.name)
                          and not ref.path.startswith('refs/tags')]
 
-        self.visited_commits = set()
+        self.visited_commits = Bitset()
         self.seen_commit_messages = dict()
-
-        # Based on the string appended to the commit message by the -x option in git cherry-pick
-        self._cherry_pick_pattern = re.compile(r'(?<=cherry picked from commit )[a-z0-9]{40}')
+        self.patch_ids = dict()
+
+        self.cherry_pick_detection = cherry_pick_detection
+        self.patch_id_index_path = patch_id_index_path
+        if cherry_pick_detection == CherryPickDetection.PATCH_ID:
+            self.patch_id_index = PatchIdIndex.load(patch_id_index_path) if patch_id_index_path else PatchIdIndex()
+
+        self.checkpoint_path = checkpoint_path
+        self.max_workers = max_workers
+        if checkpoint_path:
+            # The checkpoint only identifies the scenarios by their digests, such that streaming sinks keep the memory
+            # bounded
+            self._scenario_digests = set()
+        # Maps message digests to the binary hashes of commits of previous scrapes, see _resume_from_checkpoint
+        self._checkpointed_commit_messages: Dict[bytes, bytes] = {}
 
     def update_accumulator_with_file_commit_gram_scenario(self, file_state: dict, file_to_remove: str, branch: str):
         """
-        Updates the accumulator with the state at the given branch and file_to_remove with a file-commit gram scenario
-        if the scenario at branch and file_to_remove is >= self.sliding_window_size long.
+        Emits a file-commit gram scenario with the state at the given branch and file_to_remove, if the scenario at
+        branch and file_to_remove is >= self.sliding_window_size long.
 
         Args:
             file_state: (dict): A dictionary containing the state of the file.
@@ -65,7 +152,8 @@ class RepositoryDataScraper:
             branch (str): The name of the branch where the file exists.
         """
         if file_state['times_seen_consecutively'] >= self.sliding_window_size:
-            self.accumulator['file_commit_gram_scenarios'].append(
+            self._emit_scenario(
+                'file_commit_gram_scenarios',
                 {'file': file_to_remove, 'branch': branch, 'first_commit': file_state['first_commit'],
                  'last_commit': file_state['last_commit'],
                  'times_seen_consecutively': file_state['times_seen_consecutively']})
@@ -79,117 +167,246 @@ class RepositoryDataScraper:
             - MM
             - A
 
-        The scenarios mined, are stored in self.accumulator. To optimize compute, we dont process commits that
-        were already seen again. The exception is that we process past a branches' origin commit for
+        The scenarios mined are emitted into self.scenario_sink as soon as they are found. To optimize compute, we don't
+        process commits that were already seen again. The exception is that we process past a branch's origin commit for
         self.sliding_window_size commits, to mine file-commit grams that overlap outside of a branch.
+
+        If self.checkpoint_path points to the checkpoint of a previous scrape, only commits reachable from new branch
+        HEADs but not from the previous ones are traversed, and only the new scenarios that were not found before are
+        emitted. An AccumulatorScenarioSink receives the scenarios of the previous scrapes first, as they are stored
+        in the checkpoint. Other sinks are expected to keep the scenarios they received before, e.g.
+        ParquetScenarioSink with resume=True. Either way, a checkpoint of this scrape is saved at self.checkpoint_path
+        afterwards.
         """
-        valid_change_types = ['A', 'M', 'MM']
-        for branch in tqdm(self.branches, desc=f'Parsing branches in {self.repository_name}'):
-            try:
-                commit = self.repository.commit(branch)
-            except Exception as e:
-                if isinstance(e, BadObject):
-                    warning_content = (
-                        f'\nCould not get branch HEAD for branch {branch}. Branch probably contains "@". '
-                        f'GitPython cant handle that.\n\nSkipping branch ...')
-                    warn(warning_content, category=RuntimeWarning)
+        try:
+            valid_change_types = ['A', 'M', 'MM']
+            branch_heads = self._get_branch_heads()
+
+            self.commit_graph = CommitGraph(programming_language=self.programming_language,
+                                            valid_change_types=valid_change_types)
+            self.visited_commits = Bitset()
+            revisions = set(branch_heads.values())
+
+            checkpoint = self._load_checkpoint()
+            if checkpoint is not None:
+                revisions |= self._resume_from_checkpoint(checkpoint)
+
+            # Parse the entire (new) history reachable from any branch out of a single git log process into a compact
+            # graph
+            for commit_record in stream_commit_records(self.repository, revisions):
+                self.commit_graph.add(commit_record)
+
+            # Resumed scrapes load the commits of previous scrapes on demand, which requires the repository
+            if self.max_workers > 1 and checkpoint is None:
+                self._scrape_branches_in_parallel(branch_heads)
+            else:
+                for branch, branch_head in tqdm(branch_heads.items(),
+                                                desc=f'Parsing branches in {self.repository_name}'):
+                    # Branches that did not change since the previous scrape cannot contain new scenarios
+                    if checkpoint is not None and checkpoint.branch_heads.get(branch) == branch_head:
+                        continue
+                    self._scrape_branch(branch, branch_head)
+
+            start = time()
+            if self.cherry_pick_detection == CherryPickDetection.PATCH_ID:
+                additional_cherry_pick_scenarios = \
+                    self._mine_commits_with_identical_patch_ids_for_cherry_pick_scenarios()
+            else:
+                additional_cherry_pick_scenarios = \
+                    self._mine_commits_with_duplicate_messages_for_cherry_pick_scenarios()
+            for cherry_pick_scenario in additional_cherry_pick_scenarios:
+                self._emit_scenario('cherry_pick_scenarios', cherry_pick_scenario)
+            print(f'Extra time incurred: {round(time() - start, 4)}s', file=sys.stderr)
+
+            if self.checkpoint_path:
+                self._create_checkpoint(branch_heads).save(self.checkpoint_path)
+        finally:
+            # Also on failures, which would otherwise leak the processes of the worker
+            if self._owns_git_batch_worker:
+                self.git_batch_worker.close()
+
+    def _scrape_branch(self, branch: str, branch_head: str):
+        """
+        Traverses a branch and mines its scenarios, see _traverse_branch and _process_branch.
+
+        Args:
+            branch (str): The name of the branch.
+            branch_head (str): The HEAD commit hash of the branch.
+        """
+        commits = self._traverse_branch(branch_head)
+        self._track_commit_messages(commits)
+        self._process_branch(branch, commits)
+
+    def _scrape_branches_in_parallel(self, branch_heads: Dict[str, str]):
+        """
+        Traverses and processes the branches in a pool of self.max_workers processes, with the same result as scraping
+        them one after another via _scrape_branch.
+
+        Sequentially, each branch is traversed until it runs into the commits visited by the previous branches. Instead,
+        each commit is assigned to the first branch reaching it up front, see CommitGraph.assign_owners, and the workers
+        assume the commits of the previous branches to be visited. This assumption only fails where a previous branch
+        stopped early, once it ran out of keepalive. Thus, the assumptions of each branch are checked against the
+        commits actually visited, in the order of the branches, and branches with a failed assumption are scraped again
+        sequentially. Each worker receives a copy of self.commit_graph once.
+
+        Args:
+            branch_heads (Dict[str, str]): The HEAD commit hash of each branch, in the order to scrape them in.
+        """
+        branches = list(branch_heads)
+        owners = self.commit_graph.assign_owners([self.commit_graph.reference(branch_head)
+                                                  for branch_head in branch_heads.values()])
+        chunksize = max(1, len(branches) // (self.max_workers * 4))
+
+        with ProcessPoolExecutor(max_workers=self.max_workers, initializer=_initialize_branch_scraper,
+                                 initargs=(self.commit_graph, owners, self.programming_language,
+                                           self.sliding_window_size)) as executor:
+            branch_scrapes = executor.map(_scrape_branch_in_worker, range(len(branches)), branches,
+                                          branch_heads.values(), chunksize=chunksize)
+            for branch_index, (commits, assumed_commits, scenarios) in enumerate(
+                    tqdm(branch_scrapes, total=len(branches), desc=f'Parsing branches in {self.repository_name}')):
+                branch = branches[branch_index]
+                if any((owners[commit] < branch_index) != (commit in self.visited_commits)
+                       for commit in assumed_commits):
+                    self._scrape_branch(branch, branch_heads[branch])
                     continue
-                else:
-                    raise e
 
-            frontier = Queue(maxsize=0)
-            frontier.put(commit)
-
-            # If we hit a commit that was already covered by another branch, continue for
-            # self.sliding_window_size - 1 commits to cover file-commit grams overlapping, with at least one
-            # commit on the current branch
-            keepalive = self.sliding_window_size - 1
-
-            while not frontier.empty():
-                commit = frontier.get()
-                is_merge_commit = len(commit.parents) > 1
-                merge_commit_sample = {}
-
-                # Ensure we early stop if we run into a visited commit
-                # This happens whenever this branch (the one currently being processed) joins another branch at
-                # its branch origin, iff we have already processed  a branch running past this branch's origin,
-                # meaning we visited this branch origin's commit thus all commits thereafter
-                if commit.hexsha not in self.visited_commits:
-                    self.visited_commits.add(commit.hexsha)
-
-                    frontier = self._update_frontier_with(commit, frontier, is_merge_commit)
-                elif keepalive > 0:
-                    # If we hit a commit which we have already seen, it means we are hitting another branch
-                    # To catch overlaps, we continue for keepalive commits
-                    keepalive -= 1
-                else:
-                    # Now that we also handled overlaps, stop processing this branch
-                    break
+                for commit in commits:
+                    self.visited_commits.add(commit)
+                self._track_commit_messages(commits)
+                for scenario_type, scenario in scenarios:
+                    self._emit_scenario(scenario_type, scenario)
 
-                self._process_cherry_pick_scenario(commit)
+    def _traverse_branch(self, branch_head: str) -> array:
+        """
+        Traverses a branch starting at its HEAD and marks the traversed commits as visited.
 
-                changes_in_commit = self._get_changes_in_commit(commit)
+        To optimize compute, we don't traverse commits that were already visited by other branches again. The exception
+        is that we continue past a branch's origin commit for self.sliding_window_size - 1 commits, to mine
+        file-commit grams that overlap outside of a branch.
 
-                # At this point the commit metadata such as the message are trimmed
-                # Each line represents one file that was changed. This means each line contains the change type and
-                # relative filepath. Thus, it is safe to simply search list string for file endings.
-                does_commit_contain_changes_in_programming_language = self._does_commit_contain_changes_in_programming_language(changes_in_commit)
-                if does_commit_contain_changes_in_programming_language:
-                    self._update_commit_message_tracker(commit)
+        Args:
+            branch_head (str): The HEAD commit hash of the branch.
 
-                # If it is a merge with conflicts (ie introduced patch) ensure that the changes correspond to
-                # the specified programming_language
-                if is_merge_commit and (len(changes_in_commit) == 0 or
-                                        does_commit_contain_changes_in_programming_language):
-                    merge_commit_sample = {'merge_commit_hash': commit.hexsha, 'had_conflicts': False,
-                                           'parents': [parent.hexsha for parent in commit.parents]}
+        Returns:
+            array: The ids of the commits in self.commit_graph to process for this branch, in traversal order.
+        """
+        commits = array('I')
+
+        frontier = Queue(maxsize=0)
+        frontier.put(self.commit_graph.reference(branch_head))
+
+        # If we hit a commit that was already covered by another branch, continue for
+        # self.sliding_window_size - 1 commits to cover file-commit grams overlapping, with at least one
+        # commit on the current branch
+        keepalive = self.sliding_window_size - 1
+
+        while not frontier.empty():
+            commit = frontier.get()
+
+            # Commits missing from the history (e.g. beyond the boundary of a shallow clone) cannot be processed.
+            # Commits visited by a previous scrape are loaded on demand, such that the keepalive covers them.
+            if not self.commit_graph.is_loaded(commit) and not self._load_visited_commit(commit):
+                continue
+
+            # Ensure we early stop if we run into a visited commit
+            # This happens whenever this branch (the one currently being processed) joins another branch at
+            # its branch origin, iff we have already processed  a branch running past this branch's origin,
+            # meaning we visited this branch origin's commit thus all commits thereafter
+            if commit not in self.visited_commits:
+                self.visited_commits.add(commit)
+
+                frontier = self._update_frontier_with(commit, frontier,
+                                                      len(self.commit_graph.parents(commit)) > 1)
+            elif keepalive > 0:
+                # If we hit a commit which we have already seen, it means we are hitting another branch
+                # To catch overlaps, we continue for keepalive commits
+                keepalive -= 1
+            else:
+                # Now that we also handled overlaps, stop processing this branch
+                break
 
-                affected_files = []
+            commits.append(commit)
 
-                for change_in_commit in changes_in_commit:
-                    changes_to_unpack = change_in_commit.split('\t')
+        return commits
 
-                    # Only process valid change_types
-                    if changes_to_unpack[0] not in valid_change_types:
-                        continue
+    def _track_commit_messages(self, commits: array):
+        """
+        Adds the commits with changes in the programming language to the commit message tracker.
 
-                    # Only maintain a state for files of required programming_language
-                    change_type, file = changes_to_unpack
-                    if self.programming_language.value not in file:
-                        continue
+        Args:
+            commits (array): The ids of the commits in self.commit_graph, in traversal order.
+        """
+        for commit in commits:
+            if self.commit_graph.has_changes_in_programming_language(commit):
+                self._update_commit_message_tracker(commit)
+
+    def _process_branch(self, branch: str, commits: array):
+        """
+        Mines the merge, cherry-pick (via the note generated by -x) and file-commit gram scenarios of a traversed
+        branch and emits them.
+
+        Args:
+            branch (str): The name of the branch.
+            commits (array): The ids of the commits in self.commit_graph traversed for this branch, see
+                _traverse_branch.
+        """
+        for commit in commits:
+            is_merge_commit = len(self.commit_graph.parents(commit)) > 1
+            merge_commit_sample = {}
+
+            self._process_cherry_pick_scenario(commit)
 
-                    affected_files.append(file)
+            # If it is a merge with conflicts (ie introduced patch) ensure that the changes correspond to
+            # the specified programming_language
+            if is_merge_commit and (not self.commit_graph.has_changes(commit) or
+                                    self.commit_graph.has_changes_in_programming_language(commit)):
+                merge_commit_sample = {'merge_commit_hash': self.commit_graph.hexsha(commit),
+                                       'had_conflicts': False,
+                                       'parents': self.commit_graph.parent_hexshas(commit)}
 
-                    if is_merge_commit and change_type == 'MM':
-                        merge_commit_sample['had_conflicts'] = True
+            affected_files = []
 
-                    self._maintain_state_for_change_in_commit(branch, commit, file)
-                self._remove_stale_file_states(affected_files, branch)
+            # The graph only contains changes of valid change types to files of the programming language
+            for file, is_conflict in self.commit_graph.changed_files(commit):
+                affected_files.append(file)
 
-                if is_merge_commit and merge_commit_sample:
-                    self.accumulator['merge_scenarios'].append(merge_commit_sample)
+                if is_merge_commit and is_conflict:
+                    merge_commit_sample['had_conflicts'] = True
 
-            self._handle_last_commit_file_commit_gram_edge_case()
+                self._maintain_state_for_change_in_commit(branch, commit, file)
+            self._remove_stale_file_states(affected_files, branch)
 
-            # Clean up
-            self.state = {}
+            if is_merge_commit and merge_commit_sample:
+                self._emit_scenario('merge_scenarios', merge_commit_sample)
 
-        start = time()
-        self.accumulator[
-            'cherry_pick_scenarios'] += self._mine_commits_with_duplicate_messages_for_cherry_pick_scenarios()
-        print(f'Extra time incurred: {round(time() - start, 4)}s', file=sys.stderr)
+        self._handle_last_commit_file_commit_gram_edge_case()
 
-    def _does_commit_contain_changes_in_programming_language(self, changes_in_commit: List[str]):
+        # Clean up
+        self.state = {}
+
+    def _get_branch_heads(self) -> Dict[str, str]:
         """
-        Check if a commit contains changes in a specific programming language.
+        Resolves the HEAD commit hash of every branch in self.branches.
 
-        Args:
-            changes_in_commit (List[str]): A list of the changes in the commit.
+        Branches whose HEAD cannot be resolved are skipped with a warning.
 
-        Return:
-            True if any change in the commit changes a file of self.programming_language file ending
+        Returns:
+            Dict[str, str]: The HEAD commit hash of each branch, in the order of self.branches.
         """
-        return any([(self.programming_language.value in changes_in_commit) for changes_in_commit in changes_in_commit])
+        branch_heads = {}
+        for branch in self.branches:
+            try:
+                branch_heads[branch] = self.repository.commit(branch).hexsha
+            except Exception as e:
+                if isinstance(e, BadObject):
+                    warning_content = (
+                        f'\nCould not get branch HEAD for branch {branch}. Branch probably contains "@". '
+                        f'GitPython cant handle that.\n\nSkipping branch ...')
+                    warn(warning_content, category=RuntimeWarning)
+                    continue
+                else:
+                    raise e
+        return branch_heads
 
     def _should_process_commit(self, changes_in_commit: List[str], valid_change_types: List[str]):
         """
@@ -218,7 +435,7 @@ class RepositoryDataScraper:
     def _handle_last_commit_file_commit_gram_edge_case(self):
         """
         Handle the edge case where file-commit grams are still active, or continuing in the last commit. In this case we
-        need to also update the accumulator with these scenarios to successfully mine them.
+        need to also emit these scenarios to successfully mine them.
 
         After we are done with all commits, the state might contain valid file-commit grams
         lasting until and including the last commit (ie we have just seen the file and then terminate).
@@ -235,7 +452,7 @@ class RepositoryDataScraper:
 
         Some file-commit grams might have stopped in this commit. If this is the case, we no longer need to maintain
         a state for them. If their length was >= self.sliding_window_size we should successfully mined a scenario
-        and must update the accumulator with it.
+        and must emit it.
 
         Args:
             affected_files (List[str]): List of files affected by the commit.
@@ -254,16 +471,16 @@ class RepositoryDataScraper:
                                                                            branch)
             self.state[branch] = new_state
 
-    def _maintain_state_for_change_in_commit(self, branch: str, commit: Commit, file: str):
+    def _maintain_state_for_change_in_commit(self, branch: str, commit: int, file: str):
         """
-        Updates the state. Does not write any results to the accumulator.
+        Updates the state. Does not emit any scenarios.
 
         Initializes the state for a branch with a empty dict if we are not currently maintaining
         a state for this branch. Then keeps track of file-commit grams >= self.sliding_window_size
 
         Args:
             branch (str): The name of the branch where the commit occurred.
-            commit (Commit): The Commit object representing the commit being made.
+            commit (int): The id of the commit being made in self.commit_graph.
             file (str): The name of the file that was changed in the commit.
 
         """
@@ -276,36 +493,19 @@ class RepositoryDataScraper:
                                                                        'times_seen_consecutively'] + 1
 
             if self.state[branch][file]['times_seen_consecutively'] >= self.sliding_window_size:
-                self.state[branch][file]['last_commit'] = commit.hexsha
+                self.state[branch][file]['last_commit'] = self.commit_graph.hexsha(commit)
         else:
             # We are not currently maintaining a state for this file in this branch, but have
             # detected it Need to set up the state dict
-            self.state[branch][file] = {'first_commit': commit.hexsha, 'last_commit': commit.hexsha,
+            commit_hexsha = self.commit_graph.hexsha(commit)
+            self.state[branch][file] = {'first_commit': commit_hexsha, 'last_commit': commit_hexsha,
                                         'times_seen_consecutively': 1}
 
-    def _get_changes_in_commit(self, commit: Commit) -> List:
-        """
-        Generates a list of changes in a commit using git show with arguments: name_status=True, format='oneline'.
-        Contains only actual changes. Changes start with a change type followed by the affected file(s).
-        Can affect multiple files for e.g. renaming.
-
-        Args:
-            commit (Commit): The commit object representing the commit for which changes are to be retrieved.
-
-        Returns:
-            List: A list of strings representing the changes in the given commit.
-        """
-        changes_in_commit = self.repository.git.show(commit, name_status=True, format='oneline').split('\n')
-        changes_in_commit = changes_in_commit[1:]  # remove commit hash and message
-        changes_in_commit = [change for change in changes_in_commit if change]  # filter empty lines
-        return changes_in_commit
-
-    def _process_cherry_pick_scenario(self, commit: Commit):
+    def _process_cherry_pick_scenario(self, commit: int):
         """
-        Checks the commit message for a cherry-pick scenario and, if present, adds it to the class's accumulator.
+        Checks the commit message for a cherry-pick scenario and, if present, emits it.
 
-        This function does not return a value. Instead, it updates the class's accumulator with the following
-             data structure:
+        This function does not return a value. Instead, it emits a scenario with the following data structure:
             {
                 'cherry_pick_commit': <commit hash (str)>,
                 'cherry_commit': <matched cherry-pick commit (str)>,
@@ -313,112 +513,175 @@ class RepositoryDataScraper:
             }
 
         Args:
-            commit (Commit): A commit object to be checked for a cherry-pick scenario.
-        """
-        potential_cherry_pick_match = self._cherry_pick_pattern.search(commit.message)
-        if potential_cherry_pick_match:
-            self.accumulator['cherry_pick_scenarios'].append({
-                'cherry_pick_commit': commit.hexsha,
-                'cherry_commit': potential_cherry_pick_match[0],
-                'parents': [parent.hexsha for parent in commit.parents]
+            commit (int): The id of the commit in self.commit_graph to be checked for a cherry-pick scenario.
+        """
+        cherry_commit = self.commit_graph.cherry_commit(commit)
+        if cherry_commit:
+            self._emit_scenario('cherry_pick_scenarios', {
+                'cherry_pick_commit': self.commit_graph.hexsha(commit),
+                'cherry_commit': cherry_commit,
+                'parents': self.commit_graph.parent_hexshas(commit)
             })
 
-    def _update_frontier_with(self, commit: Commit, frontier: Queue, is_merge_commit: bool):
+    def _update_frontier_with(self, commit: int, frontier: Queue, is_merge_commit: bool):
         """
         Adds the commit's parents to the frontier and returns the frontier.
 
         Args:
-            commit (Commit): The commit object to update the frontier with.
-            frontier (Queue): The queue containing the commits to be processed.
+            commit (int): The id of the commit in self.commit_graph to update the frontier with.
+            frontier (Queue): The queue containing the ids of the commits to be processed.
             is_merge_commit (bool): A boolean indicating whether the given commit is a merge commit.
 
         Returns:
-            frontier (Queue): The updated queue containing the commits to be processed.
+            frontier (Queue): The updated queue containing the ids of the commits to be processed.
         """
+        parents = self.commit_graph.parents(commit)
         if is_merge_commit:
-            for parent in commit.parents:
+            for parent in parents:
                 # Ensure we continue on any path that is left available
-                if parent.hexsha not in self.visited_commits:
+                if parent not in self.visited_commits:
                     frontier.put(parent)
-        elif len(commit.parents) == 1:
-            frontier.put(commit.parents[0])
+        elif len(parents) == 1:
+            frontier.put(parents[0])
 
         return frontier
 
-    def _update_commit_message_tracker(self, commit: Commit):
+    def _update_commit_message_tracker(self, commit: int):
         """
         If a new commit message is detected, adds a new dict element, otherwise appends the commit to the
-        list at `commit.message`.
+        array at the commit's message group. Message groups are shared by all commits with an identical message.
 
         Args:
-            commit (Commit): The commit to update the commit message tracker with.
+            commit (int): The id of the commit in self.commit_graph to update the commit message tracker with.
         """
-        if commit.message in self.seen_commit_messages:
-            self.seen_commit_messages[commit.message].append(commit)
+        message_group = self.commit_graph.message_group(commit)
+        if message_group in self.seen_commit_messages:
+            self.seen_commit_messages[message_group].append(commit)
         else:
-            self.seen_commit_messages.update({commit.message: [commit]})
+            # Commits of previous scrapes with the same message are candidates for cherry-picks as well
+            commits = array('I', self._get_checkpointed_commits_with_message(message_group))
+            if commit not in commits:
+                commits.append(commit)
+            self.seen_commit_messages.update({message_group: commits})
 
     def _mine_commits_with_duplicate_messages_for_cherry_pick_scenarios(self):
         """
         Mines commits with duplicate messages for cherry pick scenarios.
 
         If two commits commit messages are identical and so are their patch ids, they are additional cherry-pick scenarios.
-        Note that this function early stops after collecting 50 additional scenarios, to avoid excessive compute
-        incurred in very large repositories.
+        The patch ids of all commits sharing their message with another commit are computed up front in a single
+        `git diff-tree | git patch-id` pipeline. Within each message group, every commit is then paired with the next
+        commit of the group with the same patch id, which takes linear time in the size of the group.
 
         Edge cases:
             - A commit can be present as a cherry for multiple commits in different scenarios, iff it has been picked
                 multiple times.
+            - Commits without a patch (e.g. empty commits) have no patch id and are never matched.
         """
-        duplicate_messages = [{k: v} for k, v in self.seen_commit_messages.items() if len(v) > 1]
+        duplicate_messages = [commits for commits in self.seen_commit_messages.values() if len(commits) > 1]
 
         if len(duplicate_messages) == 0:
             return []
 
+        self._compute_patch_ids(commit for commits in duplicate_messages for commit in commits)
+
         additional_cherry_pick_scenarios = []
-        start_time = time()
-        timeout = 180
-
-        # Start with the messages with the least amount of duplicates (ascending), to cover the most ground
-        # before the timeout. This way we ensure a large diversity in the potential samples we
-        # consider without spending excessive effort on one message with an excessive amount
-        # of duplicates
-        duplicate_messages = sorted(duplicate_messages, key=lambda msg: len(list(msg.values())[0]), reverse=False)
-
-        for duplicate_message in tqdm(duplicate_messages,
-                                      desc='Mining duplicate commit messages for additional cherry-pick scenarios'):
-            commits = next(iter(duplicate_message.values()))
-            for i, pivot_commit in enumerate(commits):
-                comparison_targets = commits[i + 1:]  # Only process triangular sub-matrix without diagonal
-                for comparison_target in comparison_targets:
-                    if self._do_patch_ids_match(pivot_commit, comparison_target):
-                        self._append_cherry_pick_scenario(additional_cherry_pick_scenarios, comparison_target,
-                                                          pivot_commit)
-
-                        # If we found a cherry for this commit, it is a cherry-pick commit.
-                        # The other comparison_targets could only lead to duplication iff a cherry has been picked
-                        # multiple times. Assume original_commit has been picked to previous_cherry_pick_commit. Then,
-                        # original_commit was also picked to other_cherry_pick_commit. All three commits introduce the
-                        # same patch and have the same commit message. This means this will lead to duplicate scenarios.
-                        # To avoid this, we stop processing comparison_targets, once we have found a cherry for the
-                        # commit. This way other_cherry_pick_commit will not be matched with original_commit AND
-                        # previous_cherry_pick_commit.
-                        break
-
-                    if time() > start_time + timeout:
-                        print(f'Early stopping mining for additional cherry-pick scenarios timeout of 3min was hit.\n',
-                              file=sys.stderr)
-                        break
-            # Timeout mechanisms to avoid collecting excessive amounts of scenarios from a single repository
-            if len(additional_cherry_pick_scenarios) >= 50:
-                print(f'Early stopping mining for additional cherry-pick scenarios, because >=50 were already found.\n',
-                      file=sys.stderr)
-                break
+
+        # Start with the messages with the least amount of duplicates (ascending), such that the scenarios of messages
+        # with few duplicates come first
+        duplicate_messages = sorted(duplicate_messages, key=len)
+
+        for commits in tqdm(duplicate_messages,
+                            desc='Mining duplicate commit messages for additional cherry-pick scenarios'):
+            self._pair_commits_with_same_patch_id(additional_cherry_pick_scenarios, commits)
+
         print(f'Found {len(additional_cherry_pick_scenarios)} additional cherry pick scenarios.', file=sys.stderr)
         return additional_cherry_pick_scenarios
 
-    def _append_cherry_pick_scenario(self, additional_cherry_pick_scenarios: List[Dict], comparison_target: Commit,
-                                     pivot_commit: Commit):
+    def _mine_commits_with_identical_patch_ids_for_cherry_pick_scenarios(self):
+        """
+        Mines all visited commits with changes in the programming language for cherry pick scenarios, regardless of
+        their commit messages. This also finds cherry-picks whose messages were reworded.
+
+        The patch ids of all such commits are added to self.patch_id_index, which is persisted afterwards if
+        self.patch_id_index_path is set. Commits sharing a patch id are paired like in
+        _mine_commits_with_duplicate_messages_for_cherry_pick_scenarios. Scenarios already found via the note generated
+        by git cherry-pick -x are skipped.
+
+        Edge cases:
+            - A commit can be present as a cherry for multiple commits in different scenarios, iff it has been picked
+                multiple times.
+            - Commits without a patch (e.g. empty commits) have no patch id and are never matched.
+        """
+        commits = [commit for commit in self.visited_commits
+                   if self.commit_graph.has_changes_in_programming_language(commit)]
+
+        self.patch_id_index.update(self.git_batch_worker, self._get_commits_and_first_parents(commits))
+        if self.patch_id_index_path:
+            self.patch_id_index.save(self.patch_id_index_path)
+
+        # The index might contain commits of previous scrapes, which are not part of the current history
+        groups = []
+        for group in self.patch_id_index.groups():
+            group = sorted(self.commit_graph.id_of(hexsha) for hexsha in group if hexsha in self.commit_graph)
+            # Groups without any commit of this scrape were already mined by a previous scrape
+            if not any(self.commit_graph.is_loaded(commit) for commit in group):
+                continue
+            group = [commit for commit in group
+                     if (self.commit_graph.is_loaded(commit) or self._load_visited_commit(commit))
+                     and commit in self.visited_commits
+                     and self.commit_graph.has_changes_in_programming_language(commit)]
+            if len(group) > 1:
+                groups.append(group)
+
+        additional_cherry_pick_scenarios = []
+        for commits in tqdm(groups, desc='Mining identical patch ids for additional cherry-pick scenarios'):
+            self.patch_ids.update({commit: self.patch_id_index.patch_id_of(self.commit_graph.hexsha(commit))
+                                   for commit in commits})
+            self._pair_commits_with_same_patch_id(additional_cherry_pick_scenarios, commits)
+
+        # Cherry-picks with a note generated by -x are found during the traversal already
+        additional_cherry_pick_scenarios = [
+            scenario for scenario in additional_cherry_pick_scenarios
+            if (scenario['cherry_pick_commit'], scenario['cherry_commit']) not in self._cherry_pick_pairs]
+
+        print(f'Found {len(additional_cherry_pick_scenarios)} additional cherry pick scenarios.', file=sys.stderr)
+        return additional_cherry_pick_scenarios
+
+    def _pair_commits_with_same_patch_id(self, additional_cherry_pick_scenarios: List[Dict], commits: List[int]):
+        """
+        Pairs each commit with the next commit in the given list with the same patch id in self.patch_ids and
+        appends the pairs as cherry-pick scenarios.
+
+        Args:
+            additional_cherry_pick_scenarios (List[Dict]): A list of dictionaries that represent additional
+                cherry pick scenarios.
+            commits (List[int]): The ids of the commits in self.commit_graph that are candidates for cherry-picks.
+        """
+        # For each commit, find the next commit in the list with the same patch id, by walking the list backwards
+        next_commit_with_same_patch_id = [None] * len(commits)
+        last_index_of_patch_id = {}
+        for i in range(len(commits) - 1, -1, -1):
+            patch_id = self.patch_ids.get(commits[i])
+            if patch_id is None:
+                continue
+            next_commit_with_same_patch_id[i] = last_index_of_patch_id.get(patch_id)
+            last_index_of_patch_id[patch_id] = i
+
+        for pivot_commit, comparison_target_index in zip(commits, next_commit_with_same_patch_id):
+            # If we found a cherry for this commit, it is a cherry-pick commit.
+            # Later commits with the same patch id could only lead to duplication iff a cherry has been picked
+            # multiple times. Assume original_commit has been picked to previous_cherry_pick_commit. Then,
+            # original_commit was also picked to other_cherry_pick_commit. All three commits introduce the
+            # same patch and have the same commit message. This means this will lead to duplicate scenarios.
+            # To avoid this, we only pair each commit with the next commit with the same patch id. This way
+            # other_cherry_pick_commit will not be matched with original_commit AND previous_cherry_pick_commit.
+            if comparison_target_index is not None:
+                self._append_cherry_pick_scenario(additional_cherry_pick_scenarios,
+                                                  commits[comparison_target_index], pivot_commit)
+
+    def _append_cherry_pick_scenario(self, additional_cherry_pick_scenarios: List[Dict], comparison_target: int,
+                                     pivot_commit: int):
         """
         Appends detected identical commits as cherry_pick scenarios to the additional_cherry_pick_scenarios
         accumulator. The chronologically older commit is set as the 'cherry_commit' and the younger commit as
@@ -427,57 +690,270 @@ class RepositoryDataScraper:
         Args:
             additional_cherry_pick_scenarios (List[Dict]): A list of dictionaries that represent additional
                 cherry pick scenarios.
-            comparison_target (Commit): The commit that is being compared against.
-            pivot_commit (Commit): The commit that is used as the pivot for comparison.
+            comparison_target (int): The id of the commit that is being compared against.
+            pivot_commit (int): The id of the commit that is used as the pivot for comparison.
 
         """
-        if pivot_commit.committed_datetime < comparison_target.committed_datetime:
+        pivot_commit_date = self.commit_graph.committed_date(pivot_commit)
+        comparison_target_date = self.commit_graph.committed_date(comparison_target)
+        if pivot_commit_date < comparison_target_date:
             additional_cherry_pick_scenarios.append({
-                'cherry_pick_commit': comparison_target.hexsha,
-                'cherry_commit': pivot_commit.hexsha,
-                'parents': [parent.hexsha for parent in comparison_target.parents]
+                'cherry_pick_commit': self.commit_graph.hexsha(comparison_target),
+                'cherry_commit': self.commit_graph.hexsha(pivot_commit),
+                'parents': self.commit_graph.parent_hexshas(comparison_target)
             })
-        elif pivot_commit.committed_datetime > comparison_target.committed_datetime:
+        elif pivot_commit_date > comparison_target_date:
             additional_cherry_pick_scenarios.append({
-                'cherry_pick_commit': pivot_commit.hexsha,
-                'cherry_commit': comparison_target.hexsha,
-                'parents': [parent.hexsha for parent in pivot_commit.parents]
+                'cherry_pick_commit': self.commit_graph.hexsha(pivot_commit),
+                'cherry_commit': self.commit_graph.hexsha(comparison_target),
+                'parents': self.commit_graph.parent_hexshas(pivot_commit)
             })
 
-    def _do_patch_ids_match(self, commit1: Commit, commit2: Commit) -> bool:
+    def _compute_patch_ids(self, commits: Iterable[int]):
         """
-        Checks if two commits apply the same changes, ie are identical.
+        Computes the patch ids of the given commits with respect to their first parents and stores them in
+        self.patch_ids. Commits whose patch id is already known are skipped, all others are processed in a single
+        batch by the git batch worker.
 
         Args:
-            commit1: The first commit object to compare.
-            commit2: The second commit object to compare.
+            commits (Iterable[int]): The ids of the commits in self.commit_graph to compute the patch ids for.
+        """
+        commits = [commit for commit in commits if commit not in self.patch_ids]
+        if not commits:
+            return
+
+        commits_and_first_parents = self._get_commits_and_first_parents(commits)
+        patch_ids = self.git_batch_worker.compute_patch_ids(commits_and_first_parents)
+        for commit, (hexsha, _) in zip(commits, commits_and_first_parents):
+            if hexsha in patch_ids:
+                self.patch_ids[commit] = patch_ids[hexsha]
+
+    def _get_commits_and_first_parents(self, commits: List[int]) -> List[Tuple[str, Optional[str]]]:
+        """
+        Args:
+            commits (List[int]): The ids of the commits in self.commit_graph.
 
         Returns:
-            bool: True if the patch ids of the two commits match, False otherwise.
+            List[Tuple[str, Optional[str]]]: The hash of each commit with the hash of its first parent, or None for
+                root commits.
         """
-        patch_sha1 = self._generate_hash_from_patch(commit1)
-        patch_sha2 = self._generate_hash_from_patch(commit2)
+        commits_and_first_parents = []
+        for commit in commits:
+            parents = self.commit_graph.parents(commit)
+            commits_and_first_parents.append((self.commit_graph.hexsha(commit),
+                                              self.commit_graph.hexsha(parents[0]) if parents else None))
+        return commits_and_first_parents
+
+    def _load_checkpoint(self) -> Optional[ScrapeCheckpoint]:
+        """
+        Raises:
+            ValueError: If the checkpoint was created with a different programming language or sliding window size.
 
-        return patch_sha1 == patch_sha2
+        Returns:
+            Optional[ScrapeCheckpoint]: The checkpoint at self.checkpoint_path, or None if there is none.
+        """
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return None
+
+        checkpoint = ScrapeCheckpoint.load(self.checkpoint_path)
+        if (checkpoint.programming_language != self.programming_language.name
+                or checkpoint.sliding_window_size != self.sliding_window_size):
+            raise ValueError(f'The checkpoint at {self.checkpoint_path} was created for '
+                             f'{checkpoint.programming_language} with sliding window size '
+                             f'{checkpoint.sliding_window_size}, cannot resume from it.')
+        return checkpoint
+
+    def _resume_from_checkpoint(self, checkpoint: ScrapeCheckpoint) -> Set[str]:
+        """
+        Marks the commits visited by the previous scrape as visited, without loading them into self.commit_graph.
+        They are only loaded on demand by _load_visited_commit.
 
-    def _generate_hash_from_patch(self, commit: Commit) -> str:
+        Args:
+            checkpoint (ScrapeCheckpoint): The checkpoint of the previous scrape.
+
+        Returns:
+            Set[str]: The revisions excluding the history of the previous scrape from the git log traversal, ie. the
+                previous branch HEADs prefixed by '^'. HEADs that no longer exist (e.g. after a force push) are skipped.
+        """
+        for hexsha in split_hexshas(checkpoint.visited_commits):
+            self.visited_commits.add(self.commit_graph.reference(hexsha))
+        self._checkpointed_commit_messages = dict(checkpoint.seen_commit_messages)
+
+        # Scenarios can be found again, e.g. in the keepalive past a previous branch HEAD
+        self._known_scenarios = set(split_scenario_digests(checkpoint.scenario_digests))
+        self._scenario_digests |= self._known_scenarios
+
+        # An in-memory sink receives the scenarios of previous scrapes, such that it holds all scenarios of the
+        # repository
+        if self.accumulator is not None and checkpoint.accumulator is not None:
+            for scenario_type, scenarios in checkpoint.accumulator.items():
+                for scenario in scenarios:
+                    self.scenario_sink.emit(scenario_type, scenario)
+
+        exclusions = set()
+        for branch_head in set(checkpoint.branch_heads.values()):
+            try:
+                self.git_batch_worker.read_object(branch_head)
+                exclusions.add(f'^{branch_head}')
+            except ValueError:
+                continue
+        return exclusions
+
+    def _load_visited_commit(self, commit: int) -> bool:
         """
-        Generates a hash from a commit's patch.
+        Loads a commit visited by a previous scrape into self.commit_graph.
 
         Args:
-            commit (Commit): The commit object for which to generate the hash.
+            commit (int): The id of the commit in self.commit_graph.
 
         Returns:
-            str: The generated hash as a hexadecimal string.
+            bool: True if the commit was loaded, False if it was not visited or no longer exists.
         """
-        diff = commit.diff(other=commit.parents[0] if commit.parents else NULL_TREE, create_patch=True)
+        if commit not in self.visited_commits:
+            return False
+
         try:
-            diff_content = ''.join(d.diff.decode('utf-8') for d in diff)
-        except UnicodeDecodeError:
-            return ''
+            self.commit_graph.add(self.git_batch_worker.get_commit_record(self.commit_graph.hexsha(commit)))
+        except ValueError:
+            return False
+        return True
+
+    def _get_checkpointed_commits_with_message(self, message_group: int) -> List[int]:
+        """
+        Args:
+            message_group (int): The message group of self.commit_graph.
+
+        Returns:
+            List[int]: The ids of the commits of previous scrapes with the message of the message group.
+        """
+        binary_hexshas = self._checkpointed_commit_messages.pop(self.commit_graph.message_digest(message_group), b'')
 
-        # Normalize the patch
-        normalized_diff = re.sub(r'^(index|diff|---|\+\+\+) .*\n', '', diff_content, flags=re.MULTILINE)
-        normalized_diff = re.sub(r'^\s*\n', '', normalized_diff, flags=re.MULTILINE)
+        commits = []
+        for hexsha in split_hexshas(binary_hexshas):
+            commit = self.commit_graph.reference(hexsha)
+            if self.commit_graph.is_loaded(commit) or self._load_visited_commit(commit):
+                commits.append(commit)
+        return commits
 
-        return hashlib.sha1(normalized_diff.encode('utf-8')).hexdigest()
+    def _create_checkpoint(self, branch_heads: Dict[str, str]) -> ScrapeCheckpoint:
+        """
+        Args:
+            branch_heads (Dict[str, str]): The HEAD commit hash of each branch scraped.
+
+        Returns:
+            ScrapeCheckpoint: The checkpoint of this scrape.
+        """
+        seen_commit_messages = dict(self._checkpointed_commit_messages)
+        for message_group, commits in self.seen_commit_messages.items():
+            seen_commit_messages[self.commit_graph.message_digest(message_group)] = b''.join(
+                bytes.fromhex(self.commit_graph.hexsha(commit)) for commit in commits)
+
+        return ScrapeCheckpoint(
+            programming_language=self.programming_language.name,
+            sliding_window_size=self.sliding_window_size,
+            branch_heads=branch_heads,
+            visited_commits=b''.join(bytes.fromhex(self.commit_graph.hexsha(commit))
+                                     for commit in self.visited_commits),
+            seen_commit_messages=seen_commit_messages,
+            scenario_digests=b''.join(sorted(self._scenario_digests)),
+            # The scenarios are already held in memory by an in-memory sink, other sinks persist them themselves
+            accumulator=self.accumulator)
+
+    def _emit_scenario(self, scenario_type: str, scenario: Dict):
+        """
+        Emits a scenario into self.scenario_sink, unless a previous scrape already found it.
+
+        Args:
+            scenario_type (str): The type of the scenario, e.g. 'merge_scenarios'.
+            scenario (Dict): The scenario.
+        """
+        if self._scenario_digests is not None:
+            digest = hashlib.blake2b(json.dumps(scenario, sort_keys=True).encode('utf-8'),
+                                     digest_size=SCENARIO_DIGEST_SIZE).digest()
+            if self._known_scenarios is not None and digest in self._known_scenarios:
+                return
+            self._scenario_digests.add(digest)
+
+        self.scenario_sink.emit(scenario_type, scenario)
+        if scenario_type == 'cherry_pick_scenarios':
+            self._cherry_pick_pairs.add((scenario['cherry_pick_commit'], scenario['cherry_commit']))
+
+
+class _AssumedVisitedCommits:
+    """
+    Stands in for the visited commits of the scraper of a worker process of
+    RepositoryDataScraper._scrape_branches_in_parallel. Besides the commits visited by the branch itself, the commits
+    owned by the previous branches are assumed to be visited, see CommitGraph.assign_owners. The commits whose
+    membership depends on this assumption are recorded, such that it can be checked afterwards.
+    """
+
+    def __init__(self, owners: array, branch_index: int):
+        """
+        Args:
+            owners (array): The index of the owning branch per commit id, see CommitGraph.assign_owners.
+            branch_index (int): The index of the branch traversed.
+        """
+        self.owners = owners
+        self.branch_index = branch_index
+        self.assumed_commits = array('I')
+        self._visited_commits = Bitset()
+
+    def add(self, commit: int):
+        self._visited_commits.add(commit)
+
+    def __contains__(self, commit: int) -> bool:
+        if commit in self._visited_commits:
+            return True
+        self.assumed_commits.append(commit)
+        return self.owners[commit] < self.branch_index
+
+
+class _ScenarioListSink(ScenarioSink):
+    """
+    Keeps the scenarios of a branch in the order they are emitted in, such that the main process can emit them again.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.scenarios: List[Tuple[str, Dict]] = []
+
+    def _write(self, scenario_type: str, scenario: Dict):
+        self.scenarios.append((scenario_type, scenario))
+
+
+# The scraper and commit owners of the worker processes of RepositoryDataScraper._scrape_branches_in_parallel
+_branch_scraper: Optional[RepositoryDataScraper] = None
+_branch_owners: Optional[array] = None
+
+
+def _initialize_branch_scraper(commit_graph: CommitGraph, owners: array, programming_language: ProgrammingLanguage,
+                               sliding_window_size: int):
+    """
+    Sets up the scraper of a worker process. The scraper has no repository, it only traverses and processes branches
+    over the commit graph of the main process.
+    """
+    global _branch_scraper, _branch_owners
+    _branch_scraper = RepositoryDataScraper.__new__(RepositoryDataScraper)
+    _branch_scraper.commit_graph = commit_graph
+    _branch_scraper.programming_language = programming_language
+    _branch_scraper.sliding_window_size = sliding_window_size
+    _branch_scraper.state = {}
+    _branch_owners = owners
+
+
+def _scrape_branch_in_worker(branch_index: int, branch: str,
+                             branch_head: str) -> Tuple[array, array, List[Tuple[str, Dict]]]:
+    """
+    Returns:
+        Tuple[array, array, List[Tuple[str, Dict]]]: The ids of the commits traversed for the branch, the ids of the
+            commits whose membership in the visited commits was assumed, see _AssumedVisitedCommits, and the scenarios
+            mined from the branch with their types, in the order they were emitted in.
+    """
+    visited_commits = _AssumedVisitedCommits(_branch_owners, branch_index)
+    _branch_scraper.visited_commits = visited_commits
+    _branch_scraper.scenario_sink = _ScenarioListSink()
+    _branch_scraper._cherry_pick_pairs = set()
+
+    commits = _branch_scraper._traverse_branch(branch_head)
+    _branch_scraper._process_branch(branch, commits)
+    return commits, visited_commits.assumed_commits, _branch_scraper.scenario_sink.scenarios
@@ -0,0 +1,61 @@
+from abc import ABC, abstractmethod
+from collections import Counter
+from typing import Dict, List
+
+# The types of scenarios a RepositoryDataScraper emits
+SCENARIO_TYPES = ['file_commit_gram_scenarios', 'merge_scenarios', 'cherry_pick_scenarios']
+
+
+class ScenarioSink(ABC):
+    """
+    Receives the scenarios of a RepositoryDataScraper as soon as they are mined, instead of collecting them until the
+    scrape is done. Sinks are context managers, leaving the context flushes and closes the sink.
+    """
+
+    def __init__(self):
+        # The amount of scenarios emitted per scenario type
+        self.amount_of_scenarios = Counter()
+        self.amount_of_merge_scenarios_with_conflicts = 0
+
+    def emit(self, scenario_type: str, scenario: Dict):
+        """
+        Args:
+            scenario_type (str): The type of the scenario, one of SCENARIO_TYPES.
+            scenario (Dict): The scenario.
+        """
+        self._count(scenario_type, scenario)
+        self._write(scenario_type, scenario)
+
+    def _count(self, scenario_type: str, scenario: Dict):
+        self.amount_of_scenarios[scenario_type] += 1
+        if scenario_type == 'merge_scenarios' and scenario['had_conflicts']:
+            self.amount_of_merge_scenarios_with_conflicts += 1
+
+    @abstractmethod
+    def _write(self, scenario_type: str, scenario: Dict):
+        pass
+
+    def close(self):
+        """
+        Writes any buffered scenarios. Sinks must not be used after closing them.
+        """
+        pass
+
+    def __enter__(self) -> 'ScenarioSink':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class AccumulatorScenarioSink(ScenarioSink):
+    """
+    Keeps all scenarios in memory, grouped by their scenario type.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.accumulator: Dict[str, List[Dict]] = {scenario_type: [] for scenario_type in SCENARIO_TYPES}
+
+    def _write(self, scenario_type: str, scenario: Dict):
+        self.accumulator[scenario_type].append(scenario)
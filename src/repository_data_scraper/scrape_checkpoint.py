@@ -0,0 +1,86 @@
+import gzip
+import os
+import pickle
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+# The size of the digests identifying the scenarios found, in bytes
+SCENARIO_DIGEST_SIZE = 16
+
+
+@dataclass
+class ScrapeCheckpoint:
+    """
+    State of a finished RepositoryDataScraper.scrape() run, which allows the next run to only traverse new commits.
+
+    Commit hashes are kept in binary form (20 bytes each) and concatenated, which keeps checkpoints of repositories
+    with millions of commits small. Messages are identified by the digests used for the message groups of the
+    CommitGraph.
+    """
+    programming_language: str
+    sliding_window_size: int
+    # The HEAD commit hash of each branch at the time of the run
+    branch_heads: Dict[str, str] = field(default_factory=dict)
+    # The concatenated binary hashes of all visited commits
+    visited_commits: bytes = b''
+    # Maps message digests to the concatenated binary hashes of the commits with changes in the programming language
+    # with that message
+    seen_commit_messages: Dict[bytes, bytes] = field(default_factory=dict)
+    # The concatenated digests of the JSON of all scenarios found, see SCENARIO_DIGEST_SIZE
+    scenario_digests: bytes = b''
+    # The scenarios found, only if they were collected in memory anyway. Streaming sinks persist them themselves.
+    accumulator: Optional[Dict[str, List[Dict]]] = None
+
+    @classmethod
+    def load(cls, path: str) -> 'ScrapeCheckpoint':
+        """
+        Args:
+            path (str): The path of a checkpoint written by save().
+
+        Raises:
+            ValueError: If the file does not contain a checkpoint.
+
+        Returns:
+            ScrapeCheckpoint: The loaded checkpoint.
+        """
+        with gzip.open(path, 'rb') as file:
+            checkpoint = pickle.load(file)
+        if not isinstance(checkpoint, cls):
+            raise ValueError(f'{path} does not contain a scrape checkpoint.')
+        return checkpoint
+
+    def save(self, path: str):
+        """
+        Persists the checkpoint. The file is replaced atomically, such that an interrupted save never corrupts an
+        existing checkpoint.
+
+        Args:
+            path (str): The path of the checkpoint file.
+        """
+        temporary_path = f'{path}.tmp'
+        with gzip.open(temporary_path, 'wb') as file:
+            pickle.dump(self, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_path, path)
+
+
+def split_hexshas(binary_hexshas: bytes) -> List[str]:
+    """
+    Args:
+        binary_hexshas (bytes): Concatenated binary commit hashes, as stored in a ScrapeCheckpoint.
+
+    Returns:
+        List[str]: The commit hashes as hex strings.
+    """
+    return [binary_hexshas[offset:offset + 20].hex() for offset in range(0, len(binary_hexshas), 20)]
+
+
+def split_scenario_digests(scenario_digests: bytes) -> List[bytes]:
+    """
+    Args:
+        scenario_digests (bytes): Concatenated scenario digests, as stored in a ScrapeCheckpoint.
+
+    Returns:
+        List[bytes]: The scenario digests.
+    """
+    return [scenario_digests[offset:offset + SCENARIO_DIGEST_SIZE]
+            for offset in range(0, len(scenario_digests), SCENARIO_DIGEST_SIZE)]
@@ -0,0 +1,45 @@
+import os
+import shlex
+import shutil
+import subprocess
+from types import SimpleNamespace
+from typing import Optional
+
+
+class LocalContainer:
+    """
+    Executes the commands on the host, in place of a Docker container, and counts the execs.
+    """
+
+    def __init__(self, directory: Optional[str] = None, api=None):
+        """
+        Args:
+            directory (Optional[str]): The working directory of commands executed without a workdir, which also
+                identifies the container. The working directory of the test process if None.
+            api: Stands in for the low-level Docker API of the container, e.g. for its exec endpoints.
+        """
+        self.id = directory or 'local'
+        self.directory = directory
+        self.client = SimpleNamespace(api=api)
+        self.amount_of_execs = 0
+
+    def exec_run(self, command, privileged=False, workdir=None):
+        self.amount_of_execs += 1
+        arguments = command if isinstance(command, list) else shlex.split(command)
+        process = subprocess.run(arguments, cwd=workdir or self.directory, stdout=subprocess.PIPE,
+                                 stderr=subprocess.STDOUT)
+        return process.returncode, process.stdout
+
+
+def copy_fixture(source_path: str, destination_path: str):
+    """
+    Copies a bare repository of repos/testing-repositories, whose packed refs are checked out with line endings git
+    does not accept, and fixes these line endings in the copy.
+    """
+    shutil.copytree(source_path, destination_path)
+    path_to_packed_refs = os.path.join(destination_path, 'packed-refs')
+    if os.path.exists(path_to_packed_refs):
+        with open(path_to_packed_refs, 'rb') as file:
+            packed_refs = file.read().replace(b'\r\n', b'\n')
+        with open(path_to_packed_refs, 'wb') as file:
+            file.write(packed_refs)
@@ -0,0 +1,114 @@
+import unittest
+import asyncio
+import os
+import subprocess
+import tempfile
+import time
+from sys import path
+
+path.append("..")
+from src.ideformer_client.environment.async_exec_client import AsyncExecClient
+from src.ideformer_client.environment.head_tail_output import HeadTailOutput
+from src.test.helpers import LocalContainer
+
+
+class LocalExecAPI:
+    """
+    Streams the output of commands executed on the host, like the exec endpoints of the Docker API.
+    """
+
+    def __init__(self):
+        self.processes = {}
+
+    def exec_create(self, container_id, command, workdir=None, privileged=False):
+        exec_id = str(len(self.processes))
+        self.processes[exec_id] = subprocess.Popen(command, cwd=workdir, stdout=subprocess.PIPE,
+                                                   stderr=subprocess.STDOUT)
+        return {'Id': exec_id}
+
+    def exec_start(self, exec_id, stream=False):
+        process = self.processes[exec_id]
+        yield from iter(lambda: os.read(process.stdout.fileno(), 4096), b'')
+
+    def exec_inspect(self, exec_id):
+        return {'ExitCode': self.processes[exec_id].wait()}
+
+
+class AsyncExecClientTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.exec_client = AsyncExecClient(LocalContainer(api=LocalExecAPI()), kill_grace_period=0.2)
+
+    def test_should_not_block_event_loop(self):
+        async def run():
+            ticks = 0
+
+            async def tick():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+
+            ticker = asyncio.create_task(tick())
+            results = await asyncio.gather(*(self.exec_client.exec_run(f'/bin/bash -c "sleep 0.3 && echo {i}"')
+                                             for i in range(10)))
+            ticker.cancel()
+            return ticks, results
+
+        start = time.perf_counter()
+        ticks, results = asyncio.run(run())
+
+        self.assertLess(time.perf_counter() - start, 1.5)
+        self.assertGreater(ticks, 10)
+        self.assertEqual(results, [(0, f'{i}\n'.encode('utf-8')) for i in range(10)])
+
+    def test_should_terminate_command_after_timeout(self):
+        start = time.perf_counter()
+        err_code, output = asyncio.run(self.exec_client.exec_run('/bin/bash -c "echo started && sleep 10"',
+                                                                 timeout=0.3))
+
+        self.assertLess(time.perf_counter() - start, 3)
+        self.assertEqual(err_code, AsyncExecClient.TIMEOUT_EXIT_CODE)
+        self.assertEqual(output, b'started\n')
+
+    def test_should_kill_command_on_cancellation(self):
+        with tempfile.TemporaryDirectory() as directory:
+            marker = os.path.join(directory, 'marker')
+
+            async def run():
+                task = asyncio.create_task(self.exec_client.exec_run(['/bin/bash', '-c', f'sleep 1 && touch {marker}']))
+                await asyncio.sleep(0.3)
+                task.cancel()
+                with self.assertRaises(asyncio.CancelledError):
+                    await task
+
+            start = time.perf_counter()
+            asyncio.run(run())
+            self.assertLess(time.perf_counter() - start, 1)
+            time.sleep(1)
+            # The whole process group of the command was killed, including the child processes of bash
+            self.assertFalse(os.path.exists(marker))
+
+    def test_should_kill_command_once_output_exceeds_limit(self):
+        output = HeadTailOutput(20)
+        start = time.perf_counter()
+        err_code = asyncio.run(self.exec_client.exec_run_capped(['/bin/bash', '-c', 'echo start; yes; echo end'],
+                                                                output, max_num_bytes=1024 ** 2))
+
+        self.assertLess(time.perf_counter() - start, 5)
+        self.assertIsNone(err_code)
+        self.assertGreater(output.total_num_bytes, 1024 ** 2)
+        self.assertTrue(output.getvalue().startswith('start\ny\ny\n'))
+        self.assertTrue(output.getvalue().endswith('y\ny\ny\ny\ny\n'))
+
+    def test_should_stream_complete_output_below_limit(self):
+        output = HeadTailOutput(100)
+        err_code = asyncio.run(self.exec_client.exec_run_capped('/bin/bash -c "echo out; echo err >&2; exit 3"',
+                                                                output, max_num_bytes=1024))
+
+        self.assertEqual(err_code, 3)
+        self.assertEqual(output.getvalue(), 'out\nerr\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
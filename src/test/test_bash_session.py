@@ -0,0 +1,117 @@
+import unittest
+import io
+import os
+from socket import socketpair
+import struct
+import subprocess
+import tempfile
+import threading
+import time
+from sys import path
+
+path.append("..")
+from src.ideformer_client.environment.async_exec_client import AsyncExecClient
+from src.ideformer_client.environment.bash_session import BashSession
+from src.ideformer_client.environment.head_tail_output import HeadTailOutput
+from src.test.helpers import LocalContainer
+
+
+class LocalAttachAPI:
+    """
+    Attaches to processes executed on the host over a socket, like the exec endpoints of the Docker API, which frame
+    the output with stream headers.
+    """
+
+    def __init__(self):
+        self.processes = {}
+
+    def exec_create(self, container_id, command, stdin=False, workdir=None):
+        exec_id = str(len(self.processes))
+        self.processes[exec_id] = subprocess.Popen(command, cwd=workdir, stdin=subprocess.PIPE,
+                                                   stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        return {'Id': exec_id}
+
+    def exec_start(self, exec_id, socket=False):
+        process = self.processes[exec_id]
+        client_socket, server_socket = socketpair()
+
+        def forward_input():
+            for data in iter(lambda: server_socket.recv(4096), b''):
+                process.stdin.write(data)
+                process.stdin.flush()
+            process.stdin.close()
+
+        def forward_output():
+            for data in iter(lambda: os.read(process.stdout.fileno(), 4096), b''):
+                server_socket.sendall(struct.pack('>BxxxL', 1, len(data)) + data)
+            server_socket.close()
+
+        threading.Thread(target=forward_input, daemon=True).start()
+        threading.Thread(target=forward_output, daemon=True).start()
+        return client_socket
+
+    def exec_inspect(self, exec_id):
+        return {'ExitCode': self.processes[exec_id].wait()}
+
+
+class BashSessionTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.container = LocalContainer(api=LocalAttachAPI())
+        self.session = BashSession.open(self.container, self.directory.name, interrupt_grace_period=0.3)
+
+    def tearDown(self):
+        self.session.close()
+        self.directory.cleanup()
+
+    def _run(self, command, **kwargs):
+        output = io.BytesIO()
+        exit_code = self.session.run(command, output, **kwargs)
+        return exit_code, output.getvalue().decode('utf-8')
+
+    def test_should_keep_working_directory_and_environment_across_commands(self):
+        self.assertEqual(self._run('mkdir "sub directory" && cd "sub directory" && export VALUE="a b"'), (0, ''))
+        self.assertEqual(self._run('pwd; echo "$VALUE"; echo error >&2'),
+                         (0, f'{os.path.realpath(self.directory.name)}/sub directory\na b\nerror\n'))
+        self.assertEqual(self._run('printf "no newline"; (exit 3)'), (3, 'no newline'))
+        exit_code, output = self._run('if')
+        self.assertEqual(exit_code, 2)
+        self.assertIn('syntax error', output)
+        self.assertEqual(len(self.container.client.api.processes), 1)
+        self.assertEqual(self.container.amount_of_execs, 0)
+
+    def test_should_interrupt_command_after_timeout(self):
+        start = time.perf_counter()
+        exit_code, output = self._run('cd /tmp && echo started && sleep 10', timeout=0.3)
+
+        self.assertLess(time.perf_counter() - start, 2)
+        self.assertEqual((exit_code, output), (AsyncExecClient.TIMEOUT_EXIT_CODE, 'started\n'))
+        # The session survives the interrupt, including the working directory the command changed to
+        self.assertEqual(self._run('pwd'), (0, '/tmp\n'))
+
+    def test_should_restart_session_if_command_cannot_be_interrupted(self):
+        self._run('export VALUE=1')
+        exit_code, output = self._run('while true; do :; done', timeout=0.3)
+
+        self.assertEqual(exit_code, AsyncExecClient.TIMEOUT_EXIT_CODE)
+        self.assertIn('the shell session was restarted', output)
+        self.assertEqual(self._run('echo "value: $VALUE"'), (0, 'value: \n'))
+
+    def test_should_kill_command_once_output_exceeds_limit(self):
+        output = HeadTailOutput(20)
+        exit_code = self.session.run('echo start; yes', output, max_num_bytes=1024 ** 2)
+
+        self.assertIsNone(exit_code)
+        self.assertTrue(output.getvalue().startswith('start\ny\ny\n'))
+        self.assertEqual(self._run('echo alive'), (0, 'alive\n'))
+
+    def test_opening_session_should_close_previous_session_of_container(self):
+        self._run('true')
+        session = BashSession.open(self.container, self.directory.name)
+        self.assertEqual(self.container.client.api.processes['0'].wait(timeout=5), 0)
+        session.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+import os
+import shutil
+import subprocess
+import tempfile
+from git import Repo
+from sys import path
+
+path.append("..")
+from src.repository_data_scraper.clone_strategy import CloneStrategy, clone_repository, get_promisor_remote
+from src.repository_data_scraper.programming_language import ProgrammingLanguage
+from src.repository_data_scraper.repository_data_scraper import RepositoryDataScraper
+from src.test.helpers import copy_fixture
+
+
+class CloneStrategyTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        os.chdir('../..')
+        cls.path_to_repositories = os.path.join(os.getcwd(), 'repos', 'testing-repositories')
+        cls.directory = tempfile.mkdtemp()
+
+        # Serve a copy of the fixture, which allows partial clones and has packed refs with line endings git accepts
+        cls.source_path = os.path.join(cls.directory, 'mixed-file-types-demo.git')
+        copy_fixture(os.path.join(cls.path_to_repositories, 'mixed-file-types-demo.git'), cls.source_path)
+        source_repository = Repo(cls.source_path)
+        with source_repository.config_writer() as config_writer:
+            config_writer.set_value('uploadpack', 'allowFilter', 'true')
+            config_writer.set_value('uploadpack', 'allowAnySHA1InWant', 'true')
+
+        # The scenarios of a regular clone, whose branches differ from the ones of the bare source
+        cls.target_accumulator = cls._scrape(clone_repository(f'file://{cls.source_path}',
+                                                              os.path.join(cls.directory, 'target'),
+                                                              CloneStrategy.FULL))
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.directory)
+
+    @classmethod
+    def _scrape(cls, repository: Repo) -> dict:
+        repository_data_scraper = RepositoryDataScraper(repository=repository,
+                                                        programming_language=ProgrammingLanguage.TEXT,
+                                                        repository_name='mixed-file-types-demo',
+                                                        sliding_window_size=2)
+        repository_data_scraper.scrape()
+        return repository_data_scraper.accumulator
+
+    def _clone(self, clone_strategy: CloneStrategy) -> Repo:
+        return clone_repository(f'file://{self.source_path}', os.path.join(self.directory, clone_strategy.value),
+                                clone_strategy)
+
+    def test_bare_clone_should_yield_same_scenarios(self):
+        repository = self._clone(CloneStrategy.BARE)
+
+        self.assertTrue(repository.bare)
+        self.assertEqual([head.name for head in repository.heads], ['master'])
+        self.assertEqual(self._scrape(repository), self.target_accumulator)
+
+    def test_blobless_clone_should_only_fetch_blobs_for_patch_ids(self):
+        repository = self._clone(CloneStrategy.BLOBLESS)
+        self.assertEqual(get_promisor_remote(repository), 'origin')
+
+        def count_missing_objects() -> int:
+            objects = subprocess.run(['git', '--git-dir', repository.git_dir, 'rev-list', '--objects', '--all',
+                                      '--missing=print'], capture_output=True, check=True, text=True).stdout
+            return sum(line.startswith('?') for line in objects.splitlines())
+
+        amount_of_missing_objects = count_missing_objects()
+        self.assertGreater(amount_of_missing_objects, 0)
+
+        self.assertEqual(self._scrape(repository), self.target_accumulator)
+        # Only the blobs of commits with duplicate messages were fetched
+        self.assertLess(count_missing_objects(), amount_of_missing_objects)
+        self.assertGreater(count_missing_objects(), 0)
+
+    def test_full_clone_should_not_be_partial(self):
+        repository = self._clone(CloneStrategy.FULL)
+
+        self.assertFalse(repository.bare)
+        self.assertIsNone(get_promisor_remote(repository))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+import os
+import tempfile
+from sys import path
+
+path.append("..")
+from src.ideformer_client.environment.command_batch import CommandBatch
+from src.test.helpers import LocalContainer
+
+
+class CommandBatchTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.container = LocalContainer(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_should_run_all_commands_in_one_exec(self):
+        os.makedirs(os.path.join(self.directory.name, 'sub directory'))
+        batch = CommandBatch(self.container, self.directory.name)
+        batch.add('echo "first"; echo "error" >&2')
+        batch.add('printf "without trailing newline"; exit 3')
+        batch.add('pwd', workdir=os.path.join(self.directory.name, 'sub directory'))
+        batch.add('true')
+
+        results = batch.run()
+
+        self.assertEqual(self.container.amount_of_execs, 1)
+        self.assertEqual([result.exit_code for result in results], [0, 3, 0, 0])
+        self.assertEqual(results[0].output, 'first\nerror\n')
+        self.assertEqual(results[1].output, 'without trailing newline')
+        self.assertEqual(results[2].output.strip(), os.path.realpath(os.path.join(self.directory.name,
+                                                                                  'sub directory')))
+        self.assertEqual(results[3].output, '')
+        self.assertFalse(results[1].succeeded)
+
+    def test_should_skip_commands_after_failure(self):
+        batch = CommandBatch(self.container, self.directory.name, stop_on_failure=True)
+        batch.add('touch created')
+        batch.add('false')
+        batch.add('touch skipped')
+
+        results = batch.run()
+
+        self.assertEqual([result.exit_code for result in results], [0, 1, None])
+        self.assertTrue(os.path.exists(os.path.join(self.directory.name, 'created')))
+        self.assertFalse(os.path.exists(os.path.join(self.directory.name, 'skipped')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+from sys import path
+
+path.append("..")
+from src.repository_data_scraper.commit_graph import Bitset, CommitGraph
+from src.repository_data_scraper.commit_stream import CommitRecord
+from src.repository_data_scraper.programming_language import ProgrammingLanguage
+
+
+class CommitGraphTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.commit_graph = CommitGraph(ProgrammingLanguage.PYTHON, valid_change_types=['A', 'M', 'MM'])
+
+    def test_should_resolve_parents_added_after_their_children(self):
+        child = self.commit_graph.add(CommitRecord(hexsha='a' * 40, parents=['b' * 40, 'c' * 40], committed_date=2,
+                                                   message='Merge\n', changes=[]))
+        parent = self.commit_graph.add(CommitRecord(hexsha='b' * 40, parents=[], committed_date=1,
+                                                    message='Initial\n', changes=[]))
+
+        self.assertEqual(list(self.commit_graph.parents(child)), [parent, self.commit_graph.id_of('c' * 40)])
+        self.assertEqual(self.commit_graph.parent_hexshas(child), ['b' * 40, 'c' * 40])
+        self.assertEqual(self.commit_graph.hexsha(parent), 'b' * 40)
+        self.assertTrue(self.commit_graph.is_loaded(parent))
+        # Only referenced as a parent, never added
+        self.assertFalse(self.commit_graph.is_loaded(self.commit_graph.id_of('c' * 40)))
+        self.assertEqual(len(self.commit_graph), 3)
+
+    def test_should_only_keep_valid_changes_in_programming_language(self):
+        commit = self.commit_graph.add(CommitRecord(
+            hexsha='a' * 40, parents=[], committed_date=1, message='Change\n',
+            changes=['M\tfoo.py', 'D\tbar.py', 'M\tREADME.md', 'R100\told.py\tnew.py', 'MM\tbaz.py']))
+
+        self.assertEqual(self.commit_graph.changed_files(commit), [('foo.py', False), ('baz.py', True)])
+        self.assertTrue(self.commit_graph.has_changes(commit))
+        self.assertTrue(self.commit_graph.has_changes_in_programming_language(commit))
+
+    def test_should_group_identical_messages_of_commits_with_changes_in_programming_language(self):
+        first = self.commit_graph.add(CommitRecord(hexsha='a' * 40, parents=[], committed_date=1, message='Fix\n',
+                                                   changes=['M\tfoo.py']))
+        second = self.commit_graph.add(CommitRecord(hexsha='b' * 40, parents=[], committed_date=1, message='Fix\n',
+                                                    changes=['M\tbar.py']))
+        other_message = self.commit_graph.add(CommitRecord(hexsha='c' * 40, parents=[], committed_date=1,
+                                                           message='Fix typo\n', changes=['M\tbar.py']))
+        other_language = self.commit_graph.add(CommitRecord(hexsha='d' * 40, parents=[], committed_date=1,
+                                                            message='Fix\n', changes=['M\tREADME.md']))
+
+        self.assertEqual(self.commit_graph.message_group(first), self.commit_graph.message_group(second))
+        self.assertNotEqual(self.commit_graph.message_group(first), self.commit_graph.message_group(other_message))
+        self.assertEqual(self.commit_graph.message_group(other_language), -1)
+
+    def test_should_detect_cherry_pick_note(self):
+        commit = self.commit_graph.add(CommitRecord(
+            hexsha='a' * 40, parents=['b' * 40], committed_date=1,
+            message=f'Fix\n\n(cherry picked from commit {"c" * 40})\n', changes=[]))
+
+        self.assertEqual(self.commit_graph.cherry_commit(commit), 'c' * 40)
+        self.assertIsNone(self.commit_graph.cherry_commit(self.commit_graph.id_of('b' * 40)))
+
+    def test_should_assign_commits_to_first_root_reaching_them(self):
+        # a <- b <- c (main) and b <- d (feature), e is only referenced as the parent of a
+        for hexsha, parents in [('a', ['e']), ('b', ['a']), ('c', ['b']), ('d', ['b'])]:
+            self.commit_graph.add(CommitRecord(hexsha=hexsha * 40, parents=[parent * 40 for parent in parents],
+                                               committed_date=1, message='Change\n', changes=[]))
+        feature, main = self.commit_graph.id_of('d' * 40), self.commit_graph.id_of('c' * 40)
+
+        owners = self.commit_graph.assign_owners([feature, main])
+
+        self.assertEqual({hexsha: owners[self.commit_graph.id_of(hexsha * 40)] for hexsha in 'abcde'},
+                         {'a': 0, 'b': 0, 'c': 1, 'd': 0, 'e': CommitGraph.NO_OWNER})
+
+    def test_bitset(self):
+        bitset = Bitset(4)
+        for item in [0, 3, 9, 1000]:
+            bitset.add(item)
+        bitset.discard(3)
+
+        self.assertIn(1000, bitset)
+        self.assertNotIn(3, bitset)
+        self.assertNotIn(5000, bitset)
+        self.assertEqual(list(bitset), [0, 9, 1000])
+        self.assertEqual(len(bitset), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+import unittest
+import asyncio
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from sys import path
+from types import SimpleNamespace
+
+path.append("..")
+from src.ideformer_client.environment.container_event_monitor import ContainerEventMonitor
+from src.ideformer_client.environment.docker_manager import DockerManager
+
+
+class FakeEventStream:
+
+    def __init__(self):
+        self.events = queue.Queue()
+
+    def __iter__(self):
+        while True:
+            event = self.events.get()
+            if event is None:
+                return
+            yield event
+
+    def close(self):
+        self.events.put(None)
+
+
+class FakeContainer:
+    """
+    Emits its start or die event shortly after being started, like the Docker daemon.
+    """
+
+    def __init__(self, client, dies_on_start: bool = False, emits_events: bool = True):
+        self.client = client
+        self.id = str(id(self))
+        self.status = 'created'
+        self.dies_on_start = dies_on_start
+        self.emits_events = emits_events
+        self.amount_of_reloads = 0
+        self._status_after_start = None
+
+    def start(self):
+        self._status_after_start = 'exited' if self.dies_on_start else 'running'
+        if self.emits_events:
+            event = {'Type': 'container', 'Action': 'die' if self.dies_on_start else 'start',
+                     'Actor': {'ID': self.id}}
+            threading.Timer(0.01, self.client.stream.events.put, args=(event,)).start()
+
+    def reload(self):
+        self.amount_of_reloads += 1
+        self.status = self._status_after_start or self.status
+
+    def logs(self):
+        return b''
+
+    def stop(self):
+        self.status = 'exited'
+
+    def remove(self):
+        pass
+
+
+class FakeClient:
+
+    def __init__(self, **container_options):
+        self.api = SimpleNamespace(base_url='http+docker://fake')
+        self.stream = FakeEventStream()
+        self.amount_of_subscriptions = 0
+        self.containers = SimpleNamespace(create=lambda **kwargs: FakeContainer(self, **container_options))
+
+    def events(self, decode, filters):
+        self.amount_of_subscriptions += 1
+        return self.stream
+
+
+class ContainerEventMonitorTestCase(unittest.TestCase):
+
+    @staticmethod
+    def _create_docker_managers(client, event_monitor, amount, container_start_timeout=5):
+        docker_managers = [DockerManager(image='image', env_vars={}, container_start_timeout=container_start_timeout,
+                                         client=client, event_monitor=event_monitor) for _ in range(amount)]
+        for docker_manager in docker_managers:
+            docker_manager.create_container()
+        return docker_managers
+
+    def test_should_share_one_subscription_across_all_containers(self):
+        client = FakeClient()
+        event_monitor = ContainerEventMonitor(client)
+        docker_managers = self._create_docker_managers(client, event_monitor, 50)
+
+        with ThreadPoolExecutor(max_workers=25) as executor:
+            containers = list(executor.map(lambda docker_manager: docker_manager.start_container(),
+                                           docker_managers[:25]))
+
+        async def start_asynchronously():
+            return await asyncio.gather(*(docker_manager.astart_container() for docker_manager in docker_managers[25:]))
+
+        containers += asyncio.run(start_asynchronously())
+        event_monitor.close()
+
+        self.assertEqual(client.amount_of_subscriptions, 1)
+        self.assertTrue(all(container.status == 'running' for container in containers))
+        # Each container is only inspected once, after its start event
+        self.assertTrue(all(container.amount_of_reloads == 1 for container in containers))
+
+    def test_should_raise_if_container_exits_on_start(self):
+        client = FakeClient(dies_on_start=True)
+        event_monitor = ContainerEventMonitor(client)
+        docker_manager = self._create_docker_managers(client, event_monitor, 1)[0]
+
+        with self.assertRaises(RuntimeError):
+            docker_manager.start_container()
+        event_monitor.close()
+
+    def test_should_inspect_container_if_no_event_arrives(self):
+        client = FakeClient(emits_events=False)
+        event_monitor = ContainerEventMonitor(client)
+        docker_manager = self._create_docker_managers(client, event_monitor, 1, container_start_timeout=0.1)[0]
+
+        # The container is running, only its event got lost, thus the start succeeds after the timeout
+        self.assertEqual(docker_manager.start_container().status, 'running')
+        self.assertEqual(docker_manager.container.amount_of_reloads, 1)
+        event_monitor.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+import unittest
+import asyncio
+from sys import path
+
+path.append("..")
+from src.ideformer_client.environment.bash_session import BashSession
+from src.ideformer_client.environment.container_pool import ContainerPool
+from src.ideformer_client.environment.git_command_cache import GitCommandCache
+
+
+class FakeContainer:
+    """
+    Keeps the entries of its working directory, which are added by cloning and removed by `rm -r`.
+    """
+
+    def __init__(self):
+        self.id = str(id(self))
+        self.status = 'created'
+        self.entries = {'.bashrc'}
+
+    def reload(self):
+        pass
+
+    def exec_run(self, command, **kwargs):
+        if isinstance(command, list) and command[:2] == ['rm', '-r']:
+            self.entries -= set(command[3:])
+            return 0, b''
+        if 'ls -A1' in command:
+            return 0, '\n'.join(sorted(self.entries)).encode('utf-8')
+        if 'git clone' in command:
+            self.entries.add('repository')
+        return 0, b''
+
+
+class FakeDockerManager:
+    start_latency = 0.05
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.container = None
+        self.removed = False
+
+    def setup_image(self):
+        pass
+
+    def create_container(self):
+        if self.fail:
+            raise RuntimeError('Could not start container.')
+        self.container = FakeContainer()
+        return self.container
+
+    async def astart_container(self):
+        await asyncio.sleep(self.start_latency)
+        self.container.status = 'running'
+        return self.container
+
+    def stop_and_remove_container(self):
+        self.removed = True
+
+
+class ContainerPoolTestCase(unittest.TestCase):
+
+    def test_should_hand_out_started_containers(self):
+        async def run():
+            container_pool = ContainerPool(FakeDockerManager, size=2)
+            await container_pool.start()
+            await asyncio.sleep(4 * FakeDockerManager.start_latency)
+
+            docker_managers = [await container_pool.acquire(), await container_pool.acquire()]
+            # The pool is exhausted, thus this acquisition waits for a container started in the background
+            docker_managers.append(await container_pool.acquire())
+
+            self.assertEqual(len({id(docker_manager) for docker_manager in docker_managers}), 3)
+            self.assertTrue(all(docker_manager.container.status == 'running' for docker_manager in docker_managers))
+            await container_pool.close()
+            self.assertTrue(all(docker_manager.removed for docker_manager in docker_managers))
+            return container_pool.get_metrics()
+
+        metrics = asyncio.run(run())
+
+        self.assertEqual((metrics['hits'], metrics['misses']), (2, 1))
+        self.assertLess(metrics['median_acquisition_latency'], FakeDockerManager.start_latency)
+        self.assertGreater(metrics['max_acquisition_latency'], 0)
+
+    def test_should_reset_and_recycle_released_containers(self):
+        async def run():
+            container_pool = ContainerPool(FakeDockerManager, size=1)
+            await container_pool.start()
+            docker_manager = await container_pool.acquire()
+            docker_manager.container.exec_run('/bin/bash -c "git clone https://github.com/owner/repository.git"')
+
+            await container_pool.release(docker_manager)
+
+            self.assertFalse(docker_manager.removed)
+            self.assertEqual(docker_manager.container.entries, {'.bashrc'})
+            self.assertIn(docker_manager, [await container_pool.acquire(), await container_pool.acquire()])
+            await container_pool.close()
+
+        asyncio.run(run())
+
+    def test_should_replace_broken_and_worn_out_containers(self):
+        async def run():
+            container_pool = ContainerPool(FakeDockerManager, size=1, max_uses=1)
+            await container_pool.start()
+
+            broken_docker_manager = await container_pool.acquire()
+            broken_docker_manager.container.status = 'exited'
+            await container_pool.release(broken_docker_manager)
+            self.assertTrue(broken_docker_manager.removed)
+
+            worn_out_docker_manager = await container_pool.acquire()
+            await container_pool.release(worn_out_docker_manager)
+            self.assertTrue(worn_out_docker_manager.removed)
+
+            docker_manager = await container_pool.acquire()
+            self.assertNotIn(docker_manager, [broken_docker_manager, worn_out_docker_manager])
+            self.assertEqual(docker_manager.container.status, 'running')
+            await container_pool.close()
+
+        asyncio.run(run())
+
+    def test_should_drop_session_and_command_cache_of_removed_containers(self):
+        async def run():
+            container_pool = ContainerPool(FakeDockerManager, size=1)
+            await container_pool.start()
+
+            docker_manager = await container_pool.acquire()
+            container = docker_manager.container
+            GitCommandCache.for_container(container)
+            BashSession.open(container, '/root')
+            await container_pool.release(docker_manager, healthy=False)
+            await container_pool.close()
+            return container
+
+        container = asyncio.run(run())
+
+        self.assertNotIn(container.id, GitCommandCache._caches)
+        self.assertNotIn(container.id, BashSession._sessions)
+
+    def test_should_raise_if_container_cannot_be_started(self):
+        async def run():
+            container_pool = ContainerPool(lambda: FakeDockerManager(fail=True), size=1)
+            await container_pool.start()
+            with self.assertRaises(RuntimeError):
+                await container_pool.acquire()
+            await container_pool.close()
+
+        asyncio.run(run())
+
+
+if __name__ == '__main__':
+    unittest.main()
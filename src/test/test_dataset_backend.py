@@ -0,0 +1,64 @@
+import unittest
+import json
+import os
+import tempfile
+import pyarrow.parquet as pq
+from dataclasses import asdict
+from sys import path
+
+path.append("..")
+from src.ideformer_client.data.dataset_backend import JsonlDatasetBackend, ParquetDatasetBackend
+from src.ideformer_client.data.git_dataset_provider import GitDatasetProvider
+from src.ideformer_client.environment.scenario_type import ScenarioType
+
+
+class DatasetBackendTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        os.chdir('../..')
+        cls.path_to_dataset = os.path.join(os.getcwd(), 'data', 'kotlin_subset.parquet')
+
+    def test_parquet_backend_should_stream_scraper_output_as_repository_data_rows(self):
+        target = pq.read_table(self.path_to_dataset, columns=['name', 'n_merge_scenarios']).to_pylist()
+
+        repositories = list(ParquetDatasetBackend(self.path_to_dataset, programming_language='kotlin',
+                                                  batch_size=7).get_dataset_stream())
+
+        self.assertEqual([repository.name for repository in repositories], [row['name'] for row in target])
+        for repository, row in zip(repositories, target):
+            self.assertEqual(repository.programming_language, 'kotlin')
+            if row['n_merge_scenarios'] is not None:
+                self.assertEqual(len(repository.merge_scenarios), row['n_merge_scenarios'])
+
+        # The programming language is filtered during the scan
+        self.assertEqual(list(ParquetDatasetBackend(self.path_to_dataset,
+                                                    programming_language='java').get_dataset_stream()), [])
+
+    def test_parquet_backend_should_only_read_requested_scenario_types(self):
+        repositories = ParquetDatasetBackend(self.path_to_dataset,
+                                             scenario_types=['cherry_pick_scenarios']).get_dataset_stream()
+        git_dataset_provider = GitDatasetProvider(repositories)
+
+        amount_of_cherry_pick_scenarios = 0
+        for repository in git_dataset_provider.stream_repositories():
+            self.assertIsNone(repository.merge_scenarios)
+            amount_of_cherry_pick_scenarios += len(git_dataset_provider.get_scenarios_for(ScenarioType.CHERRY_PICK))
+        self.assertGreater(amount_of_cherry_pick_scenarios, 0)
+
+    def test_jsonl_backend_should_stream_same_rows_as_parquet_backend(self):
+        target_repositories = list(ParquetDatasetBackend(self.path_to_dataset).get_dataset_stream())
+
+        with tempfile.TemporaryDirectory() as directory:
+            path_to_jsonl = os.path.join(directory, 'dataset.jsonl')
+            with open(path_to_jsonl, 'w', encoding='utf-8') as file:
+                for repository in target_repositories:
+                    file.write(json.dumps(asdict(repository)) + '\n')
+
+            repositories = list(JsonlDatasetBackend(path_to_jsonl).get_dataset_stream())
+
+        self.assertEqual(repositories, target_repositories)
+
+
+if __name__ == '__main__':
+    unittest.main()
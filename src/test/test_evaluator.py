@@ -1,8 +1,12 @@
 import unittest
+import subprocess
+import tempfile
 from unittest.mock import MagicMock
 
+from src.ideformer_client.environment.evaluation_mode import EvaluationMode
 from src.ideformer_client.environment.evaluator import Evaluator, ScenarioEnvironmentException
 from src.ideformer_client.environment.scenario_type import ScenarioType
+from src.test.helpers import LocalContainer
 
 
 class TestEvaluator(unittest.TestCase):
@@ -115,5 +119,72 @@ class TestEvaluator(unittest.TestCase):
         result = self.evaluator._evaluate_clean_local_branch_before_push()
         self.assertFalse(result)
 
+class TestTreeOidEvaluation(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self._git('init', '-q', '-b', 'main')
+        self._commit('a.txt', 'a\n')
+        self.first_commit = self._commit('b.txt', 'b\n')
+        self._commit('b.txt', 'b\nc\n')
+        self.last_commit = self._commit('b.txt', 'b\nc\nd\n')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _git(self, *arguments) -> str:
+        return subprocess.run(['git', '-c', 'user.name=test', '-c', 'user.email=test@example.com', *arguments],
+                              cwd=self.directory.name, check=True, stdout=subprocess.PIPE).stdout.decode('utf-8').strip()
+
+    def _commit(self, file: str, content: str) -> str:
+        with open(f'{self.directory.name}/{file}', 'w') as f:
+            f.write(content)
+        self._git('add', file)
+        self._git('commit', '-q', '-m', f'Change {file}')
+        return self._git('rev-parse', 'HEAD')
+
+    def _evaluate_in_all_modes(self, scenario_type, scenario):
+        results = []
+        for evaluation_mode, host_repository_path in ((EvaluationMode.DIFF, None), (EvaluationMode.TREE_OID, None),
+                                                      (EvaluationMode.TREE_OID, self.directory.name)):
+            evaluator = Evaluator(LocalContainer(), 'agent', self.directory.name, scenario_type, scenario,
+                                  evaluation_mode=evaluation_mode, host_repository_path=host_repository_path)
+            results.append(evaluator.evaluate())
+        return results
+
+    def test_should_compare_trees_like_diff(self):
+        scenario = {'merge_commit_hash': self.last_commit}
+        # Same tree as the ground truth, but a different commit
+        self._git('checkout', '-q', '-b', 'agent', self.first_commit)
+        with open(f'{self.directory.name}/b.txt', 'w') as f:
+            f.write('b\nc\nd\n')
+        self._git('commit', '-q', '-am', 'Squash')
+        self.assertEqual(self._evaluate_in_all_modes(ScenarioType.MERGE, scenario), [True] * 3)
+
+        self._commit('a.txt', 'changed\n')
+        self.assertEqual(self._evaluate_in_all_modes(ScenarioType.MERGE, scenario), [False] * 3)
+
+    def test_should_compare_file_tree_entries_like_diff(self):
+        scenario = {'file': 'b.txt', 'first_commit': self.first_commit, 'last_commit': self.last_commit,
+                    'times_seen_consecutively': 2}
+        self._git('checkout', '-q', '-b', 'agent', self.last_commit)
+        # The agent reverts the file to its state at first_commit in one commit, while changing another file
+        self._git('checkout', self.first_commit, '--', 'b.txt')
+        self._commit('a.txt', 'changed\n')
+        self.assertEqual(self._evaluate_in_all_modes(ScenarioType.FILE_COMMIT_GRAM_REBASE, scenario), [True] * 3)
+        self.assertEqual(self._evaluate_in_all_modes(ScenarioType.FILE_COMMIT_GRAM_CHUNK, scenario), [False] * 3)
+
+        self._commit('c.txt', 'c\n')
+        self.assertEqual(self._evaluate_in_all_modes(ScenarioType.FILE_COMMIT_GRAM_CHUNK, scenario), [True] * 3)
+        self._commit('b.txt', 'changed\n')
+        self.assertEqual(self._evaluate_in_all_modes(ScenarioType.FILE_COMMIT_GRAM_CHUNK, scenario), [False] * 3)
+
+    def test_should_raise_if_branch_does_not_exist(self):
+        evaluator = Evaluator(LocalContainer(), 'agent', self.directory.name, ScenarioType.CHERRY_PICK,
+                              {'cherry_pick_commit': self.last_commit}, evaluation_mode=EvaluationMode.TREE_OID)
+        with self.assertRaises(ScenarioEnvironmentException):
+            evaluator.evaluate()
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+import os
+from unittest.mock import patch
+from git import Repo
+from sys import path
+
+path.append("..")
+from src.repository_data_scraper.commit_stream import stream_commit_records
+from src.repository_data_scraper.git_batch_worker import GitBatchWorker
+from src.repository_data_scraper.programming_language import ProgrammingLanguage
+from src.repository_data_scraper.repository_data_scraper import RepositoryDataScraper
+
+
+class GitBatchWorkerTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        os.chdir('../..')
+        cls.path_to_repositories = os.path.join(os.getcwd(), 'repos', 'testing-repositories')
+        cls.repository = Repo(os.path.join(cls.path_to_repositories, 'demo-repo.git'))
+        branch_heads = [ref.commit.hexsha for ref in cls.repository.references if 'HEAD' not in ref.name]
+        cls.commit_records = list(stream_commit_records(cls.repository, branch_heads))
+
+    def test_should_return_same_changes_as_commit_stream(self):
+        with GitBatchWorker(self.repository) as git_batch_worker:
+            for commit_record in self.commit_records:
+                self.assertEqual(git_batch_worker.get_changes_in_commit(commit_record.hexsha), commit_record.changes)
+
+    def test_should_return_same_commit_record_as_commit_stream(self):
+        with GitBatchWorker(self.repository) as git_batch_worker:
+            for commit_record in self.commit_records:
+                self.assertEqual(git_batch_worker.get_commit_record(commit_record.hexsha), commit_record)
+
+    def test_should_compute_same_patch_id_for_cherry_pick(self):
+        repository = Repo(os.path.join(self.path_to_repositories, 'mixed-file-types-demo.git'))
+        commits = [('5a64a9cb0e3335b4a774ff8bf72bb28def14934c', '48baa2580692f94643332494d479a06e63f3b5cc'),
+                   ('d973a53d3bb5213bc31c3008baea0e7de6b8889c', '2c8c14e9c5747385b6ce3255d65138164059c779'),
+                   ('2c8c14e9c5747385b6ce3255d65138164059c779', None)]
+
+        with GitBatchWorker(repository) as git_batch_worker:
+            patch_ids = git_batch_worker.compute_patch_ids(commits)
+
+        self.assertEqual(len(patch_ids), 3)
+        self.assertEqual(patch_ids['5a64a9cb0e3335b4a774ff8bf72bb28def14934c'],
+                         patch_ids['d973a53d3bb5213bc31c3008baea0e7de6b8889c'])
+        self.assertNotEqual(patch_ids['5a64a9cb0e3335b4a774ff8bf72bb28def14934c'],
+                            patch_ids['2c8c14e9c5747385b6ce3255d65138164059c779'])
+
+    def test_should_restart_processes_after_close(self):
+        git_batch_worker = GitBatchWorker(self.repository)
+        changes = git_batch_worker.get_changes_in_commit('025e1062182f5ecb404767c17180310923b0f134')
+        git_batch_worker.close()
+
+        self.assertEqual(git_batch_worker.get_changes_in_commit('025e1062182f5ecb404767c17180310923b0f134'), changes)
+        git_batch_worker.close()
+
+    def test_should_raise_for_missing_object(self):
+        with GitBatchWorker(self.repository) as git_batch_worker:
+            with self.assertRaises(ValueError):
+                git_batch_worker.read_object('0' * 40)
+
+    def test_scraper_should_close_its_worker_if_scraping_fails(self):
+        repository_data_scraper = RepositoryDataScraper(repository=self.repository,
+                                                        programming_language=ProgrammingLanguage.TEXT,
+                                                        repository_name='demo-repo')
+        git_batch_worker = repository_data_scraper.git_batch_worker
+
+        def fail_traversal(branch_head):
+            git_batch_worker.read_object(branch_head)
+            raise RuntimeError('Traversal failed')
+
+        with patch.object(repository_data_scraper, '_traverse_branch', side_effect=fail_traversal):
+            with self.assertRaises(RuntimeError):
+                repository_data_scraper.scrape()
+        self.assertIsNone(git_batch_worker._cat_file_process)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+from sys import path
+from types import SimpleNamespace
+
+path.append("..")
+from src.ideformer_client.environment.git_command_cache import GitCommandCache
+
+
+class GitCommandCacheTestCase(unittest.TestCase):
+
+    def test_should_only_allow_single_read_only_git_commands(self):
+        for command in ['git status', 'git log --oneline -n 5', 'git diff --cached -- "src/main file.kt"',
+                        'git branch', 'git branch -a', 'git show HEAD~1:README.md']:
+            self.assertTrue(GitCommandCache.is_read_only(command), command)
+        for command in ['git commit -m "Message"', 'git branch new-branch', 'git branch -D main',
+                        'git diff --output=patch.diff', 'git status; rm file', 'git log > log.txt',
+                        'git -c core.pager=evil log', 'git log $(touch file)', 'ls', 'git', 'git status "']:
+            self.assertFalse(GitCommandCache.is_read_only(command), command)
+
+    def test_should_serve_repeated_commands_until_mutating_command(self):
+        cache = GitCommandCache()
+        self.assertIsNone(cache.get('/repository', 'git status'))
+        cache.put('/repository', 'git status', 'On branch main\n', 0.05)
+        cache.put('/repository', 'git commit -m "Message"', '', 0.05)
+
+        # The normalized command is served, also from a different spelling
+        self.assertEqual(cache.get('/repository', 'git  status').output, 'On branch main\n')
+        self.assertIsNone(cache.get('/other-repository', 'git status'))
+        self.assertIsNone(cache.get('/repository', 'git commit -m "Message"'))
+        self.assertIsNone(cache.get('/repository', 'git status'))
+
+        self.assertEqual(cache.get_metrics(), {'hits': 1, 'misses': 3, 'hit_rate': 0.25, 'saved_ms': 50.0})
+
+    def test_should_keep_one_cache_per_container(self):
+        container = SimpleNamespace(id='container')
+        cache = GitCommandCache.for_container(container)
+        cache.put('/repository', 'git status', 'On branch main\n', 0.05)
+
+        self.assertIs(GitCommandCache.for_container(SimpleNamespace(id='container')), cache)
+        self.assertIsNot(GitCommandCache.for_container(SimpleNamespace(id='other-container')), cache)
+        cache.reset()
+        self.assertIsNone(cache.get('/repository', 'git status'))
+        self.assertEqual(cache.get_metrics()['misses'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+from dataclasses import fields
+from sys import path
+
+path.append("..")
+from src.ideformer_client.data.git_dataset_provider import GitDatasetProvider
+from src.ideformer_client.environment.scenario_type import ScenarioType
+from src.yt_scripts.schemas import RepositoryDataRow, RepositoryMetadataRow, to_scenario_rows
+
+
+class GitDatasetProviderTestCase(unittest.TestCase):
+
+    def setUp(self):
+        metadata = {field.name: None for field in fields(RepositoryMetadataRow)}
+        metadata.update({'id': 1, 'name': 'owner/repository'})
+        self.merge_scenarios = [{'merge_commit_hash': str(i), 'had_conflicts': i % 2 == 0, 'parents': ['a', 'b']}
+                                for i in range(10)]
+        self.file_commit_gram_scenarios = [{'file': 'document.txt', 'branch': 'master', 'first_commit': 'a',
+                                            'last_commit': 'c', 'times_seen_consecutively': 3}]
+        repository = RepositoryDataRow(
+            **metadata,
+            file_commit_gram_scenarios=to_scenario_rows('file_commit_gram_scenarios', self.file_commit_gram_scenarios),
+            merge_scenarios=to_scenario_rows('merge_scenarios', self.merge_scenarios),
+            cherry_pick_scenarios=None, error=None)
+
+        self.git_dataset_provider = GitDatasetProvider([repository])
+        next(self.git_dataset_provider.stream_repositories())
+
+    def test_should_skip_and_limit_scenarios(self):
+        scenarios = list(self.git_dataset_provider.iter_scenarios_for(ScenarioType.MERGE, skip=3, limit=2))
+
+        self.assertEqual(scenarios, self.merge_scenarios[3:5])
+        self.assertEqual(self.git_dataset_provider.get_scenarios_for(ScenarioType.MERGE), self.merge_scenarios)
+        self.assertEqual(self.git_dataset_provider.get_scenarios_for(ScenarioType.CHERRY_PICK), [])
+
+    def test_should_sample_scenarios_reproducibly(self):
+        sample = list(self.git_dataset_provider.iter_scenarios_for(ScenarioType.MERGE, sample_size=4, seed=42))
+
+        self.assertEqual(len(sample), 4)
+        self.assertEqual(len({scenario['merge_commit_hash'] for scenario in sample}), 4)
+        self.assertEqual(list(self.git_dataset_provider.iter_scenarios_for(ScenarioType.MERGE, sample_size=4, seed=42)),
+                         sample)
+
+    def test_should_convert_each_scenario_once(self):
+        scenario = next(self.git_dataset_provider.iter_scenarios_for(ScenarioType.FILE_COMMIT_GRAM_REBASE))
+        # Callers receive copies, modifying them must not affect later iterations
+        scenario['repository'] = 'owner/repository'
+
+        self.assertEqual(list(self.git_dataset_provider.iter_scenarios_for(ScenarioType.FILE_COMMIT_GRAM_CHUNK)),
+                         self.file_commit_gram_scenarios)
+        self.assertEqual(len(self.git_dataset_provider._scenario_cache), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+import unittest
+from sys import path
+
+path.append("..")
+from src.ideformer_client.environment.head_tail_output import HeadTailOutput
+
+
+class HeadTailOutputTestCase(unittest.TestCase):
+
+    def test_should_keep_output_within_budget(self):
+        output = HeadTailOutput(100)
+        output.write(b'line 1\n')
+        output.write('äöü\n'.encode('utf-8'))
+
+        self.assertEqual(output.getvalue(), 'line 1\näöü\n')
+        self.assertEqual(output.total_num_bytes, 14)
+
+    def test_should_keep_head_and_tail_of_long_output(self):
+        output = HeadTailOutput(10)
+        for i in range(100000):
+            output.write(f'{i:05d}\n'.encode('utf-8'))
+
+        self.assertEqual(output.getvalue(), '00000\n[... 599990 bytes of output elided, 600000 bytes in total ...]\n'
+                                            '9999\n')
+        # The tail window only holds the chunks it needs
+        self.assertLessEqual(len(output._tail), 7)
+
+    def test_should_not_split_characters_at_window_boundaries(self):
+        output = HeadTailOutput(5)
+        output.write('ä'.encode('utf-8') * 1000)
+
+        head, tail = output.getvalue().split('\n[...')[0], output.getvalue().split('...]\n')[1]
+        self.assertEqual((head, tail), ('ää', 'äää'))
+
+
+if __name__ == '__main__':
+    unittest.main()
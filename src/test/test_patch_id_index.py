@@ -0,0 +1,72 @@
+import unittest
+import os
+import tempfile
+import pandas as pd
+from git import Repo
+from sys import path
+
+path.append("..")
+from src.repository_data_scraper.git_batch_worker import GitBatchWorker
+from src.repository_data_scraper.patch_id_index import PatchIdIndex
+from src.repository_data_scraper import main
+
+
+class PatchIdIndexTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        os.chdir('../..')
+        cls.path_to_repositories = os.path.join(os.getcwd(), 'repos', 'testing-repositories')
+        cls.repository = Repo(os.path.join(cls.path_to_repositories, 'mixed-file-types-demo.git'))
+        cls.commits = [('5a64a9cb0e3335b4a774ff8bf72bb28def14934c', '48baa2580692f94643332494d479a06e63f3b5cc'),
+                       ('d973a53d3bb5213bc31c3008baea0e7de6b8889c', '2c8c14e9c5747385b6ce3255d65138164059c779'),
+                       ('2c8c14e9c5747385b6ce3255d65138164059c779', None)]
+
+    def test_should_group_commits_by_patch_id(self):
+        patch_id_index = PatchIdIndex()
+        with GitBatchWorker(self.repository) as git_batch_worker:
+            patch_id_index.update(git_batch_worker, self.commits, batch_size=2)
+
+        self.assertEqual(len(patch_id_index), 3)
+        self.assertEqual(patch_id_index.amount_of_patch_ids, 2)
+        self.assertEqual(list(patch_id_index.groups()),
+                         [['5a64a9cb0e3335b4a774ff8bf72bb28def14934c', 'd973a53d3bb5213bc31c3008baea0e7de6b8889c']])
+
+    def test_should_restore_persisted_index(self):
+        patch_id_index = PatchIdIndex()
+        with GitBatchWorker(self.repository) as git_batch_worker:
+            patch_id_index.update(git_batch_worker, self.commits)
+
+        with tempfile.TemporaryDirectory() as directory:
+            index_path = os.path.join(directory, 'patch-ids.bin')
+            patch_id_index.save(index_path)
+            restored_patch_id_index = PatchIdIndex.load(index_path)
+
+        self.assertEqual(len(restored_patch_id_index), len(patch_id_index))
+        for hexsha, _ in self.commits:
+            self.assertEqual(restored_patch_id_index.patch_id_of(hexsha), patch_id_index.patch_id_of(hexsha))
+
+    def test_should_not_recompute_indexed_commits(self):
+        patch_id_index = PatchIdIndex()
+        with GitBatchWorker(self.repository) as git_batch_worker:
+            patch_id_index.update(git_batch_worker, self.commits)
+        # The worker is not needed, since all commits are indexed already
+        patch_id_index.update(None, self.commits)
+
+        self.assertEqual(len(patch_id_index), 3)
+
+    def test_scrape_via_main_should_use_patch_id_index(self):
+        self.addCleanup(os.chdir, os.getcwd())
+        with tempfile.TemporaryDirectory() as directory:
+            # Parsed like the --cherry-pick-detection argument of main
+            repository_metadata = main.scrape_cloned_repository(
+                self.repository, pd.Series({'name': 'demo/mixed-file-types-demo'}),
+                main.ProgrammingLanguage.PYTHON, 2, main.CherryPickDetection('patch_id'), directory, None, None)
+
+            self.assertNotIn('error', repository_metadata)
+            patch_id_index = PatchIdIndex.load(os.path.join(directory, 'demo__mixed-file-types-demo.bin'))
+        self.assertGreater(len(patch_id_index), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+import unittest
+import os
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from git import Repo
+from sys import path
+
+path.append("..")
+from src.repository_data_scraper.clone_strategy import CloneStrategy, clone_repository
+from src.repository_data_scraper.programming_language import ProgrammingLanguage
+from src.repository_data_scraper.repository_cache import RepositoryCache
+from src.repository_data_scraper.repository_data_scraper import RepositoryDataScraper
+from src.repository_data_scraper import main
+from src.test.helpers import copy_fixture
+
+
+class RepositoryCacheTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        os.chdir('../..')
+        cls.path_to_repositories = os.path.join(os.getcwd(), 'repos', 'testing-repositories')
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache_directory = os.path.join(self.directory, 'cache')
+
+        # Serve copies of the fixtures, whose packed refs have line endings git accepts
+        self.source_directory = os.path.join(self.directory, 'sources')
+        for name in ['mixed-file-types-demo', 'demo-repo']:
+            copy_fixture(os.path.join(self.path_to_repositories, f'{name}.git'),
+                         os.path.join(self.source_directory, name))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _create_repository_cache(self, disk_budget: int = 1024 ** 3) -> RepositoryCache:
+        return RepositoryCache(self.cache_directory, disk_budget,
+                               url_template=f'file://{self.source_directory}/{{name}}')
+
+    @staticmethod
+    def _get_branches(repository: Repo) -> dict:
+        return {head.name: head.commit.hexsha for head in repository.heads}
+
+    @staticmethod
+    def _get_remote_branches(mirror: Repo) -> dict:
+        return {ref.remote_head: ref.commit.hexsha for ref in mirror.remotes.origin.refs}
+
+    def test_should_reuse_and_refresh_mirror(self):
+        repository_cache = self._create_repository_cache()
+        source_repository = Repo(os.path.join(self.source_directory, 'mixed-file-types-demo'))
+
+        with repository_cache.use('mixed-file-types-demo') as mirror:
+            self.assertTrue(mirror.bare)
+            self.assertEqual(mirror.git_dir, repository_cache.get_mirror_path('mixed-file-types-demo'))
+            self.assertEqual(self._get_remote_branches(mirror), self._get_branches(source_repository))
+            self.assertEqual(self._get_branches(mirror), {'master': source_repository.heads['master'].commit.hexsha})
+
+        # Add a branch and move two others in the source, including the default branch, a refresh must pick up all
+        master = source_repository.heads['master'].commit
+        subprocess.run(['git', '--git-dir', source_repository.git_dir, 'branch', 'new-branch', master.hexsha],
+                       check=True)
+        subprocess.run(['git', '--git-dir', source_repository.git_dir, 'update-ref', 'refs/heads/foo',
+                        master.parents[0].hexsha], check=True)
+        subprocess.run(['git', '--git-dir', source_repository.git_dir, 'update-ref', 'refs/heads/master',
+                        master.parents[0].hexsha], check=True)
+
+        with repository_cache.use('mixed-file-types-demo') as mirror:
+            self.assertEqual(self._get_remote_branches(mirror), self._get_branches(source_repository))
+            self.assertEqual(self._get_branches(mirror), {'master': master.parents[0].hexsha})
+
+    def test_should_share_mirror_in_use_without_refreshing_it(self):
+        repository_cache = self._create_repository_cache()
+
+        with repository_cache.use('demo-repo') as mirror:
+            branches = self._get_remote_branches(mirror)
+            subprocess.run(['git', '--git-dir', os.path.join(self.source_directory, 'demo-repo'), 'update-ref',
+                            'refs/heads/new-branch', mirror.heads['master'].commit.hexsha], check=True)
+
+            # Waiting for the first consumer to refresh the mirror would block until it leaves its context
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                def use_concurrently():
+                    with repository_cache.use('demo-repo') as shared_mirror:
+                        return self._get_remote_branches(shared_mirror)
+
+                self.assertEqual(executor.submit(use_concurrently).result(timeout=10), branches)
+
+        with repository_cache.use('demo-repo') as mirror:
+            self.assertIn('new-branch', self._get_remote_branches(mirror))
+
+    def test_should_evict_least_recently_used_mirror(self):
+        repository_cache = self._create_repository_cache()
+        with repository_cache.use('mixed-file-types-demo'):
+            pass
+        with repository_cache.use('demo-repo'):
+            pass
+
+        # The budget only fits the mirror that is in use, the other one is evicted
+        repository_cache.disk_budget = 0
+        with repository_cache.use('demo-repo'):
+            self.assertFalse(os.path.exists(repository_cache.get_mirror_path('mixed-file-types-demo')))
+            self.assertTrue(os.path.exists(repository_cache.get_mirror_path('demo-repo')))
+
+    def test_mirror_should_yield_same_scenarios(self):
+        def scrape(repository: Repo) -> dict:
+            repository_data_scraper = RepositoryDataScraper(repository=repository,
+                                                            programming_language=ProgrammingLanguage.TEXT,
+                                                            repository_name='mixed-file-types-demo',
+                                                            sliding_window_size=2)
+            repository_data_scraper.scrape()
+            return repository_data_scraper.accumulator
+
+        # The scenarios of a regular clone, whose branches differ from the ones of the bare source
+        target_accumulator = scrape(clone_repository(f'file://{self.source_directory}/mixed-file-types-demo',
+                                                     os.path.join(self.directory, 'target'), CloneStrategy.FULL))
+
+        repository_cache = self._create_repository_cache()
+        with repository_cache.use('mixed-file-types-demo') as mirror:
+            self.assertEqual(scrape(mirror), target_accumulator)
+
+    def test_scrape_via_main_should_use_mirror(self):
+        self.addCleanup(os.chdir, os.getcwd())
+        # Created like for the --repository-cache argument of main, with the default clone strategy
+        repository_cache = main.create_repository_cache(self.cache_directory, 1, main.CloneStrategy('full'))
+        repository_cache.url_template = f'file://{self.source_directory}/{{name}}'
+
+        repository_metadata = main.scrape_repository(pd.Series({'name': 'mixed-file-types-demo'}), self.directory,
+                                                     main.ProgrammingLanguage.TEXT, 2,
+                                                     repository_cache=repository_cache)
+
+        self.assertNotIn('error', repository_metadata)
+        self.assertGreater(repository_metadata['n_file_commit_gram_scenarios'], 0)
+        self.assertTrue(os.path.exists(repository_cache.get_mirror_path('mixed-file-types-demo')))
+
+    def test_should_reject_strategies_with_working_tree(self):
+        with self.assertRaises(ValueError):
+            RepositoryCache(self.cache_directory, 0, clone_strategy=CloneStrategy.FULL)
+
+    def test_should_fall_back_to_bare_mirrors_for_strategies_with_working_tree(self):
+        for clone_strategy, mirror_clone_strategy in [(CloneStrategy.FULL, CloneStrategy.BARE),
+                                                      (CloneStrategy.NO_CHECKOUT, CloneStrategy.BARE),
+                                                      (CloneStrategy.BLOBLESS, CloneStrategy.BLOBLESS)]:
+            repository_cache = RepositoryCache.for_clone_strategy(self.cache_directory, 0, clone_strategy)
+
+            self.assertEqual(repository_cache.clone_strategy, mirror_clone_strategy)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import unittest
+import json
+import os
+import tempfile
+import pyarrow.parquet as pq
+from dataclasses import fields
+from sys import path
+
+path.append("..")
+from src.yt_scripts.mappers import ErrorFilteringMapper, ScenarioColumnMigrationMapper, ScenarioFlatteningMapper
+from src.yt_scripts.schemas import CherryPickScenario, LegacyRepositoryDataRow, RepositoryMetadataRow, \
+    to_scenario_dicts
+from src.yt_scripts.yt_maintenance_utils import write_scenario_rows_to_parquet
+
+
+class ScenarioColumnsTestCase(unittest.TestCase):
+    file_commit_gram_scenarios = [{'file': 'document.txt', 'branch': 'master', 'first_commit': 'a',
+                                   'last_commit': 'c', 'times_seen_consecutively': 3}]
+    merge_scenarios = [{'merge_commit_hash': 'd', 'had_conflicts': True, 'parents': ['b', 'c']}]
+    cherry_pick_scenarios = [{'cherry_pick_commit': 'e', 'cherry_commit': 'a', 'parents': ['d']},
+                             {'cherry_pick_commit': 'f', 'cherry_commit': 'b', 'parents': ['d', 'e']}]
+
+    @staticmethod
+    def _create_legacy_row(**columns) -> LegacyRepositoryDataRow:
+        metadata = {field.name: None for field in fields(RepositoryMetadataRow)}
+        metadata.update({'id': 1, 'name': 'owner/repository'})
+        return LegacyRepositoryDataRow(**metadata, **columns)
+
+    def test_migration_should_parse_legacy_scenario_columns(self):
+        legacy_row = self._create_legacy_row(file_commit_gram_scenarios=str(self.file_commit_gram_scenarios),
+                                             merge_scenarios=str(self.merge_scenarios),
+                                             cherry_pick_scenarios=str(self.cherry_pick_scenarios),
+                                             error=None)
+
+        rows = list(ScenarioColumnMigrationMapper()(legacy_row))
+
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0].name, 'owner/repository')
+        self.assertEqual(to_scenario_dicts(rows[0].file_commit_gram_scenarios), self.file_commit_gram_scenarios)
+        self.assertEqual(to_scenario_dicts(rows[0].merge_scenarios), self.merge_scenarios)
+        self.assertEqual(to_scenario_dicts(rows[0].cherry_pick_scenarios), self.cherry_pick_scenarios)
+
+    def test_migration_should_keep_missing_scenario_columns_missing(self):
+        legacy_row = self._create_legacy_row(file_commit_gram_scenarios=None, merge_scenarios='nan',
+                                             cherry_pick_scenarios='None', error='Traceback ...')
+
+        row = next(iter(ScenarioColumnMigrationMapper()(legacy_row)))
+
+        self.assertIsNone(row.file_commit_gram_scenarios)
+        self.assertIsNone(row.merge_scenarios)
+        self.assertIsNone(row.cherry_pick_scenarios)
+        self.assertEqual(row.error, 'Traceback ...')
+
+    def test_error_filtering_should_drop_cherry_picks_of_merges(self):
+        legacy_row = self._create_legacy_row(file_commit_gram_scenarios='[]', merge_scenarios='[]',
+                                             cherry_pick_scenarios=str(self.cherry_pick_scenarios), error=None)
+        row = next(iter(ScenarioColumnMigrationMapper()(legacy_row)))
+
+        rows = list(ErrorFilteringMapper()(row))
+
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0].cherry_pick_scenarios, [CherryPickScenario(cherry_pick_commit='e', cherry_commit='a',
+                                                                            parents=['d'])])
+
+    def test_flattening_should_yield_one_row_per_scenario(self):
+        legacy_row = self._create_legacy_row(file_commit_gram_scenarios=str(self.file_commit_gram_scenarios),
+                                             merge_scenarios=str(self.merge_scenarios),
+                                             cherry_pick_scenarios=str(self.cherry_pick_scenarios), error=None)
+        row = next(iter(ScenarioColumnMigrationMapper()(legacy_row)))
+
+        scenario_rows = list(ScenarioFlatteningMapper()(row))
+
+        self.assertEqual([(scenario_row.scenario_type, scenario_row.id) for scenario_row in scenario_rows],
+                         [('file_commit_gram_scenarios', 0), ('merge_scenarios', 0), ('cherry_pick_scenarios', 0),
+                          ('cherry_pick_scenarios', 1)])
+        self.assertEqual(to_scenario_dicts([scenario_rows[3].cherry_pick_scenario]), self.cherry_pick_scenarios[1:])
+        self.assertIsNone(scenario_rows[3].merge_scenario)
+
+    def test_parquet_export_should_group_row_groups_by_scenario_type(self):
+        legacy_row = self._create_legacy_row(file_commit_gram_scenarios=str(self.file_commit_gram_scenarios * 3),
+                                             merge_scenarios=str(self.merge_scenarios * 3),
+                                             cherry_pick_scenarios=str(self.cherry_pick_scenarios), error=None)
+        row = next(iter(ScenarioColumnMigrationMapper()(legacy_row)))
+
+        with tempfile.TemporaryDirectory() as directory:
+            output_path = os.path.join(directory, 'scenarios.parquet')
+            write_scenario_rows_to_parquet(ScenarioFlatteningMapper()(row), output_path, row_group_size=2)
+
+            metadata = pq.ParquetFile(output_path).metadata
+            scenario_type_column = metadata.schema.names.index('scenario_type')
+            for row_group in range(metadata.num_row_groups):
+                statistics = metadata.row_group(row_group).column(scenario_type_column).statistics
+                self.assertEqual(statistics.min, statistics.max)
+
+            merge_scenarios = pq.read_table(output_path, filters=[('scenario_type', '=', 'merge_scenarios')])
+            self.assertEqual(merge_scenarios.column('id').to_pylist(), [0, 1, 2])
+            self.assertEqual([json.loads(scenario) for scenario in merge_scenarios.column('scenario').to_pylist()],
+                             self.merge_scenarios * 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
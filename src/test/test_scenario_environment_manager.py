@@ -0,0 +1,161 @@
+import unittest
+import os
+import shutil
+import subprocess
+import tempfile
+from dataclasses import fields
+from sys import path
+
+path.append("..")
+from src.ideformer_client.environment.git_command_cache import GitCommandCache
+from src.ideformer_client.environment.reset_strategy import ResetStrategy
+from src.ideformer_client.environment.scenario_environment_manager import ScenarioEnvironmentManager
+from src.ideformer_client.environment.scenario_type import ScenarioType
+from src.repository_data_scraper.repository_cache import RepositoryCache
+from src.test.helpers import LocalContainer, copy_fixture
+from src.yt_scripts.schemas import RepositoryDataRow, RepositoryMetadataRow
+
+
+class ScenarioEnvironmentManagerTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        os.chdir('../..')
+        cls.path_to_repositories = os.path.join(os.getcwd(), 'repos', 'testing-repositories')
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache_directory = os.path.join(self.directory, 'cache')
+        self.container_directory = os.path.join(self.directory, 'container')
+        os.makedirs(self.container_directory)
+
+        # Serve a copy of the fixture, whose packed refs have line endings git accepts
+        self.source_directory = os.path.join(self.directory, 'sources')
+        copy_fixture(os.path.join(self.path_to_repositories, 'demo-repo.git'),
+                     os.path.join(self.source_directory, 'owner', 'demo-repo'))
+
+        self.repository_cache = RepositoryCache(self.cache_directory, 1024 ** 3,
+                                                url_template=f'file://{self.source_directory}/{{name}}')
+        metadata = {field.name: None for field in fields(RepositoryMetadataRow)}
+        metadata.update({'id': 1, 'name': 'owner/demo-repo'})
+        self.repository = RepositoryDataRow(**metadata, file_commit_gram_scenarios=None, merge_scenarios=None,
+                                            cherry_pick_scenarios=None, error=None)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _git(self, *arguments, directory: str = 'demo-repo') -> str:
+        return subprocess.run(['git', '-C', os.path.join(self.container_directory, directory), *arguments],
+                              check=True, capture_output=True, text=True).stdout.strip()
+
+    def _get_chunk_scenario(self) -> dict:
+        git_dir = os.path.join(self.source_directory, 'owner', 'demo-repo')
+        first_commit = subprocess.run(['git', '--git-dir', git_dir, 'rev-parse', 'master'], check=True,
+                                      capture_output=True, text=True).stdout.strip()
+        file = subprocess.run(['git', '--git-dir', git_dir, 'diff-tree', '--no-commit-id', '--name-only', '-r',
+                               first_commit], check=True, capture_output=True, text=True).stdout.split()[0]
+        return {'file': file, 'branch': 'master', 'first_commit': first_commit, 'last_commit': first_commit,
+                'times_seen_consecutively': 1}
+
+    def _create_scenario_environment_manager(self, reset_strategy: ResetStrategy) -> ScenarioEnvironmentManager:
+        return ScenarioEnvironmentManager(LocalContainer(self.container_directory), self.repository,
+                                          repository_cache_path=self.cache_directory, reset_strategy=reset_strategy)
+
+    def test_should_clone_repository_from_snapshot(self):
+        with self.repository_cache.use(self.repository.name):
+            scenario_environment_manager = ScenarioEnvironmentManager(LocalContainer(self.container_directory),
+                                                                      self.repository,
+                                                                      repository_cache_path=self.cache_directory)
+            scenario_environment_manager.setup_repository()
+
+            # The clone borrows the objects of the mirror instead of copying them
+            with open(os.path.join(self.container_directory, 'demo-repo', '.git', 'objects', 'info',
+                                   'alternates')) as file:
+                self.assertEqual(file.read().strip(),
+                                 os.path.join(self.repository_cache.get_mirror_path(self.repository.name), 'objects'))
+            self.assertEqual(self._git('remote', 'get-url', 'origin'), 'https://github.com/owner/demo-repo.git')
+            # Like a clone from GitHub, the clone has a remote branch for every branch
+            source_branches = subprocess.run(['git', '--git-dir', os.path.join(self.source_directory, 'owner',
+                                                                               'demo-repo'),
+                                              'for-each-ref', '--format=%(refname:lstrip=2)', 'refs/heads'],
+                                             check=True, capture_output=True, text=True).stdout.split()
+            self.assertEqual(self._git('for-each-ref', '--format=%(refname:lstrip=3)', 'refs/remotes/origin').split(),
+                             ['HEAD'] + source_branches)
+            self.assertEqual(scenario_environment_manager.default_branch_name, 'master')
+            self.assertEqual(self._git('rev-parse', 'HEAD'),
+                             subprocess.run(['git', '--git-dir', os.path.join(self.source_directory, 'owner',
+                                                                              'demo-repo'), 'rev-parse', 'master'],
+                                            check=True, capture_output=True, text=True).stdout.strip())
+
+    def test_setting_up_repository_again_should_reset_it_to_snapshot(self):
+        with self.repository_cache.use(self.repository.name):
+            scenario_environment_manager = ScenarioEnvironmentManager(LocalContainer(self.container_directory),
+                                                                      self.repository,
+                                                                      repository_cache_path=self.cache_directory)
+            scenario_environment_manager.setup_repository()
+            snapshot_head = self._git('rev-parse', 'HEAD')
+            self._git('-c', 'user.name=agent', '-c', 'user.email=agent@example.com', 'commit', '--allow-empty',
+                      '-m', 'Change made by the agent')
+
+            scenario_environment_manager.teardown_repository()
+            scenario_environment_manager.setup_repository()
+
+            self.assertEqual(self._git('rev-parse', 'HEAD'), snapshot_head)
+
+    def test_worktree_strategy_should_set_up_same_scenario_as_branch_strategy(self):
+        scenario = self._get_chunk_scenario()
+        scenario_states = {}
+        with self.repository_cache.use(self.repository.name):
+            for reset_strategy in ResetStrategy:
+                scenario_environment_manager = self._create_scenario_environment_manager(reset_strategy)
+                scenario_environment_manager.setup_repository()
+                self.assertEqual(scenario_environment_manager.default_branch_name, 'master')
+
+                scenario_environment_manager.set_scenario(scenario)
+                scenario_environment_manager.set_scenario_type(ScenarioType.FILE_COMMIT_GRAM_CHUNK)
+                scenario_environment_manager.setup_scenario_preconditions()
+                scenario_states[reset_strategy] = (self._git('rev-parse', '--abbrev-ref', 'HEAD'),
+                                                   self._git('rev-parse', 'HEAD'),
+                                                   scenario_environment_manager.provide_scenario_context())
+                self.assertEqual(GitCommandCache.for_container(scenario_environment_manager.container).get(
+                    scenario_environment_manager.repository_work_dir, 'git status').output,
+                    scenario_states[reset_strategy][2]['git_status'])
+
+                scenario_environment_manager.teardown_scenario()
+                scenario_environment_manager.teardown_repository()
+                self.assertEqual(os.listdir(self.container_directory), [])
+
+        # The context serves the agent of the scenario until the teardown
+        self.assertIsNone(GitCommandCache.for_container(LocalContainer(self.container_directory)).get(
+            os.path.join(self.container_directory, 'demo-repo'), 'git status'))
+        self.assertEqual(scenario_states[ResetStrategy.WORKTREE], scenario_states[ResetStrategy.BRANCH])
+        self.assertEqual(scenario_states[ResetStrategy.WORKTREE][0], ScenarioEnvironmentManager.AGENT_TARGET_BRANCH_NAME)
+        self.assertIn(scenario['file'], scenario_states[ResetStrategy.WORKTREE][2]['git_diff_cached'])
+
+    def test_worktree_strategy_should_discard_changes_of_agent(self):
+        scenario = self._get_chunk_scenario()
+        with self.repository_cache.use(self.repository.name):
+            scenario_environment_manager = self._create_scenario_environment_manager(ResetStrategy.WORKTREE)
+            scenario_environment_manager.loose_object_budget = 0
+            scenario_environment_manager.setup_repository()
+            scenario_environment_manager.set_scenario(scenario)
+            scenario_environment_manager.set_scenario_type(ScenarioType.FILE_COMMIT_GRAM_REBASE)
+
+            for _ in range(2):
+                scenario_environment_manager.setup_scenario_preconditions()
+                self._git('-c', 'user.name=agent', '-c', 'user.email=agent@example.com', 'commit', '--allow-empty',
+                          '-m', 'Change made by the agent')
+                with open(os.path.join(self.container_directory, 'demo-repo', 'untracked.txt'), 'w') as file:
+                    file.write('Left behind by the agent')
+
+                scenario_environment_manager.teardown_scenario()
+
+                self.assertFalse(os.path.exists(os.path.join(self.container_directory, 'demo-repo')))
+                self.assertEqual(self._git('branch', '--list', ScenarioEnvironmentManager.AGENT_TARGET_BRANCH_NAME,
+                                           directory='.demo-repo'), '')
+            # The budget of zero loose objects prunes the commits of the agent
+            self.assertTrue(self._git('count-objects', directory='.demo-repo').startswith('0 objects'))
+
+
+if __name__ == '__main__':
+    unittest.main()
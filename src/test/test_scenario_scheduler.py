@@ -0,0 +1,175 @@
+import unittest
+import asyncio
+import subprocess
+import threading
+import time
+from dataclasses import fields
+from sys import path
+
+path.append("..")
+from src.ideformer_client.data.git_dataset_provider import GitDatasetProvider
+from src.ideformer_client.environment.container_pool import ContainerPool
+from src.ideformer_client.environment.scenario_environment_manager import ScenarioEnvironmentManager
+from src.ideformer_client.environment.scenario_type import ScenarioType
+from src.ideformer_client.scenario_scheduler import ScenarioScheduler
+from src.yt_scripts.schemas import RepositoryDataRow, RepositoryMetadataRow, to_scenario_rows
+
+
+class FakeContainer:
+    """
+    Answers the git commands of the scenario environment like a freshly cloned repository, with some latency.
+    """
+    # Stands in for git and the directories of the repository in the scripts of command batches
+    FAKE_COMMANDS = ('git() { case "$*" in "status") echo "On branch main";; "checkout unknown") '
+                     'echo "error: pathspec did not match"; return 1;; esac; }\ncd() { :; }\n')
+
+    def __init__(self):
+        self.id = str(id(self))
+        self.status = 'running'
+        self.commands = []
+
+    def reload(self):
+        pass
+
+    def exec_run(self, command, **kwargs):
+        time.sleep(0.01)
+        self.commands.append(command)
+        if isinstance(command, list):
+            process = subprocess.run([*command[:-1], self.FAKE_COMMANDS + command[-1]], stdout=subprocess.PIPE,
+                                     stderr=subprocess.STDOUT)
+            return process.returncode, process.stdout
+        if 'pwd' in command:
+            return 0, b'/root\n'
+        if 'git status' in command:
+            return 0, b'On branch main\n'
+        if 'git checkout unknown' in command:
+            return 1, b'error: pathspec did not match'
+        return 0, b''
+
+
+class FakeDockerManager:
+
+    def __init__(self):
+        self.container = None
+
+    def setup_image(self):
+        pass
+
+    def create_container(self):
+        self.container = FakeContainer()
+        return self.container
+
+    async def astart_container(self):
+        return self.container
+
+    def stop_and_remove_container(self):
+        self.container = None
+
+
+class StubRunner:
+    """
+    Stands in for the LLM agent, taking a fixed amount of time to solve each scenario.
+    """
+    lock = threading.Lock()
+    running = 0
+    max_running = 0
+
+    def __init__(self, system_prompt, user_prompt, container, workdir):
+        self.user_prompt = user_prompt
+
+    async def arun(self):
+        with self.lock:
+            StubRunner.running += 1
+            StubRunner.max_running = max(StubRunner.max_running, StubRunner.running)
+        await asyncio.sleep(0.2)
+        with self.lock:
+            StubRunner.running -= 1
+
+
+class FailingRunner:
+    """
+    Stands in for an LLM agent that fails, e.g. due to an error of the LLM API.
+    """
+    containers = []
+
+    def __init__(self, system_prompt, user_prompt, container, workdir):
+        FailingRunner.containers.append(container)
+
+    async def arun(self):
+        raise RuntimeError('The agent failed')
+
+
+class ScenarioSchedulerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        StubRunner.running = 0
+        StubRunner.max_running = 0
+
+    @staticmethod
+    def _create_git_dataset_provider(merge_scenarios_per_repository):
+        repositories = []
+        for i, merge_scenarios in enumerate(merge_scenarios_per_repository):
+            metadata = {field.name: None for field in fields(RepositoryMetadataRow)}
+            metadata.update({'id': i, 'name': f'owner/repository-{i}', 'programming_language': 'kotlin'})
+            repositories.append(RepositoryDataRow(**metadata, file_commit_gram_scenarios=None,
+                                                  merge_scenarios=to_scenario_rows('merge_scenarios', merge_scenarios),
+                                                  cherry_pick_scenarios=None, error=None))
+        return GitDatasetProvider(repositories)
+
+    @staticmethod
+    async def _run(git_dataset_provider, runner_factory=StubRunner, **kwargs):
+        container_pool = ContainerPool(FakeDockerManager, size=1)
+        await container_pool.start()
+        run_statistics = await ScenarioScheduler(container_pool, runner_factory, **kwargs).run(git_dataset_provider)
+        await container_pool.close()
+        return run_statistics
+
+    def test_should_solve_scenarios_concurrently(self):
+        merge_scenarios = [{'merge_commit_hash': str(i), 'had_conflicts': True, 'parents': ['a', 'b']}
+                           for i in range(4)]
+        git_dataset_provider = self._create_git_dataset_provider([merge_scenarios, merge_scenarios])
+
+        start = time.perf_counter()
+        run_statistics = asyncio.run(self._run(git_dataset_provider, concurrency=4,
+                                               scenario_types=[ScenarioType.MERGE]))
+        duration = time.perf_counter() - start
+
+        self.assertEqual(StubRunner.max_running, 4)
+        # Solving the 8 scenarios one after another would take at least 1.6 seconds
+        self.assertLess(duration, 1.2)
+        self.assertEqual(run_statistics['totals'][ScenarioType.MERGE.value]['count'], 8)
+        self.assertEqual(run_statistics['successes'][ScenarioType.MERGE.value]['count'], 8)
+        self.assertEqual(sorted((scenario['repository'], scenario['merge_commit_hash'])
+                                for scenario in run_statistics['totals'][ScenarioType.MERGE.value]['scenarios']),
+                         sorted((f'owner/repository-{i}', str(j)) for i in range(2) for j in range(4)))
+
+    def test_should_skip_scenarios_whose_preconditions_fail(self):
+        merge_scenarios = [{'merge_commit_hash': 'c', 'had_conflicts': True, 'parents': ['unknown', 'b']},
+                           {'merge_commit_hash': 'd', 'had_conflicts': True, 'parents': ['a', 'b']}]
+        git_dataset_provider = self._create_git_dataset_provider([merge_scenarios])
+
+        run_statistics = asyncio.run(self._run(git_dataset_provider, concurrency=2,
+                                               scenario_types=[ScenarioType.MERGE], scenarios_per_type=2))
+
+        self.assertEqual([scenario['merge_commit_hash']
+                          for scenario in run_statistics['totals'][ScenarioType.MERGE.value]['scenarios']], ['d'])
+
+    def test_should_tear_down_and_count_scenarios_whose_agent_fails(self):
+        FailingRunner.containers = []
+        merge_scenarios = [{'merge_commit_hash': str(i), 'had_conflicts': True, 'parents': ['a', 'b']}
+                           for i in range(2)]
+        git_dataset_provider = self._create_git_dataset_provider([merge_scenarios])
+
+        run_statistics = asyncio.run(self._run(git_dataset_provider, runner_factory=FailingRunner, concurrency=1,
+                                               scenario_types=[ScenarioType.MERGE], scenarios_per_type=2))
+
+        self.assertEqual(run_statistics['totals'][ScenarioType.MERGE.value]['count'], 2)
+        self.assertEqual(run_statistics['successes'][ScenarioType.MERGE.value]['count'], 0)
+        # Both scenarios ran in the same container, which was reset after each of them
+        self.assertEqual(len(set(FailingRunner.containers)), 1)
+        teardown_command = f'git branch -D {ScenarioEnvironmentManager.AGENT_TARGET_BRANCH_NAME}'
+        self.assertEqual(sum(teardown_command in str(command) for command in FailingRunner.containers[0].commands), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
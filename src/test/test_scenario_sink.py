@@ -0,0 +1,127 @@
+import unittest
+import json
+import os
+import shutil
+import tempfile
+import pyarrow.parquet as pq
+from git import Repo
+from sys import path
+
+path.append("..")
+from src.repository_data_scraper.parquet_scenario_sink import ParquetScenarioSink
+from src.repository_data_scraper.programming_language import ProgrammingLanguage
+from src.repository_data_scraper.repository_data_scraper import RepositoryDataScraper
+from src.repository_data_scraper.scenario_sink import SCENARIO_TYPES
+from src.repository_data_scraper.scrape_checkpoint import ScrapeCheckpoint
+
+
+class ScenarioSinkTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        os.chdir('../..')
+        cls.path_to_repositories = os.path.join(os.getcwd(), 'repos', 'testing-repositories')
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _scrape(self, scenario_sink=None) -> RepositoryDataScraper:
+        repository_data_scraper = RepositoryDataScraper(
+            repository=Repo(os.path.join(self.path_to_repositories, 'mixed-file-types-demo.git')),
+            programming_language=ProgrammingLanguage.TEXT, repository_name='mixed-file-types-demo',
+            sliding_window_size=2, scenario_sink=scenario_sink)
+        repository_data_scraper.scrape()
+        return repository_data_scraper
+
+    def test_parquet_sink_should_store_same_scenarios_as_accumulator(self):
+        target_accumulator = self._scrape().accumulator
+
+        # Flush after every other scenario to produce multiple parts
+        with ParquetScenarioSink(self.directory, 'mixed-file-types-demo', row_group_size=2) as scenario_sink:
+            repository_data_scraper = self._scrape(scenario_sink)
+        self.assertIsNone(repository_data_scraper.accumulator)
+
+        accumulator = {scenario_type: [] for scenario_type in SCENARIO_TYPES}
+        for row in pq.read_table(self.directory).to_pylist():
+            self.assertEqual(row['repository_name'], 'mixed-file-types-demo')
+            accumulator[row['scenario_type']].append(json.loads(row['scenario']))
+
+        self.assertEqual(accumulator, target_accumulator)
+        self.assertGreater(len(os.listdir(self.directory)), 1)
+        self.assertEqual(scenario_sink.amount_of_scenarios['merge_scenarios'],
+                         len(target_accumulator['merge_scenarios']))
+
+    def test_parquet_sink_should_keep_flushed_scenarios_without_closing(self):
+        scenario_sink = ParquetScenarioSink(self.directory, 'repository', row_group_size=2)
+        for i in range(3):
+            scenario_sink.emit('merge_scenarios', {'merge_commit_hash': str(i), 'had_conflicts': i == 0,
+                                                   'parents': []})
+
+        # The last scenario is still buffered, e.g. when the process crashes now
+        self.assertEqual(pq.read_table(self.directory).num_rows, 2)
+        self.assertEqual(scenario_sink.amount_of_merge_scenarios_with_conflicts, 1)
+
+        scenario_sink.close()
+        self.assertEqual(pq.read_table(self.directory).num_rows, 3)
+
+        # A new sink replaces the parts of a previous run
+        ParquetScenarioSink(self.directory, 'repository').close()
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_resumed_parquet_sink_should_hold_all_scenarios_of_incremental_scrape(self):
+        target_accumulator = self._scrape().accumulator
+
+        # Work on a copy, since the branch HEADs are moved
+        repository_path = os.path.join(self.directory, 'mixed-file-types-demo.git')
+        shutil.copytree(os.path.join(self.path_to_repositories, 'mixed-file-types-demo.git'), repository_path)
+        checkpoint_path = os.path.join(self.directory, 'checkpoint')
+        scenarios_path = os.path.join(self.directory, 'scenarios')
+
+        def scrape_incrementally(resume: bool):
+            with ParquetScenarioSink(scenarios_path, 'mixed-file-types-demo', row_group_size=2,
+                                     resume=resume) as scenario_sink:
+                RepositoryDataScraper(repository=Repo(repository_path), programming_language=ProgrammingLanguage.TEXT,
+                                      repository_name='mixed-file-types-demo', sliding_window_size=2,
+                                      checkpoint_path=checkpoint_path, scenario_sink=scenario_sink).scrape()
+            return scenario_sink
+
+        # Loose refs take precedence over packed refs. Rewind master to before the second cherry-pick
+        path_to_master = os.path.join(repository_path, 'refs', 'heads', 'master')
+        with open(path_to_master, 'w') as file:
+            file.write('48baa2580692f94643332494d479a06e63f3b5cc\n')
+        scrape_incrementally(resume=False)
+        with open(path_to_master, 'w') as file:
+            file.write('5a64a9cb0e3335b4a774ff8bf72bb28def14934c\n')
+        scenario_sink = scrape_incrementally(resume=True)
+
+        # The checkpoint does not hold the streamed scenarios
+        self.assertIsNone(ScrapeCheckpoint.load(checkpoint_path).accumulator)
+        accumulator = {scenario_type: [] for scenario_type in SCENARIO_TYPES}
+        for row in pq.read_table(scenarios_path).to_pylist():
+            accumulator[row['scenario_type']].append(json.loads(row['scenario']))
+        for scenario_type in ['merge_scenarios', 'cherry_pick_scenarios']:
+            self.assertCountEqual(accumulator[scenario_type], target_accumulator[scenario_type])
+            self.assertEqual(scenario_sink.amount_of_scenarios[scenario_type], len(accumulator[scenario_type]))
+
+    def test_discarding_resumed_parquet_sink_should_keep_parts_of_previous_run(self):
+        with ParquetScenarioSink(self.directory, 'repository') as scenario_sink:
+            scenario_sink.emit('merge_scenarios', {'merge_commit_hash': '0', 'had_conflicts': True, 'parents': []})
+
+        scenario_sink = ParquetScenarioSink(self.directory, 'repository', row_group_size=1, resume=True)
+        self.assertEqual(scenario_sink.amount_of_merge_scenarios_with_conflicts, 1)
+        for i in range(1, 3):
+            scenario_sink.emit('merge_scenarios', {'merge_commit_hash': str(i), 'had_conflicts': False,
+                                                   'parents': []})
+        self.assertEqual(pq.read_table(self.directory).num_rows, 3)
+
+        scenario_sink.discard()
+        scenario_sink.close()
+        self.assertEqual(pq.read_table(self.directory).column('scenario').to_pylist(),
+                         [json.dumps({'merge_commit_hash': '0', 'had_conflicts': True, 'parents': []})])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,11 +1,15 @@
 import unittest
 import os
+import shutil
+import subprocess
+import tempfile
 from git import Repo
 from sys import path
 
 path.append("..")
 from src.repository_data_scraper.repository_data_scraper import RepositoryDataScraper
 from src.repository_data_scraper.programming_language import ProgrammingLanguage
+from src.repository_data_scraper.cherry_pick_detection import CherryPickDetection
 
 
 class ScrapeTestCase(unittest.TestCase):
@@ -165,6 +169,129 @@ class ScrapeTestCase(unittest.TestCase):
         for candidate_cherry_pick_scenario in candidate_cherry_pick_scenarios:
             self.assertIn(candidate_cherry_pick_scenario, target_cherry_pick_scenarios)
 
+    def test_should_generate_target_cherry_pick_scenarios_by_patch_id(self):
+        demo_repo = Repo(os.path.join(self.path_to_repositories, 'mixed-file-types-demo.git'))
+        os.chdir(os.path.join(self.path_to_repositories, 'mixed-file-types-demo.git'))
+
+        self.repository_data_scraper = RepositoryDataScraper(repository=demo_repo,
+                                                             programming_language=ProgrammingLanguage.TEXT,
+                                                             repository_name='mixed-file-types-demo',
+                                                             sliding_window_size=2,
+                                                             cherry_pick_detection=CherryPickDetection.PATCH_ID)
+
+        # The scenario found via -x also shares its patch id, but must not be duplicated
+        target_cherry_pick_scenarios = [
+            {'cherry_pick_commit': '48baa2580692f94643332494d479a06e63f3b5cc',
+             'cherry_commit': '2c8c14e9c5747385b6ce3255d65138164059c779',
+             'parents': ['c469332e04959f088e0f669c254a18819b6cb791']},
+            {'cherry_pick_commit': '5a64a9cb0e3335b4a774ff8bf72bb28def14934c',
+             'cherry_commit': 'd973a53d3bb5213bc31c3008baea0e7de6b8889c',
+             'parents': ['48baa2580692f94643332494d479a06e63f3b5cc']}]
+
+        self.repository_data_scraper.scrape()
+        candidate_cherry_pick_scenarios = self.repository_data_scraper.accumulator['cherry_pick_scenarios']
+
+        self.assertEqual(len(candidate_cherry_pick_scenarios), len(target_cherry_pick_scenarios))
+
+        for candidate_cherry_pick_scenario in candidate_cherry_pick_scenarios:
+            self.assertIn(candidate_cherry_pick_scenario, target_cherry_pick_scenarios)
+
+    def test_should_find_new_scenarios_when_resuming_from_checkpoint(self):
+        with tempfile.TemporaryDirectory() as directory:
+            # Work on a copy, since the branch HEADs are moved
+            repository_path = os.path.join(directory, 'mixed-file-types-demo.git')
+            shutil.copytree(os.path.join(self.path_to_repositories, 'mixed-file-types-demo.git'), repository_path)
+            checkpoint_path = os.path.join(directory, 'checkpoint')
+            os.chdir(repository_path)
+
+            full_repository_data_scraper = RepositoryDataScraper(repository=Repo(repository_path),
+                                                                 programming_language=ProgrammingLanguage.TEXT,
+                                                                 repository_name='mixed-file-types-demo',
+                                                                 sliding_window_size=2)
+            full_repository_data_scraper.scrape()
+
+            # Loose refs take precedence over packed refs. Rewind master to before the second cherry-pick
+            path_to_master = os.path.join(repository_path, 'refs', 'heads', 'master')
+            with open(path_to_master, 'w') as file:
+                file.write('48baa2580692f94643332494d479a06e63f3b5cc\n')
+            RepositoryDataScraper(repository=Repo(repository_path), programming_language=ProgrammingLanguage.TEXT,
+                                  repository_name='mixed-file-types-demo', sliding_window_size=2,
+                                  checkpoint_path=checkpoint_path).scrape()
+
+            with open(path_to_master, 'w') as file:
+                file.write('5a64a9cb0e3335b4a774ff8bf72bb28def14934c\n')
+            self.repository_data_scraper = RepositoryDataScraper(repository=Repo(repository_path),
+                                                                 programming_language=ProgrammingLanguage.TEXT,
+                                                                 repository_name='mixed-file-types-demo',
+                                                                 sliding_window_size=2,
+                                                                 checkpoint_path=checkpoint_path)
+            self.repository_data_scraper.scrape()
+            os.chdir(self.path_to_repositories)
+
+        # Only the new commit and the commits covered by the keepalive are loaded
+        self.assertLess(sum(self.repository_data_scraper.commit_graph.is_loaded(commit)
+                            for commit in range(len(self.repository_data_scraper.commit_graph))), 5)
+
+        for scenario_type in ['merge_scenarios', 'cherry_pick_scenarios']:
+            candidate_scenarios = self.repository_data_scraper.accumulator[scenario_type]
+            target_scenarios = full_repository_data_scraper.accumulator[scenario_type]
+
+            self.assertEqual(len(candidate_scenarios), len(target_scenarios))
+            for candidate_scenario in candidate_scenarios:
+                self.assertIn(candidate_scenario, target_scenarios)
+
+
+    def test_parallel_scrape_should_equal_sequential_scrape(self):
+        for repository in ['demo-repo.git', 'mixed-file-types-demo.git', 'test-agent-patch-evaluation.git']:
+            accumulators = []
+            for max_workers in [1, 2]:
+                repository_data_scraper = RepositoryDataScraper(
+                    repository=Repo(os.path.join(self.path_to_repositories, repository)),
+                    programming_language=ProgrammingLanguage.TEXT, repository_name=repository, sliding_window_size=2,
+                    max_workers=max_workers)
+                repository_data_scraper.scrape()
+                accumulators.append(repository_data_scraper.accumulator)
+
+            self.assertEqual(accumulators[1], accumulators[0])
+
+    def test_parallel_scrape_should_equal_sequential_scrape_if_branch_stops_early(self):
+        with tempfile.TemporaryDirectory() as directory:
+            def git(*arguments):
+                subprocess.run(['git', '-c', 'user.name=test', '-c', 'user.email=test@example.com', *arguments],
+                               cwd=directory, check=True, capture_output=True)
+
+            def commit(file):
+                with open(os.path.join(directory, file), 'w') as f:
+                    f.write(file)
+                git('add', file)
+                git('commit', '-q', '-m', f'Change {file}')
+
+            # Branch a merges side, whose paths meet at base again. With a sliding window size of 1, the traversal of
+            # a stops there, before reaching root, which is therefore left to branch b
+            git('init', '-q', '-b', 'main')
+            commit('root.txt')
+            commit('base.txt')
+            git('checkout', '-q', '-b', 'side')
+            commit('side.txt')
+            git('checkout', '-q', '-b', 'a', 'main')
+            commit('a.txt')
+            git('merge', '-q', '--no-ff', '-m', 'Merge side', 'side')
+            git('checkout', '-q', '-b', 'b', 'main~1')
+            commit('b.txt')
+
+            accumulators = []
+            for max_workers in [1, 2]:
+                repository_data_scraper = RepositoryDataScraper(repository=Repo(directory),
+                                                                programming_language=ProgrammingLanguage.TEXT,
+                                                                repository_name='branches', sliding_window_size=1,
+                                                                max_workers=max_workers)
+                repository_data_scraper.scrape()
+                accumulators.append(repository_data_scraper.accumulator)
+
+        self.assertEqual(accumulators[1], accumulators[0])
+        self.assertIn(('root.txt', 'b'), [(scenario['file'], scenario['branch'])
+                                          for scenario in accumulators[0]['file_commit_gram_scenarios']])
+
 
 if __name__ == '__main__':
     unittest.main()
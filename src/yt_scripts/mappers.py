@@ -2,16 +2,20 @@ import ast
 import os
 import shutil, stat
 import sys
-from pandas import isna
-from src.yt_scripts.schemas import DummyRow, RepositoryDataRow
-from typing import Iterable
+from dataclasses import fields
+from src.yt_scripts.schemas import DummyRow, LegacyRepositoryDataRow, RepositoryDataRow, RepositoryMetadataRow, \
+    SCENARIO_ROW_COLUMNS, SCENARIO_ROW_TYPES, ScenarioRow, to_scenario_rows
+from typing import Iterable, Optional
 import yt.wrapper as yt
 
 from git import Repo
 import traceback
 
+from src.repository_data_scraper.clone_strategy import CloneStrategy, clone_repository
+from src.repository_data_scraper.git_batch_worker import GitBatchWorker
 from src.repository_data_scraper.repository_data_scraper import RepositoryDataScraper
 from src.repository_data_scraper.programming_language import ProgrammingLanguage
+from src.repository_data_scraper.repository_cache import RepositoryCache
 
 
 class DummyMapper(yt.TypedJob):
@@ -36,51 +40,57 @@ def on_rm_error(func, path, exc_info):
 
 class RepositoryDataMapper(yt.TypedJob):
     sliding_window_size: int = -1
-
-    def __init__(self, sliding_window_size: int = 3):
+    clone_strategy: CloneStrategy = CloneStrategy.FULL
+    repository_cache_directory: Optional[str] = None
+    repository_cache_budget: int = 0
+
+    def __init__(self, sliding_window_size: int = 3, clone_strategy: CloneStrategy = CloneStrategy.FULL,
+                 repository_cache_directory: Optional[str] = None, repository_cache_budget: int = 20 * 1024 ** 3):
+        """
+        Args:
+            sliding_window_size (int): The sliding window size to use for scraping file-commit grams.
+            clone_strategy (CloneStrategy): How to clone the repositories.
+            repository_cache_directory (Optional[str]): A directory on the node that outlives the job, to keep a
+                RepositoryCache of mirrors in. If None, every repository is cloned into the job's tmpfs and removed
+                afterwards.
+            repository_cache_budget (int): The disk budget of the repository cache in bytes.
+        """
         super(RepositoryDataMapper, self).__init__()
         self.sliding_window_size = sliding_window_size
+        self.clone_strategy = clone_strategy
+        self.repository_cache_directory = repository_cache_directory
+        self.repository_cache_budget = repository_cache_budget
         print(f'Using sliding_window_size={self.sliding_window_size}', file=sys.stderr)
+        print(f'Using clone_strategy={self.clone_strategy.value}', file=sys.stderr)
 
     def __call__(self, row: RepositoryDataRow) -> Iterable[RepositoryDataRow]:
         repository_folder = "__".join(row.name.split("/"))
         path_to_repository = os.path.join('/slot/sandbox/repos', repository_folder)
         try:
-            repo_instance = Repo.clone_from(f'https://github.com/{row.name}.git',
-                                            f'{path_to_repository}')
-
-            os.chdir(path_to_repository)
-            print(os.getcwd(), file=sys.stderr)
-
-            if row.programming_language == 'kotlin':
-                programming_language = ProgrammingLanguage.KOTLIN
-            elif row.programming_language == 'java':
-                programming_language = ProgrammingLanguage.JAVA
-            elif row.programming_language == 'python':
-                programming_language = ProgrammingLanguage.PYTHON
+            if self.repository_cache_directory is not None:
+                repository_cache = RepositoryCache.for_clone_strategy(self.repository_cache_directory,
+                                                                      self.repository_cache_budget,
+                                                                      self.clone_strategy)
+                with repository_cache.use(row.name) as repo_instance:
+                    self._scrape(repo_instance, row)
             else:
-                raise ValueError(f'Could not parse programming language: {row.programming_language}'
-                                 '. Supported values: "kotlin", "java", "python"')
+                repo_instance = clone_repository(f'https://github.com/{row.name}.git',
+                                                 f'{path_to_repository}', self.clone_strategy)
 
-            repo_scraper = RepositoryDataScraper(repository=repo_instance,
-                                                 programming_language=programming_language,
-                                                 repository_name=row.name,
-                                                 sliding_window_size=self.sliding_window_size)
-            repo_scraper.scrape()
+                os.chdir(path_to_repository)
+                print(os.getcwd(), file=sys.stderr)
 
-            row.file_commit_gram_scenarios = str(repo_scraper.accumulator['file_commit_gram_scenarios'])
-            row.merge_scenarios = str(repo_scraper.accumulator['merge_scenarios'])
-            row.cherry_pick_scenarios = str(repo_scraper.accumulator['cherry_pick_scenarios'])
+                self._scrape(repo_instance, row)
 
-            # Move back into tmpfs working directrory
-            os.chdir('..')
+                # Move back into tmpfs working directrory
+                os.chdir('..')
 
-            print('Current working directory: '+os.getcwd(), file=sys.stderr)
-            print(os.listdir('.'), file=sys.stderr)
+                print('Current working directory: '+os.getcwd(), file=sys.stderr)
+                print(os.listdir('.'), file=sys.stderr)
 
-            shutil.rmtree(repository_folder, onerror=on_rm_error)
+                shutil.rmtree(repository_folder, onerror=on_rm_error)
 
-            print(os.listdir('.'), file=sys.stderr)
+                print(os.listdir('.'), file=sys.stderr)
         except Exception as e:
             print(traceback.format_exc(), file=sys.stderr)
             row.error = traceback.format_exc()
@@ -88,20 +98,84 @@ class RepositoryDataMapper(yt.TypedJob):
         finally:
             yield row
 
+    def _scrape(self, repo_instance: Repo, row: RepositoryDataRow):
+        """
+        Scrapes the cloned repository and stores the scenarios in the row.
+
+        Raises:
+            ValueError: If the programming language of the row is not supported.
+        """
+        if row.programming_language == 'kotlin':
+            programming_language = ProgrammingLanguage.KOTLIN
+        elif row.programming_language == 'java':
+            programming_language = ProgrammingLanguage.JAVA
+        elif row.programming_language == 'python':
+            programming_language = ProgrammingLanguage.PYTHON
+        else:
+            raise ValueError(f'Could not parse programming language: {row.programming_language}'
+                             '. Supported values: "kotlin", "java", "python"')
+
+        # Keep the git processes answering per-commit queries alive for the whole scraping process
+        with GitBatchWorker(repo_instance) as git_batch_worker:
+            repo_scraper = RepositoryDataScraper(repository=repo_instance,
+                                                 programming_language=programming_language,
+                                                 repository_name=row.name,
+                                                 sliding_window_size=self.sliding_window_size,
+                                                 git_batch_worker=git_batch_worker)
+            repo_scraper.scrape()
+
+        for scenario_type, scenarios in repo_scraper.accumulator.items():
+            setattr(row, scenario_type, to_scenario_rows(scenario_type, scenarios))
+
 class ErrorFilteringMapper(yt.TypedJob):
 
     def __call__(self, row: RepositoryDataRow) -> Iterable[RepositoryDataRow]:
-        parsed_cherry_pick_scenarios = ast.literal_eval(row.cherry_pick_scenarios) if row.cherry_pick_scenarios \
-                                        not in ['None', 'none', 'nan', 'NaN'] and not isna(row.cherry_pick_scenarios) else []
+        cherry_pick_scenarios = row.cherry_pick_scenarios or []
 
         # No cherry pick scenarios available in this repository
-        if not parsed_cherry_pick_scenarios:
+        if not cherry_pick_scenarios:
             yield row
 
 
-        parsed_cherry_pick_scenarios = [cherry_pick_scenario for cherry_pick_scenario in parsed_cherry_pick_scenarios \
-                                        if len(cherry_pick_scenario['parents']) == 1]
+        cherry_pick_scenarios = [cherry_pick_scenario for cherry_pick_scenario in cherry_pick_scenarios \
+                                 if len(cherry_pick_scenario.parents) == 1]
 
-        row.cherry_pick_scenarios = str(parsed_cherry_pick_scenarios)
+        row.cherry_pick_scenarios = cherry_pick_scenarios
         if not row.error:
             yield row
+
+
+class ScenarioColumnMigrationMapper(yt.TypedJob):
+    """
+    Migrates a table written with LegacyRepositoryDataRow to RepositoryDataRow, by parsing the str() of the scenario
+    lists into structured columns once.
+    """
+
+    def __call__(self, row: LegacyRepositoryDataRow) -> Iterable[RepositoryDataRow]:
+        columns = {field.name: getattr(row, field.name) for field in fields(RepositoryMetadataRow)}
+        for scenario_type in SCENARIO_ROW_TYPES:
+            legacy_scenarios = getattr(row, scenario_type)
+            # Missing values were written as the str() of None or nan
+            if legacy_scenarios is None or legacy_scenarios in ['None', 'none', 'nan', 'NaN']:
+                columns[scenario_type] = None
+            else:
+                columns[scenario_type] = to_scenario_rows(scenario_type, ast.literal_eval(legacy_scenarios))
+
+        yield RepositoryDataRow(**columns, error=row.error)
+
+
+class ScenarioFlatteningMapper(yt.TypedJob):
+    """
+    Explodes a RepositoryDataRow into one ScenarioRow per scenario. Scenarios are numbered per repository and scenario
+    type in the order of their scenario column.
+    """
+
+    def __call__(self, row: RepositoryDataRow) -> Iterable[ScenarioRow]:
+        for scenario_type, column in SCENARIO_ROW_COLUMNS.items():
+            for scenario_id, scenario in enumerate(getattr(row, scenario_type) or []):
+                scenario_row = ScenarioRow(repository_name=row.name, scenario_type=scenario_type, id=scenario_id,
+                                           programming_language=row.programming_language,
+                                           file_commit_gram_scenario=None, merge_scenario=None,
+                                           cherry_pick_scenario=None)
+                setattr(scenario_row, column, scenario)
+                yield scenario_row
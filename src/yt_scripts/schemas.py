@@ -1,6 +1,6 @@
 from yt.wrapper import yt_dataclass
-from typing import Optional
-from dataclasses import dataclass
+from typing import Dict, List, Optional
+from dataclasses import dataclass, fields
 
 
 @yt_dataclass
@@ -10,7 +10,41 @@ class DummyRow:
 
 @yt_dataclass
 @dataclass
-class RepositoryDataRow:
+class FileCommitGramScenario:
+    file: str
+    branch: str
+    first_commit: str
+    last_commit: str
+    times_seen_consecutively: int
+
+
+@yt_dataclass
+@dataclass
+class MergeScenario:
+    merge_commit_hash: str
+    had_conflicts: bool
+    parents: List[str]
+
+
+@yt_dataclass
+@dataclass
+class CherryPickScenario:
+    cherry_pick_commit: str
+    cherry_commit: str
+    parents: List[str]
+
+
+# The row type of the scenarios of each scenario type, keyed like RepositoryDataScraper.accumulator
+SCENARIO_ROW_TYPES = {
+    'file_commit_gram_scenarios': FileCommitGramScenario,
+    'merge_scenarios': MergeScenario,
+    'cherry_pick_scenarios': CherryPickScenario,
+}
+
+
+@yt_dataclass
+@dataclass
+class RepositoryMetadataRow:
     id: int
     name: Optional[str]
     is_fork: Optional[bool]
@@ -47,7 +81,79 @@ class RepositoryDataRow:
     labels: Optional[str]
     topics: Optional[str]
     programming_language: Optional[str]
+
+
+@yt_dataclass
+@dataclass
+class RepositoryDataRow(RepositoryMetadataRow):
+    file_commit_gram_scenarios: Optional[List[FileCommitGramScenario]]
+    merge_scenarios: Optional[List[MergeScenario]]
+    cherry_pick_scenarios: Optional[List[CherryPickScenario]]
+    error: Optional[str]
+
+
+@yt_dataclass
+@dataclass
+class LegacyRepositoryDataRow(RepositoryMetadataRow):
+    """
+    Rows of tables written before the scenarios were stored in structured columns. Each scenario column holds the
+    str() of a list of scenario dicts. Only used to migrate such tables, see ScenarioColumnMigrationMapper.
+    """
     file_commit_gram_scenarios: Optional[str]
     merge_scenarios: Optional[str]
     cherry_pick_scenarios: Optional[str]
     error: Optional[str]
+
+
+@yt_dataclass
+@dataclass
+class ScenarioRow:
+    """
+    A single scenario of a repository. Tables of scenario rows are sorted by (repository_name, scenario_type, id), where
+    id is the index of the scenario within the scenario column of its RepositoryDataRow. Only the scenario column
+    matching scenario_type is set.
+    """
+    repository_name: str
+    scenario_type: str
+    id: int
+    programming_language: Optional[str]
+    file_commit_gram_scenario: Optional[FileCommitGramScenario]
+    merge_scenario: Optional[MergeScenario]
+    cherry_pick_scenario: Optional[CherryPickScenario]
+
+
+# The column of ScenarioRow holding the scenario of each scenario type
+SCENARIO_ROW_COLUMNS = {
+    'file_commit_gram_scenarios': 'file_commit_gram_scenario',
+    'merge_scenarios': 'merge_scenario',
+    'cherry_pick_scenarios': 'cherry_pick_scenario',
+}
+
+
+def to_scenario_rows(scenario_type: str, scenarios: List[Dict]) -> List:
+    """
+    Args:
+        scenario_type (str): The type of the scenarios, a key of SCENARIO_ROW_TYPES.
+        scenarios (List[Dict]): The scenarios as emitted by RepositoryDataScraper.
+
+    Returns:
+        List: The scenarios as rows of the row type of scenario_type.
+    """
+    scenario_row_type = SCENARIO_ROW_TYPES[scenario_type]
+    return [scenario_row_type(**scenario) for scenario in scenarios]
+
+
+def to_scenario_dicts(scenario_rows: List) -> List[Dict]:
+    """
+    Args:
+        scenario_rows (List): Scenario rows, e.g. of RepositoryDataRow.merge_scenarios.
+
+    Returns:
+        List[Dict]: The scenarios as dicts, structured like the scenarios emitted by RepositoryDataScraper.
+    """
+    if not scenario_rows:
+        return []
+
+    field_names = [field.name for field in fields(scenario_rows[0])]
+    return [{field_name: getattr(scenario_row, field_name) for field_name in field_names}
+            for scenario_row in scenario_rows]
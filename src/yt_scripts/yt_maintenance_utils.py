@@ -1,11 +1,16 @@
 import os
 import argparse
+import json
 import yt.wrapper as yt
 from dataclasses import asdict
+from typing import Dict, Iterable, List, Optional
 from yt.wrapper.schema import TableSchema
 from src.yt_scripts.mappers import ErrorFilteringMapper
 from src.yt_scripts.mappers import RepositoryDataMapper
-from src.yt_scripts.schemas import RepositoryDataRow
+from src.yt_scripts.mappers import ScenarioColumnMigrationMapper
+from src.yt_scripts.mappers import ScenarioFlatteningMapper
+from src.repository_data_scraper.clone_strategy import CloneStrategy
+from src.yt_scripts.schemas import RepositoryDataRow, SCENARIO_ROW_COLUMNS, ScenarioRow, to_scenario_dicts
 import pandas as pd
 
 def parse_table_into_dataframe(table_path: str) -> pd.DataFrame:
@@ -18,7 +23,8 @@ def parse_table_into_csv_at(output_path: str, table_path: str):
 
 def remove_duplicates_in(table_path: str, yt_client: yt.YtClient):
     dataset_df = parse_table_into_dataframe(table_path)
-    dataset_df.drop_duplicates(inplace=True)
+    # The structured scenario columns hold lists, which cannot be hashed to find duplicates
+    dataset_df = dataset_df[~dataset_df.astype(str).duplicated()]
 
     yt_client.remove(table_path)
     src_table_path = yt.TablePath(
@@ -47,11 +53,117 @@ def handle_errors_in_dataset(yt_client: yt.YtClient, src_table: str, dst_table:
         },
     )
 
-def run_repository_data_mapper(yt_client: yt.YtClient, src_table: str, dst_table: str):
+def migrate_scenario_columns(yt_client: yt.YtClient, src_table: str, dst_table: str):
+    """
+    Migrates a table whose scenario columns hold the str() of the scenario lists (see LegacyRepositoryDataRow) into a
+    new table with structured scenario columns.
+    """
+    dst_table_path = yt.TablePath(dst_table, schema=TableSchema.from_row_type(RepositoryDataRow))
+    yt_client.create('table', dst_table_path)
+
+    yt_client.run_map(
+        ScenarioColumnMigrationMapper(),
+        source_table=src_table,
+        destination_table=dst_table,
+        job_count=10,
+        spec={
+            "mapper": {
+                "docker_image": "docker.io/liqsdev/ytsaurus:python-3.10",
+                "memory_limit": 4 * 1024 ** 3,
+                "cpu_limit": 1
+            },
+        },
+    )
+
+def flatten_scenarios(yt_client: yt.YtClient, src_table: str, dst_table: str):
+    """
+    Explodes a table of RepositoryDataRow into a table with one ScenarioRow per scenario, sorted by
+    (repository_name, scenario_type, id). Evaluation workers can then read contiguous shards of it, see
+    YTConnectionManager.get_scenario_shard_stream.
+    """
+    dst_table_path = yt.TablePath(dst_table, schema=TableSchema.from_row_type(ScenarioRow))
+    yt_client.create('table', dst_table_path)
+
+    yt_client.run_map(
+        ScenarioFlatteningMapper(),
+        source_table=src_table,
+        destination_table=dst_table,
+        job_count=10,
+        spec={
+            "mapper": {
+                "docker_image": "docker.io/liqsdev/ytsaurus:python-3.10",
+                "cpu_limit": 1
+            },
+        },
+    )
+    yt_client.run_sort(dst_table, sort_by=['repository_name', 'scenario_type', 'id'])
+
+def export_scenario_table_to_parquet(table_path: str, output_path: str, row_group_size: int = 10000):
+    """
+    Exports a table of ScenarioRow to a local Parquet file, see write_scenario_rows_to_parquet.
+    """
+    write_scenario_rows_to_parquet(yt.read_table_structured(table=table_path, row_type=ScenarioRow), output_path,
+                                   row_group_size)
+
+def write_scenario_rows_to_parquet(scenario_rows: Iterable[ScenarioRow], output_path: str,
+                                   row_group_size: int = 10000):
+    """
+    Writes scenario rows to a Parquet file with the columns repository_name, scenario_type, id, programming_language
+    and scenario, which holds the scenario as JSON.
+
+    Every row group only holds scenarios of a single scenario type, in the order of scenario_rows. Thus, the
+    statistics of each row group allow readers to skip all row groups of other scenario types, e.g. via
+    pyarrow.parquet.read_table(output_path, filters=[('scenario_type', '=', 'merge_scenarios')]).
+
+    Args:
+        scenario_rows (Iterable[ScenarioRow]): The scenario rows, e.g. sorted by (repository_name, scenario_type, id).
+        output_path (str): The path of the Parquet file.
+        row_group_size (int): The maximum amount of rows per row group.
+    """
+    # PyArrow is only required for the export, not for the other maintenance tasks
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([('repository_name', pa.string()), ('scenario_type', pa.string()), ('id', pa.int64()),
+                        ('programming_language', pa.string()), ('scenario', pa.string())])
+    buffers: Dict[str, List[Dict]] = {scenario_type: [] for scenario_type in SCENARIO_ROW_COLUMNS}
+
+    with pq.ParquetWriter(output_path, schema) as parquet_writer:
+        def flush(scenario_type: str):
+            if buffers[scenario_type]:
+                parquet_writer.write_table(pa.Table.from_pylist(buffers[scenario_type], schema=schema))
+                buffers[scenario_type] = []
+
+        for scenario_row in scenario_rows:
+            scenario = getattr(scenario_row, SCENARIO_ROW_COLUMNS[scenario_row.scenario_type])
+            buffers[scenario_row.scenario_type].append({
+                'repository_name': scenario_row.repository_name,
+                'scenario_type': scenario_row.scenario_type,
+                'id': scenario_row.id,
+                'programming_language': scenario_row.programming_language,
+                'scenario': json.dumps(to_scenario_dicts([scenario])[0]),
+            })
+            if len(buffers[scenario_row.scenario_type]) >= row_group_size:
+                flush(scenario_row.scenario_type)
+
+        for scenario_type in buffers:
+            flush(scenario_type)
+
+def run_repository_data_mapper(yt_client: yt.YtClient, src_table: str, dst_table: str,
+                               clone_strategy: CloneStrategy = CloneStrategy.FULL, tmpfs_size: int = 1500 * 1024 ** 2,
+                               repository_cache_directory: Optional[str] = None,
+                               repository_cache_budget: int = 20 * 1024 ** 3):
+    """
+    Scrapes the repositories of the source table into the destination table, see RepositoryDataMapper for the clone
+    strategy and the repository cache.
+    """
     job_count = len(list(yt.read_table_structured(src_table, RepositoryDataRow)))
 
+    # Partial clones (e.g. CloneStrategy.BLOBLESS) need a fraction of the tmpfs of full clones
     yt_client.run_map(
-        RepositoryDataMapper(sliding_window_size=3),
+        RepositoryDataMapper(sliding_window_size=3, clone_strategy=clone_strategy,
+                             repository_cache_directory=repository_cache_directory,
+                             repository_cache_budget=repository_cache_budget),
         src_table,
         dst_table,
         job_count=job_count,
@@ -60,7 +172,7 @@ def run_repository_data_mapper(yt_client: yt.YtClient, src_table: str, dst_table
                 "docker_image": "docker.io/liqsdev/ytsaurus:python-3.10",
                 "memory_limit": 4 * 1024 ** 3,
                 "memory_reserve_factor": 0.125,
-                "tmpfs_size": 1500 * 1024 ** 2,
+                "tmpfs_size": tmpfs_size,
                 "tmpfs_path": "repos",
                 "cpu_limit": 1
             },
@@ -73,10 +185,43 @@ def main():
     parser.add_argument('--src-table', type=str, help='Source table path', required=True)
     parser.add_argument('--dst-table', type=str, help='Destination table path')
     parser.add_argument('--csv-dataset-path', type=str, help='Path at which to persist CSV of dataset')
+    parser.add_argument('--migrate-scenario-columns', action='store_true',
+                        help='Migrate the source table with scenario columns of str() type into the destination table '
+                             'with structured scenario columns.')
+    parser.add_argument('--flatten-scenarios', action='store_true',
+                        help='Explode the source table into the destination table with one row per scenario.')
+    parser.add_argument('--parquet-export-path', type=str,
+                        help='Path at which to export the destination table of --flatten-scenarios as Parquet')
+    parser.add_argument('--scrape', action='store_true',
+                        help='Scrape the repositories of the source table into the destination table.')
+    parser.add_argument('--clone-strategy', type=str, default='full',
+                        choices=[clone_strategy.value for clone_strategy in CloneStrategy],
+                        help='How --scrape clones the repositories.')
+    parser.add_argument('--repository-cache', type=str, default=None,
+                        help='Directory on the nodes that outlives the jobs of --scrape, to keep a cache of bare '
+                             'repository mirrors in. Cached repositories are refreshed via git fetch instead of being '
+                             'cloned again.')
+    parser.add_argument('--repository-cache-budget', type=float, default=20,
+                        help='Disk budget of the repository cache of each node in GiB.')
     args = parser.parse_args()
 
     yt_client = yt.YtClient(proxy=os.environ["YT_PROXY"], token=os.environ["YT_TOKEN"],
                             config={'pickling': {'ignore_system_modules': True}})
+    if args.migrate_scenario_columns:
+        migrate_scenario_columns(yt_client, args.src_table, args.dst_table)
+        return
+    if args.scrape:
+        run_repository_data_mapper(yt_client, args.src_table, args.dst_table,
+                                   clone_strategy=CloneStrategy(args.clone_strategy),
+                                   repository_cache_directory=args.repository_cache,
+                                   repository_cache_budget=int(args.repository_cache_budget * 1024 ** 3))
+        return
+    if args.flatten_scenarios:
+        flatten_scenarios(yt_client, args.src_table, args.dst_table)
+        if args.parquet_export_path:
+            export_scenario_table_to_parquet(args.dst_table, args.parquet_export_path)
+        return
+
     remove_duplicates_in(args.src_table, yt_client)
 
 